@@ -0,0 +1,160 @@
+import logging
+import math
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from opentelemetry import trace
+from starlette.datastructures import State
+
+from app import metrics
+from app.models.agent_task import AgentTask, Source
+from app.normalizers.base import parse_body
+from app.normalizers.registry import get_normalizer
+from app.services.admission import Decision
+from app.tracing import message_headers, tracer
+
+logger = logging.getLogger(__name__)
+
+# Routers read the raw body themselves, so describe it for the OpenAPI schema.
+WEBHOOK_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"type": "object"}}},
+    }
+}
+
+
+class Throttled(Exception):
+    """Raised by ``publish_task`` for a task admission control refused."""
+
+    def __init__(self, decision: Decision) -> None:
+        super().__init__(f"Event throttled ({decision.reason})")
+        self.decision = decision
+
+
+def admit(state: State, task: AgentTask) -> Decision:
+    """Ask admission control whether ``task`` may be published now."""
+    decision = state.admission.admit(task)
+    if not decision.admitted:
+        metrics.events[task.source, "throttled"].inc()
+        logger.debug(
+            "Event throttled",
+            extra={
+                "source": task.source.value,
+                "priority": task.priority.value,
+                "reason": decision.reason,
+            },
+        )
+    return decision
+
+
+def retry_after(decision: Decision) -> int:
+    return max(1, math.ceil(decision.retry_after))
+
+
+async def publish_task(
+    state: State, task: AgentTask, message: bytes
+) -> tuple[str, str]:
+    """Publish ``task`` unless it is a duplicate, throttled or gets coalesced.
+
+    Returns the task id the caller should report and the outcome:
+    ``accepted``, ``duplicate`` (the original task id), ``coalesced`` or
+    ``cancelled`` (the alert group's task id). Duplicates are acknowledged
+    before admission control, so they never use up its tokens; a throttled
+    task raises ``Throttled``. Publish errors are counted as ``failed`` and
+    re-raised. Either way the dedup key is released first.
+    """
+    source = task.source
+    dedup = state.dedup
+    original_task_id = await dedup.claim(task)
+    if original_task_id is not None:
+        logger.info(
+            "Duplicate event acknowledged",
+            extra={
+                "source": task.source.value,
+                "external_id": task.external_id,
+                "task_id": original_task_id,
+            },
+        )
+        metrics.events[source, "duplicate"].inc()
+        return original_task_id, "duplicate"
+
+    decision = admit(state, task)
+    if not decision.admitted:
+        await dedup.release(task)
+        raise Throttled(decision)
+
+    coalescer = state.coalescer
+    if coalescer.handles(task):
+        outcome = coalescer.add(task)
+        if outcome is not None:
+            metrics.events[source, outcome[1]].inc()
+            return outcome
+
+    started = time.perf_counter()
+    try:
+        with tracer.start_as_current_span(
+            "publish", attributes={"anton.task_id": str(task.task_id)}
+        ):
+            await state.publisher.publish(message, task.priority, message_headers())
+    except Exception:
+        metrics.events[source, "failed"].inc()
+        await dedup.release(task)
+        raise
+    finally:
+        metrics.stage_seconds["publish", source].observe(time.perf_counter() - started)
+    metrics.events[source, "accepted"].inc()
+    return str(task.task_id), "accepted"
+
+
+async def ingest_webhook(request: Request, source: Source) -> JSONResponse:
+    with tracer.start_as_current_span("ingest", attributes={"anton.source": source.value}):
+        return await _ingest_webhook(request, source)
+
+
+async def _ingest_webhook(request: Request, source: Source) -> JSONResponse:
+    started = time.perf_counter()
+    body = await request.body()
+    read = time.perf_counter()
+    metrics.stage_seconds["read", source].observe(read - started)
+    metrics.payload_bytes[source].observe(len(body))
+
+    try:
+        raw = parse_body(body)
+        parsed = time.perf_counter()
+        metrics.stage_seconds["parse", source].observe(parsed - read)
+        with tracer.start_as_current_span("normalize"):
+            task, message = get_normalizer(source).normalize_body(body, raw)
+    except Exception as exc:
+        metrics.events[source, "rejected"].inc()
+        logger.warning(
+            "Failed to normalize payload",
+            extra={"source": source.value, "error": str(exc)},
+        )
+        raise HTTPException(status_code=400, detail=str(exc))
+    metrics.stage_seconds["normalize", source].observe(time.perf_counter() - parsed)
+    metrics.message_bytes[source].observe(len(message))
+    trace.get_current_span().set_attributes(
+        {
+            "anton.task_id": str(task.task_id),
+            "anton.external_id": task.external_id,
+            "anton.priority": task.priority.value,
+        }
+    )
+
+    try:
+        task_id, status = await publish_task(request.app.state, task, message)
+    except Throttled as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=str(exc),
+            headers={"Retry-After": str(retry_after(exc.decision))},
+        )
+    except Exception as exc:
+        logger.error("Failed to publish message", extra={"error": str(exc)})
+        raise HTTPException(status_code=503, detail="Failed to publish message")
+
+    return JSONResponse(
+        status_code=202, content={"task_id": task_id, "status": status}
+    )
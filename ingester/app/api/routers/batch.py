@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+
+from app import metrics
+from app.api.dependencies import verify_webhook_secret
+from app.api.ingest import Throttled, publish_task, retry_after
+from app.config import settings
+from app.models.agent_task import AgentTask, Source
+from app.normalizers.registry import get_normalizer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(dependencies=[Depends(verify_webhook_secret)])
+
+# Path segments match the single-event routes (/webhooks/jira, ...).
+PATH_SOURCES: dict[str, Source] = {
+    "jira": Source.JIRA,
+    "datadog": Source.DATADOG,
+    "sonar": Source.SONARCLOUD,
+}
+
+NDJSON_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+    }
+}
+
+
+async def _iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[tuple[int, bytes | None]]:
+    """Split a streamed body into numbered lines; oversized lines yield None."""
+    buffer = bytearray()
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line_no += 1
+            yield line_no, None if oversized else bytes(buffer[:newline])
+            del buffer[: newline + 1]
+            oversized = False
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer.clear()
+    if buffer or oversized:
+        yield line_no + 1, None if oversized else bytes(buffer)
+
+
+async def _publish_batch(
+    request: Request,
+    batch: list[tuple[int, AgentTask | None, bytes | str]],
+    totals: dict[str, int],
+) -> AsyncIterator[bytes]:
+    state = request.app.state
+    outcomes = iter(
+        await asyncio.gather(
+            *(
+                publish_task(state, task, message)
+                for _, task, message in batch
+                if task is not None
+            ),
+            return_exceptions=True,
+        )
+    )
+
+    for line_no, task, message in batch:
+        result: dict[str, Any] = {"line": line_no}
+        if task is None:
+            result.update(status="rejected", error=message)
+        else:
+            outcome = next(outcomes)
+            if isinstance(outcome, Throttled):
+                result.update(
+                    status="throttled", retry_after=retry_after(outcome.decision)
+                )
+            elif isinstance(outcome, BaseException):
+                result.update(status="failed", error="Failed to publish message")
+            else:
+                task_id, status = outcome
+                result.update(status=status, task_id=task_id)
+        totals[result["status"]] += 1
+        yield orjson.dumps(result) + b"\n"
+
+
+async def _ingest_lines(request: Request, source: Source) -> AsyncIterator[bytes]:
+    normalizer = get_normalizer(source)
+    totals = dict.fromkeys(
+        ("accepted", "duplicate", "coalesced", "cancelled", "throttled", "rejected", "failed"),
+        0,
+    )
+    batch: list[tuple[int, AgentTask | None, bytes | str]] = []
+    normalized = 0
+
+    async for line_no, line in _iter_lines(request.stream(), settings.bulk_max_line_bytes):
+        if line is None:
+            metrics.events[source, "rejected"].inc()
+            batch.append((line_no, None, "Line exceeds bulk_max_line_bytes"))
+        elif not line.strip():
+            continue
+        else:
+            metrics.payload_bytes[source].observe(len(line))
+            try:
+                task, message = normalizer.normalize_body(line)
+            except Exception as exc:
+                metrics.events[source, "rejected"].inc()
+                batch.append((line_no, None, str(exc)))
+            else:
+                metrics.message_bytes[source].observe(len(message))
+                batch.append((line_no, task, message))
+                normalized += 1
+
+        if normalized >= settings.bulk_publish_batch_size:
+            async for result in _publish_batch(request, batch, totals):
+                yield result
+            batch, normalized = [], 0
+
+    async for result in _publish_batch(request, batch, totals):
+        yield result
+
+    logger.info("Bulk ingestion finished", extra={"source": source.value, **totals})
+    yield orjson.dumps({"summary": totals}) + b"\n"
+
+
+@router.post("/webhooks/{source}/batch", openapi_extra=NDJSON_BODY)
+async def batch_webhook(request: Request, source: str) -> Response:
+    """Ingest an NDJSON body of events and return one NDJSON result per line.
+
+    The request body is consumed incrementally; only the compact per-line
+    results are held until the response is sent. (Streaming the response
+    while still reading the body would race Starlette's disconnect listener
+    for ASGI receive messages.)
+    """
+    if source not in PATH_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown source: {source}")
+    results = [line async for line in _ingest_lines(request, PATH_SOURCES[source])]
+    return Response(content=b"".join(results), media_type="application/x-ndjson")
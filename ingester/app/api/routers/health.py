@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Request
 
+from app.services.spool import SpoolingPublisher
+
 router = APIRouter()
 
 
@@ -7,4 +9,12 @@ router = APIRouter()
 async def health(request: Request) -> dict:
     publisher = request.app.state.publisher
     rabbitmq_status = "ok" if publisher.is_connected else "degraded"
-    return {"status": "ok", "rabbitmq": rabbitmq_status}
+    response = {
+        "status": "ok",
+        "rabbitmq": rabbitmq_status,
+        "dedup": request.app.state.dedup.stats(),
+        "admission": request.app.state.admission.stats(),
+    }
+    if isinstance(publisher, SpoolingPublisher):
+        response["spool"] = publisher.stats()
+    return response
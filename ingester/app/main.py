@@ -4,9 +4,17 @@ from collections.abc import AsyncIterator
 
 from fastapi import FastAPI
 
-from app.api.routers import datadog, health, jira, sonar
+from app import metrics
+from app.api.routers import batch, datadog, health, jira, sonar
+from app.api.routers import metrics as metrics_router
+from app.config import settings
 from app.logging_config import setup_logging
-from app.services.publisher import RabbitMQPublisher
+from app.services.admission import create_admission_controller
+from app.services.coalescer import DatadogCoalescer
+from app.services.dedup import create_dedup_cache
+from app.services.publisher import create_publisher
+from app.services.spool import SpoolingPublisher
+from app.tracing import setup_tracing, shutdown_tracing
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -14,18 +22,37 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    publisher = RabbitMQPublisher()
+    setup_tracing()
+    publisher = create_publisher()
     await publisher.connect()
     app.state.publisher = publisher
+    metrics.PUBLISHER_CONNECTED.set_function(lambda: publisher.is_connected)
+    if isinstance(publisher, SpoolingPublisher):
+        metrics.SPOOL_DEPTH.set_function(lambda: publisher.stats()["depth"])
+    app.state.dedup = create_dedup_cache()
+    app.state.coalescer = DatadogCoalescer(
+        publisher, app.state.dedup, settings.coalesce_datadog_window_seconds
+    )
+    app.state.admission = create_admission_controller()
+    await app.state.admission.start()
+    metrics.QUEUE_DEPTH.set_function(
+        lambda: -1 if app.state.admission.queue_depth is None else app.state.admission.queue_depth
+    )
     logger.info("Agent Ingester started")
     yield
+    await app.state.admission.close()
+    await app.state.coalescer.close()
     await publisher.disconnect()
+    await app.state.dedup.close()
+    shutdown_tracing()
     logger.info("Agent Ingester stopped")
 
 
 app = FastAPI(title="Agent Ingester", lifespan=lifespan)
 
 app.include_router(health.router)
+app.include_router(metrics_router.router)
 app.include_router(jira.router)
 app.include_router(datadog.router)
 app.include_router(sonar.router)
+app.include_router(batch.router)
@@ -0,0 +1,61 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.models.agent_task import Source
+
+# Webhook handlers index the children below by source instead of calling
+# labels() on every request.
+
+STAGES = ("read", "parse", "normalize", "publish")
+OUTCOMES = (
+    "accepted", "duplicate", "coalesced", "cancelled", "throttled", "rejected", "failed"
+)
+
+_STAGE_SECONDS = Histogram(
+    "anton_ingester_stage_seconds",
+    "Time spent in each ingestion stage",
+    ["stage", "source"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+_EVENTS = Counter(
+    "anton_ingester_events_total",
+    "Webhook events by outcome",
+    ["source", "outcome"],
+)
+_PAYLOAD_BYTES = Histogram(
+    "anton_ingester_payload_bytes",
+    "Size of incoming webhook bodies",
+    ["source"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+_MESSAGE_BYTES = Histogram(
+    "anton_ingester_message_bytes",
+    "Size of messages published to RabbitMQ",
+    ["source"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+PUBLISHER_CONNECTED = Gauge(
+    "anton_ingester_publisher_connected",
+    "Whether the RabbitMQ publisher connection is open",
+)
+SPOOL_DEPTH = Gauge(
+    "anton_ingester_spool_depth",
+    "Messages waiting in the local spool",
+)
+QUEUE_DEPTH = Gauge(
+    "anton_ingester_orchestrator_queue_depth",
+    "Last sampled depth of the orchestrator queue (-1 if unknown)",
+)
+
+stage_seconds = {
+    (stage, source): _STAGE_SECONDS.labels(stage, source.value)
+    for stage in STAGES
+    for source in Source
+}
+events = {
+    (source, outcome): _EVENTS.labels(source.value, outcome)
+    for source in Source
+    for outcome in OUTCOMES
+}
+payload_bytes = {source: _PAYLOAD_BYTES.labels(source.value) for source in Source}
+message_bytes = {source: _MESSAGE_BYTES.labels(source.value) for source in Source}
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Any
 from uuid import UUID, uuid4
 
+import orjson
 from pydantic import BaseModel, Field
 
 
@@ -19,6 +20,16 @@ class Priority(str, Enum):
     P4 = "P4"
 
 
+# AMQP message priority per task priority; the orchestrator declares its queue
+# with x-max-priority equal to the highest value.
+MESSAGE_PRIORITY: dict[Priority, int] = {
+    Priority.P1: 4,
+    Priority.P2: 3,
+    Priority.P3: 2,
+    Priority.P4: 1,
+}
+
+
 class AgentTask(BaseModel):
     task_id: UUID = Field(default_factory=uuid4)
     source: Source
@@ -27,3 +38,16 @@ class AgentTask(BaseModel):
     priority: Priority
     raw_payload: dict[str, Any]
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_wire(self, raw_body: bytes | None = None) -> bytes:
+        """Encode the task as the JSON message published to RabbitMQ.
+
+        When ``raw_body`` is given it must be the JSON document ``raw_payload``
+        was parsed from; it is spliced into the envelope verbatim instead of
+        being re-encoded.
+        """
+        envelope = self.model_dump(exclude={"raw_payload"})
+        if raw_body is None:
+            envelope["raw_payload"] = self.raw_payload
+            return orjson.dumps(envelope)
+        return b'%s,"raw_payload":%s}' % (orjson.dumps(envelope)[:-1], raw_body)
@@ -7,4 +7,4 @@ class DatadogWebhookPayload(BaseModel):
     alert_priority: str = ""
     alert_status: str = ""
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
@@ -6,14 +6,14 @@ from pydantic import BaseModel
 class JiraPriority(BaseModel):
     name: str = "Medium"
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
 
 
 class JiraFields(BaseModel):
     summary: str = ""
     priority: JiraPriority = JiraPriority()
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
 
 
 class JiraIssue(BaseModel):
@@ -21,11 +21,11 @@ class JiraIssue(BaseModel):
     key: str = ""
     fields: JiraFields = JiraFields()
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
 
 
 class JiraWebhookPayload(BaseModel):
     webhookEvent: str = ""
     issue: JiraIssue = JiraIssue()
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
@@ -4,21 +4,21 @@ from pydantic import BaseModel
 class SonarQualityGate(BaseModel):
     status: str = ""
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
 
 
 class SonarTask(BaseModel):
     id: str = ""
     status: str = ""
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
 
 
 class SonarProject(BaseModel):
     key: str = ""
     name: str = ""
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
 
 
 class SonarWebhookPayload(BaseModel):
@@ -27,4 +27,4 @@ class SonarWebhookPayload(BaseModel):
     qualityGate: SonarQualityGate = SonarQualityGate()
     project: SonarProject = SonarProject()
 
-    model_config = {"extra": "allow"}
+    model_config = {"extra": "ignore"}
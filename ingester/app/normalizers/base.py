@@ -1,9 +1,60 @@
+import logging
 from abc import ABC, abstractmethod
 from typing import Any
 
+import orjson
+
+from app.config import settings
 from app.models.agent_task import AgentTask
+from app.normalizers.projection import Projection
+
+logger = logging.getLogger(__name__)
+
+
+def parse_body(body: bytes) -> dict[str, Any]:
+    raw = orjson.loads(body)
+    if not isinstance(raw, dict):
+        raise ValueError("Webhook payload must be a JSON object")
+    return raw
 
 
 class BaseNormalizer(ABC):
+    projection: Projection | None = None
+
     @abstractmethod
     def normalize(self, raw: dict[str, Any]) -> AgentTask: ...
+
+    def normalize_body(
+        self, body: bytes, raw: dict[str, Any] | None = None
+    ) -> tuple[AgentTask, bytes]:
+        """Parse a raw webhook body once and return the task and its wire message.
+
+        When the source has no projection, or projecting would drop nothing,
+        the original body bytes are embedded in the wire message as
+        ``raw_payload`` rather than re-encoded. Pass ``raw`` if the body has
+        already been parsed with ``parse_body``.
+        """
+        if raw is None:
+            raw = parse_body(body)
+        task = self.normalize(raw)
+        if self.projection is None or not settings.projection_enabled:
+            return task, task.to_wire(body)
+
+        projected = self.projection.apply(raw, body)
+        summary = projected["_projection"]
+        if not summary["dropped_bytes"] and not summary["truncated"]:
+            return task, task.to_wire(body)
+
+        task.raw_payload = projected
+        message = task.to_wire()
+        logger.info(
+            "Payload projected",
+            extra={
+                "task_id": str(task.task_id),
+                "source": task.source.value,
+                "original_bytes": len(body),
+                "message_bytes": len(message),
+                "bytes_saved": summary["dropped_bytes"],
+            },
+        )
+        return task, message
@@ -1,8 +1,10 @@
 from typing import Any
 
+from app.config import settings
 from app.models.agent_task import AgentTask, Priority, Source
 from app.models.webhooks.datadog import DatadogWebhookPayload
 from app.normalizers.base import BaseNormalizer
+from app.normalizers.projection import Projection
 
 _PRIORITY_MAP: dict[str, Priority] = {
     "p1": Priority.P1,
@@ -18,8 +20,32 @@ _STATUS_MAP: dict[str, Priority] = {
     "recovered": Priority.P4,
 }
 
+# Fields kept in raw_payload for the orchestrator's router prompt and rules.
+_PROJECTION = Projection(
+    fields=(
+        "id",
+        "title",
+        "alert_priority",
+        "alert_status",
+        "alert_type",
+        "alert_transition",
+        "alert_query",
+        "body",
+        "event_msg",
+        "tags",
+        "hostname",
+        "date",
+        "link",
+        "url",
+    ),
+    max_list_items=settings.projection_max_list_items,
+    max_string_chars=settings.projection_max_string_chars,
+)
+
 
 class DatadogNormalizer(BaseNormalizer):
+    projection = _PROJECTION
+
     def normalize(self, raw: dict[str, Any]) -> AgentTask:
         payload = DatadogWebhookPayload.model_validate(raw)
 
@@ -1,8 +1,10 @@
 from typing import Any
 
+from app.config import settings
 from app.models.agent_task import AgentTask, Priority, Source
 from app.models.webhooks.jira import JiraWebhookPayload
 from app.normalizers.base import BaseNormalizer
+from app.normalizers.projection import Projection
 
 _PRIORITY_MAP: dict[str, Priority] = {
     "highest": Priority.P1,
@@ -18,8 +20,34 @@ _PRIORITY_MAP: dict[str, Priority] = {
     "trivial": Priority.P4,
 }
 
+# Fields kept in raw_payload for the orchestrator's router prompt and rules.
+_PROJECTION = Projection(
+    fields=(
+        "webhookEvent",
+        "issue.id",
+        "issue.key",
+        "issue.self",
+        "issue.fields.summary",
+        "issue.fields.description",
+        "issue.fields.priority.name",
+        "issue.fields.issuetype.name",
+        "issue.fields.status.name",
+        "issue.fields.labels",
+        "issue.fields.components.name",
+        "issue.fields.project.key",
+        "issue.fields.project.name",
+        "issue.fields.comment.comments.body",
+        "changelog.items.field",
+        "changelog.items.toString",
+    ),
+    max_list_items=settings.projection_max_list_items,
+    max_string_chars=settings.projection_max_string_chars,
+)
+
 
 class JiraNormalizer(BaseNormalizer):
+    projection = _PROJECTION
+
     def normalize(self, raw: dict[str, Any]) -> AgentTask:
         payload = JiraWebhookPayload.model_validate(raw)
         priority_name = payload.issue.fields.priority.name.lower()
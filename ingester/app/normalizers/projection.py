@@ -0,0 +1,83 @@
+import hashlib
+from typing import Any
+
+import orjson
+
+# A compiled field tree: nested dicts of keys, where True keeps the whole subtree.
+_Tree = dict[str, "_Tree"] | bool
+
+
+class Projection:
+    """Declarative subset of a webhook payload to keep in ``AgentTask.raw_payload``.
+
+    ``fields`` are dotted paths (``issue.fields.priority.name``); a path that
+    crosses a list applies to every item in it. Kept lists are capped at
+    ``max_list_items`` and strings at ``max_string_chars``. The projected
+    payload carries a ``_projection`` summary with the size and sha256 of the
+    original body so the dropped data can still be identified.
+    """
+
+    def __init__(
+        self,
+        fields: tuple[str, ...],
+        max_list_items: int,
+        max_string_chars: int,
+    ) -> None:
+        self.fields = fields
+        self.max_list_items = max_list_items
+        self.max_string_chars = max_string_chars
+        self._tree: dict[str, _Tree] = {}
+        for path in fields:
+            node = self._tree
+            *parents, leaf = path.split(".")
+            for key in parents:
+                child = node.setdefault(key, {})
+                if child is True:
+                    break
+                node = child
+            else:
+                node[leaf] = True
+
+    def apply(self, raw: dict[str, Any], body: bytes) -> dict[str, Any]:
+        truncated = [0]
+        projected = self._project(raw, self._tree, truncated)
+        projected_bytes = len(orjson.dumps(projected))
+        projected["_projection"] = {
+            "original_bytes": len(body),
+            "dropped_bytes": max(len(body) - projected_bytes, 0),
+            "truncated": truncated[0],
+            "sha256": hashlib.sha256(body).hexdigest(),
+        }
+        return projected
+
+    def _project(self, value: Any, tree: _Tree, truncated: list[int]) -> Any:
+        if tree is True:
+            return self._cap(value, truncated)
+        if isinstance(value, dict):
+            return {
+                key: self._project(value[key], subtree, truncated)
+                for key, subtree in tree.items()
+                if key in value
+            }
+        if isinstance(value, list):
+            if len(value) > self.max_list_items:
+                truncated[0] += 1
+            return [
+                self._project(item, tree, truncated)
+                for item in value[: self.max_list_items]
+            ]
+        return self._cap(value, truncated)
+
+    def _cap(self, value: Any, truncated: list[int]) -> Any:
+        if isinstance(value, str):
+            if len(value) > self.max_string_chars:
+                truncated[0] += 1
+                return value[: self.max_string_chars] + "…"
+            return value
+        if isinstance(value, dict):
+            return {key: self._cap(item, truncated) for key, item in value.items()}
+        if isinstance(value, list):
+            if len(value) > self.max_list_items:
+                truncated[0] += 1
+            return [self._cap(item, truncated) for item in value[: self.max_list_items]]
+        return value
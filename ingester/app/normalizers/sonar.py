@@ -1,8 +1,10 @@
 from typing import Any
 
+from app.config import settings
 from app.models.agent_task import AgentTask, Priority, Source
 from app.models.webhooks.sonar import SonarWebhookPayload
 from app.normalizers.base import BaseNormalizer
+from app.normalizers.projection import Projection
 
 _GATE_STATUS_MAP: dict[str, Priority] = {
     "error": Priority.P2,
@@ -10,8 +12,30 @@ _GATE_STATUS_MAP: dict[str, Priority] = {
     "ok": Priority.P4,
 }
 
+# Fields kept in raw_payload for the orchestrator's router prompt and rules.
+_PROJECTION = Projection(
+    fields=(
+        "taskId",
+        "status",
+        "analysedAt",
+        "revision",
+        "project.key",
+        "project.name",
+        "project.url",
+        "branch.name",
+        "branch.type",
+        "qualityGate.name",
+        "qualityGate.status",
+        "qualityGate.conditions",
+    ),
+    max_list_items=settings.projection_max_list_items,
+    max_string_chars=settings.projection_max_string_chars,
+)
+
 
 class SonarNormalizer(BaseNormalizer):
+    projection = _PROJECTION
+
     def normalize(self, raw: dict[str, Any]) -> AgentTask:
         payload = SonarWebhookPayload.model_validate(raw)
 
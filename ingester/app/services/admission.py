@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+import aio_pika
+
+from app.config import settings
+from app.models.agent_task import AgentTask, Priority, Source
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take one token; return 0 if one was available, else seconds until one is."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate if self._rate > 0 else float("inf")
+
+
+@dataclass(frozen=True)
+class Decision:
+    admitted: bool
+    retry_after: float = 0.0
+    reason: str = ""
+
+
+ADMITTED = Decision(admitted=True)
+
+
+class AdmissionController:
+    """Sheds low-priority events while the orchestrator is behind.
+
+    The orchestrator queue depth is sampled from the broker every
+    ``sample_interval`` seconds. Above ``shed_p4_depth`` P4 events are
+    refused, above ``shed_p3_depth`` P3 events as well. Each source also has
+    a token bucket that limits P2-P4 events. P1 events are always admitted.
+    If the depth cannot be sampled, depth-based shedding is skipped.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        buckets: dict[Source, TokenBucket],
+        queue_name: str,
+        sample_interval: float,
+        shed_p4_depth: int,
+        shed_p3_depth: int,
+    ) -> None:
+        self._enabled = enabled
+        self._buckets = buckets
+        self._queue_name = queue_name
+        self._sample_interval = sample_interval
+        self._shed_p4_depth = shed_p4_depth
+        self._shed_p3_depth = shed_p3_depth
+        self.queue_depth: int | None = None
+        self._connection: aio_pika.abc.AbstractRobustConnection | None = None
+        self._sampler: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if not self._enabled:
+            return
+        self._sampler = asyncio.create_task(self._sample())
+
+    async def close(self) -> None:
+        if self._sampler is not None:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+        if self._connection is not None and not self._connection.is_closed:
+            await self._connection.close()
+
+    async def _sample(self) -> None:
+        channel: aio_pika.abc.AbstractChannel | None = None
+        while True:
+            try:
+                if self._connection is None:
+                    self._connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+                if channel is None or channel.is_closed:
+                    channel = await self._connection.channel()
+                queue = await channel.declare_queue(self._queue_name, passive=True)
+                self.queue_depth = queue.declaration_result.message_count
+            except Exception as exc:
+                # A missing queue closes the channel; it is reopened next round.
+                self.queue_depth = None
+                logger.debug("Queue depth sample failed", extra={"error": str(exc)})
+            await asyncio.sleep(self._sample_interval)
+
+    def admit(self, task: AgentTask) -> Decision:
+        if not self._enabled:
+            return ADMITTED
+        bucket = self._buckets[task.source]
+        if task.priority == Priority.P1:
+            bucket.take()
+            return ADMITTED
+
+        depth = self.queue_depth
+        if depth is not None and (
+            (task.priority == Priority.P4 and depth >= self._shed_p4_depth)
+            or (task.priority in (Priority.P3, Priority.P4) and depth >= self._shed_p3_depth)
+        ):
+            return Decision(False, self._sample_interval, "queue_depth")
+
+        wait = bucket.take()
+        if wait > 0:
+            return Decision(False, wait, "rate_limited")
+        return ADMITTED
+
+    def stats(self) -> dict[str, int | None | bool]:
+        return {"enabled": self._enabled, "queue_depth": self.queue_depth}
+
+
+def create_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        enabled=settings.admission_enabled,
+        buckets={
+            Source.JIRA: TokenBucket(settings.admission_jira_rate, settings.admission_jira_burst),
+            Source.DATADOG: TokenBucket(
+                settings.admission_datadog_rate, settings.admission_datadog_burst
+            ),
+            Source.SONARCLOUD: TokenBucket(
+                settings.admission_sonarcloud_rate, settings.admission_sonarcloud_burst
+            ),
+        },
+        queue_name=settings.admission_queue_name,
+        sample_interval=settings.admission_sample_interval,
+        shed_p4_depth=settings.admission_shed_p4_depth,
+        shed_p3_depth=settings.admission_shed_p3_depth,
+    )
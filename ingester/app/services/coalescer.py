@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+from uuid import UUID, uuid4
+
+from opentelemetry import trace
+from opentelemetry.context import Context
+
+from app import metrics
+from app.models.agent_task import AgentTask, Priority, Source
+from app.services.dedup import DedupCache
+from app.services.spool import Headers
+from app.tracing import message_headers, tracer
+
+logger = logging.getLogger(__name__)
+
+# Leading "[Triggered]", "[P1]", "[Warn on host:web-1]" style markers.
+_TITLE_MARKERS = re.compile(r"^(\s*\[[^\]]*\])+\s*")
+_DIGITS = re.compile(r"\d+")
+_RECOVERY = "recovered"
+# A group publish is retried this many times in all, backing off from
+# _RETRY_DELAY seconds, before its members are given up on.
+_PUBLISH_ATTEMPTS = 3
+_RETRY_DELAY = 1.0
+
+
+class Publisher(Protocol):
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None: ...
+
+
+@dataclass
+class _Group:
+    task_id: UUID
+    members: list[AgentTask] = field(default_factory=list)
+    keys: set[str] = field(default_factory=set)
+    # The members' ingest spans, linked from the group's publish span.
+    links: list[trace.Link] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode(), digest_size=8).hexdigest()
+
+
+def _group_keys(task: AgentTask) -> set[str]:
+    """Keys under which an alert is related to others: monitor, tag set, title."""
+    keys = {f"monitor:{task.external_id}"}
+
+    tags: Any = task.raw_payload.get("tags")
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if isinstance(tags, list) and tags:
+        tag_set = sorted({str(tag).strip() for tag in tags if str(tag).strip()})
+        keys.add(f"tags:{_digest(','.join(tag_set))}")
+
+    title = _DIGITS.sub("#", _TITLE_MARKERS.sub("", task.title)).strip().lower()
+    if title:
+        keys.add(f"title:{_digest(title)}")
+    return keys
+
+
+def _is_recovery(task: AgentTask) -> bool:
+    payload = task.raw_payload
+    return any(
+        str(payload.get(key, "")).lower() == _RECOVERY
+        for key in ("alert_status", "alert_transition")
+    )
+
+
+class DatadogCoalescer:
+    """Groups related Datadog alerts arriving within a window into one task.
+
+    The first alert of a group opens a window of ``window`` seconds; related
+    alerts arriving inside it join the group instead of being published. When
+    the window closes, one aggregated ``AgentTask`` listing every member alert
+    is published under the group's task id, with the highest member priority.
+    A P1 alert is not held: it is published at once, flushing the group it
+    joins. A recovery cancels only the recovering monitor's pending alerts;
+    the rest of its group is still published. If the group publish keeps
+    failing, the members' dedup keys are released so a redelivered alert is
+    not acknowledged as a duplicate. Groups are local to this ingester
+    replica.
+    """
+
+    def __init__(self, publisher: Publisher, dedup: DedupCache, window: float) -> None:
+        self._publisher = publisher
+        self._dedup = dedup
+        self._window = window
+        self._index: dict[str, _Group] = {}
+        self._publishing: set[asyncio.Task[None]] = set()
+
+    def handles(self, task: AgentTask) -> bool:
+        return self._window > 0 and task.source == Source.DATADOG
+
+    def add(self, task: AgentTask) -> tuple[str, str] | None:
+        """Return ``(group task id, status)``, or None to publish ``task`` now."""
+        keys = _group_keys(task)
+
+        if _is_recovery(task):
+            return self._recover(task)
+
+        group = next((self._index[key] for key in keys if key in self._index), None)
+        if group is None:
+            if task.priority == Priority.P1:
+                return None
+            group = _Group(task_id=uuid4())
+            group.timer = asyncio.get_running_loop().call_later(
+                self._window, self._flush, group
+            )
+        group.members.append(task)
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            group.links.append(trace.Link(span_context))
+        group.keys |= keys
+        for key in keys:
+            self._index[key] = group
+        if task.priority == Priority.P1:
+            self._flush(group)
+        return str(group.task_id), "coalesced"
+
+    def _recover(self, task: AgentTask) -> tuple[str, str] | None:
+        """Cancel the pending alerts of the monitor ``task`` recovers."""
+        group = self._index.get(f"monitor:{task.external_id}")
+        if group is None:
+            return None
+        recovered = [m for m in group.members if m.external_id == task.external_id]
+        group.members = [m for m in group.members if m.external_id != task.external_id]
+        for member in recovered:
+            self._release(member)
+        logger.info(
+            "Coalesced alerts cancelled by recovery",
+            extra={
+                "task_id": str(group.task_id),
+                "cancelled": len(recovered),
+                "remaining": len(group.members),
+            },
+        )
+        if not group.members:
+            self._close(group)
+            return str(group.task_id), "cancelled"
+
+        # Stop routing alerts to the group under keys only the recovered had.
+        keys = set().union(*(_group_keys(member) for member in group.members))
+        for key in group.keys - keys:
+            if self._index.get(key) is group:
+                del self._index[key]
+        group.keys = keys
+        return str(group.task_id), "cancelled"
+
+    def _close(self, group: _Group) -> None:
+        if group.timer is not None:
+            group.timer.cancel()
+        for key in group.keys:
+            if self._index.get(key) is group:
+                del self._index[key]
+
+    def _release(self, task: AgentTask) -> None:
+        release = asyncio.ensure_future(self._dedup.release(task))
+        self._publishing.add(release)
+        release.add_done_callback(self._publishing.discard)
+
+    def _flush(self, group: _Group) -> None:
+        self._close(group)
+        publish = asyncio.create_task(self._publish(group))
+        self._publishing.add(publish)
+        publish.add_done_callback(self._publishing.discard)
+
+    @staticmethod
+    def aggregate(group_id: UUID, members: list[AgentTask]) -> AgentTask:
+        lead = members[0]
+        if len(members) == 1:
+            return lead.model_copy(update={"task_id": group_id})
+
+        return AgentTask(
+            task_id=group_id,
+            source=Source.DATADOG,
+            external_id=lead.external_id,
+            title=f"{lead.title} (+{len(members) - 1} related alerts)",
+            priority=min(member.priority for member in members),
+            raw_payload={
+                "coalesced_alerts": len(members),
+                "alerts": [
+                    {
+                        "task_id": str(member.task_id),
+                        "external_id": member.external_id,
+                        "title": member.title,
+                        "priority": member.priority.value,
+                        "created_at": member.created_at.isoformat(),
+                        "payload": member.raw_payload,
+                    }
+                    for member in members
+                ],
+            },
+            created_at=lead.created_at,
+        )
+
+    async def _publish(self, group: _Group) -> None:
+        task = self.aggregate(group.task_id, group.members)
+        message = task.to_wire()
+        # A group has many ingest requests, so its trace starts here.
+        with tracer.start_as_current_span(
+            "publish",
+            context=Context(),
+            links=group.links,
+            attributes={
+                "anton.task_id": str(task.task_id),
+                "anton.coalesced_alerts": len(group.members),
+            },
+        ):
+            headers = message_headers()
+            for attempt in range(1, _PUBLISH_ATTEMPTS + 1):
+                try:
+                    await self._publisher.publish(message, task.priority, headers)
+                    break
+                except Exception as exc:
+                    logger.warning(
+                        "Failed to publish coalesced alert group",
+                        extra={
+                            "task_id": str(task.task_id),
+                            "attempt": attempt,
+                            "error": str(exc),
+                        },
+                    )
+                    if attempt < _PUBLISH_ATTEMPTS:
+                        await asyncio.sleep(_RETRY_DELAY * 2 ** (attempt - 1))
+            else:
+                logger.error(
+                    "Dropped coalesced alert group",
+                    extra={"task_id": str(task.task_id), "members": len(group.members)},
+                )
+                metrics.events[Source.DATADOG, "failed"].inc()
+                for member in group.members:
+                    self._release(member)
+                return
+        logger.info(
+            "Published coalesced alert group",
+            extra={"task_id": str(task.task_id), "members": len(group.members)},
+        )
+
+    async def close(self) -> None:
+        """Publish every open group immediately."""
+        for group in {id(group): group for group in self._index.values()}.values():
+            self._flush(group)
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.models.agent_task import AgentTask, Source
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "anton:dedup"
+
+
+def fingerprint(task: AgentTask) -> str:
+    """Fingerprint of the task content that decides whether two events are the same.
+
+    Repeated Jira updates for one edit and Datadog re-triggers of one monitor
+    share their title and derived priority, while a real change (new summary,
+    escalated priority) produces a new fingerprint.
+    """
+    content = f"{task.title}\0{task.priority.value}".encode()
+    return hashlib.blake2b(content, digest_size=8).hexdigest()
+
+
+class DedupBackend(Protocol):
+    async def claim(self, key: str, task_id: str, ttl: float) -> str | None:
+        """Record ``task_id`` under ``key`` unless present; return the existing task id."""
+        ...
+
+    async def release(self, key: str, task_id: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryDedupBackend:
+    """Per-process TTL cache with LRU eviction once ``max_entries`` is reached."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def claim(self, key: str, task_id: str, ttl: float) -> str | None:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+            del self._entries[key]
+
+        self._entries[key] = (task_id, now + ttl)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return None
+
+    async def release(self, key: str, task_id: str) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == task_id:
+            del self._entries[key]
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisDedupBackend:
+    """Shared backend so every ingester replica deduplicates against the same window."""
+
+    # Delete the key only if it still holds our task id.
+    _RELEASE = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    def __init__(self, url: str) -> None:
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def claim(self, key: str, task_id: str, ttl: float) -> str | None:
+        if await self._redis.set(key, task_id, nx=True, px=int(ttl * 1000)):
+            return None
+        existing = await self._redis.get(key)
+        if existing is None:
+            # Expired between SET and GET; treat as a fresh event.
+            return await self.claim(key, task_id, ttl)
+        return existing
+
+    async def release(self, key: str, task_id: str) -> None:
+        await self._redis.eval(self._RELEASE, 1, key, task_id)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class DedupCache:
+    def __init__(self, backend: DedupBackend, windows: dict[Source, float]) -> None:
+        self._backend = backend
+        self._windows = windows
+        self.hits: dict[Source, int] = dict.fromkeys(Source, 0)
+        self.misses: dict[Source, int] = dict.fromkeys(Source, 0)
+
+    @staticmethod
+    def key(task: AgentTask) -> str:
+        return f"{KEY_PREFIX}:{task.source.value}:{task.external_id}:{fingerprint(task)}"
+
+    async def claim(self, task: AgentTask) -> str | None:
+        """Return the task id of an earlier identical event, or None if ``task`` is new."""
+        window = self._windows.get(task.source, 0)
+        if window <= 0:
+            return None
+
+        original = await self._backend.claim(self.key(task), str(task.task_id), window)
+        if original is None:
+            self.misses[task.source] += 1
+        else:
+            self.hits[task.source] += 1
+        return original
+
+    async def release(self, task: AgentTask) -> None:
+        """Forget ``task`` so a retry of an event that failed to publish is not dropped."""
+        if self._windows.get(task.source, 0) > 0:
+            await self._backend.release(self.key(task), str(task.task_id))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            source.value: {"hits": self.hits[source], "misses": self.misses[source]}
+            for source in Source
+        }
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+
+def create_dedup_cache() -> DedupCache:
+    backend: DedupBackend
+    if settings.dedup_redis_url:
+        backend = RedisDedupBackend(settings.dedup_redis_url)
+    else:
+        backend = MemoryDedupBackend(settings.dedup_max_entries)
+    windows = {
+        Source.JIRA: settings.dedup_jira_window_seconds,
+        Source.DATADOG: settings.dedup_datadog_window_seconds,
+        Source.SONARCLOUD: settings.dedup_sonarcloud_window_seconds,
+    }
+    logger.info(
+        "Dedup cache configured",
+        extra={
+            "backend": type(backend).__name__,
+            "windows": {source.value: window for source, window in windows.items()},
+        },
+    )
+    return DedupCache(backend, windows)
@@ -1,9 +1,12 @@
+import asyncio
 import logging
 
 import aio_pika
 from aio_pika import DeliveryMode, ExchangeType, Message
 
 from app.config import settings
+from app.models.agent_task import MESSAGE_PRIORITY, Priority
+from app.services.spool import Headers, SpoolingPublisher, create_spool
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +14,16 @@ EXCHANGE_NAME = "agent_events"
 ROUTING_KEY = "task.created"
 
 
+def _message(body: bytes, priority: Priority, headers: Headers | None) -> Message:
+    return Message(
+        body,
+        headers=headers,
+        delivery_mode=DeliveryMode.PERSISTENT,
+        content_type="application/json",
+        priority=MESSAGE_PRIORITY[priority],
+    )
+
+
 class RabbitMQPublisher:
     def __init__(self) -> None:
         self._connection: aio_pika.abc.AbstractRobustConnection | None = None
@@ -30,17 +43,202 @@ class RabbitMQPublisher:
             await self._connection.close()
             logger.info("Disconnected from RabbitMQ")
 
-    async def publish(self, body: bytes) -> None:
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
         if self._exchange is None:
             raise RuntimeError("Publisher not connected")
-        message = Message(
-            body,
-            delivery_mode=DeliveryMode.PERSISTENT,
-            content_type="application/json",
+        await self._exchange.publish(
+            _message(body, priority, headers), routing_key=ROUTING_KEY
+        )
+        logger.info(
+            "Published message",
+            extra={"routing_key": ROUTING_KEY, "priority": priority.value},
         )
-        await self._exchange.publish(message, routing_key=ROUTING_KEY)
-        logger.info("Published message", extra={"routing_key": ROUTING_KEY})
 
     @property
     def is_connected(self) -> bool:
         return self._connection is not None and not self._connection.is_closed
+
+
+class BatchingRabbitMQPublisher:
+    """Publisher that coalesces concurrent publishes into confirmed micro-batches.
+
+    Callers still await ``publish`` for their own message: each one gets a
+    future that resolves once the broker confirms that message, or fails if
+    the broker nacks it or the confirm times out. Batches are flushed when
+    they reach ``batch_size`` or after ``linger_ms``, and are spread across a
+    pool of confirm-mode channels so one slow channel does not stall the rest.
+    """
+
+    def __init__(
+        self,
+        pool_size: int | None = None,
+        batch_size: int | None = None,
+        linger_ms: float | None = None,
+        confirm_timeout: float | None = None,
+    ) -> None:
+        self._pool_size = pool_size or settings.publisher_channel_pool_size
+        self._batch_size = batch_size or settings.publisher_batch_size
+        self._linger = (
+            linger_ms if linger_ms is not None else settings.publisher_batch_linger_ms
+        ) / 1000
+        self._confirm_timeout = confirm_timeout or settings.publisher_confirm_timeout
+
+        self._connection: aio_pika.abc.AbstractRobustConnection | None = None
+        self._exchanges: list[aio_pika.abc.AbstractExchange] = []
+        self._idle: asyncio.Queue[aio_pika.abc.AbstractExchange] = asyncio.Queue()
+        self._pending: asyncio.Queue[
+            tuple[bytes, Priority, Headers | None, asyncio.Future[None]]
+        ] = asyncio.Queue()
+        self._batch_ready = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    async def connect(self) -> None:
+        self._connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+        exchanges = []
+        for _ in range(self._pool_size):
+            channel = await self._connection.channel(publisher_confirms=True)
+            exchanges.append(
+                await channel.declare_exchange(
+                    EXCHANGE_NAME, ExchangeType.TOPIC, durable=True
+                )
+            )
+        self._start(exchanges)
+        logger.info(
+            "Connected to RabbitMQ",
+            extra={
+                "exchange": EXCHANGE_NAME,
+                "channels": self._pool_size,
+                "batch_size": self._batch_size,
+            },
+        )
+
+    def _start(self, exchanges: list[aio_pika.abc.AbstractExchange]) -> None:
+        self._exchanges = exchanges
+        for exchange in exchanges:
+            self._idle.put_nowait(exchange)
+        self._flusher = asyncio.create_task(self._run())
+
+    async def disconnect(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        queued = []
+        while not self._pending.empty():
+            queued.append(self._pending.get_nowait())
+        _disconnected(queued)
+        self._exchanges = []
+
+        if self._connection and not self._connection.is_closed:
+            await self._connection.close()
+            logger.info("Disconnected from RabbitMQ")
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        if not self._exchanges:
+            raise RuntimeError("Publisher not connected")
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._pending.put_nowait((body, priority, headers, future))
+        if self._pending.qsize() >= self._batch_size:
+            self._batch_ready.set()
+        await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._pending.get()]
+            try:
+                if self._pending.qsize() < self._batch_size - 1:
+                    try:
+                        await asyncio.wait_for(self._batch_ready.wait(), self._linger)
+                    except TimeoutError:
+                        pass
+                self._batch_ready.clear()
+                while len(batch) < self._batch_size and not self._pending.empty():
+                    batch.append(self._pending.get_nowait())
+                exchange = await self._idle.get()
+            except asyncio.CancelledError:
+                # disconnect() fails what is still queued; this batch was taken off it.
+                _disconnected(batch)
+                raise
+
+            task = asyncio.create_task(self._flush(exchange, batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(
+        self,
+        exchange: aio_pika.abc.AbstractExchange,
+        batch: list[tuple[bytes, Priority, Headers | None, asyncio.Future[None]]],
+    ) -> None:
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    *(
+                        exchange.publish(
+                            _message(body, priority, headers), routing_key=ROUTING_KEY
+                        )
+                        for body, priority, headers, _ in batch
+                    ),
+                    return_exceptions=True,
+                ),
+                self._confirm_timeout,
+            )
+        except Exception as exc:
+            results = [exc] * len(batch)
+        finally:
+            self._idle.put_nowait(exchange)
+
+        failed = 0
+        for (*_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                failed += 1
+                future.set_exception(result)
+            else:
+                future.set_result(None)
+
+        if failed:
+            logger.error(
+                "Batch publish failed",
+                extra={"routing_key": ROUTING_KEY, "size": len(batch), "failed": failed},
+            )
+        else:
+            logger.debug(
+                "Published batch",
+                extra={"routing_key": ROUTING_KEY, "size": len(batch)},
+            )
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed
+
+
+def _disconnected(
+    batch: list[tuple[bytes, Priority, Headers | None, asyncio.Future[None]]],
+) -> None:
+    for *_, future in batch:
+        if not future.done():
+            future.set_exception(RuntimeError("Publisher disconnected"))
+
+
+def create_publisher() -> (
+    RabbitMQPublisher | BatchingRabbitMQPublisher | SpoolingPublisher
+):
+    publisher: RabbitMQPublisher | BatchingRabbitMQPublisher
+    if settings.publisher_mode == "batched":
+        publisher = BatchingRabbitMQPublisher()
+    else:
+        publisher = RabbitMQPublisher()
+    if settings.spool_enabled:
+        return SpoolingPublisher(publisher, create_spool())
+    return publisher
@@ -0,0 +1,458 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, BinaryIO, Protocol
+
+from app.config import settings
+from app.models.agent_task import MESSAGE_PRIORITY, Priority
+
+logger = logging.getLogger(__name__)
+
+# Each record is: body length (u32), crc32 (u32), message priority (u8),
+# body. If the priority has _HAS_HEADERS set, the message headers' length
+# (u16) and the headers as JSON come before the body, and the crc32 covers
+# both.
+_HEADER = struct.Struct(">IIB")
+_HEADERS_LENGTH = struct.Struct(">H")
+_HAS_HEADERS = 0x80
+_PRIORITY_BY_LEVEL = {level: priority for priority, level in MESSAGE_PRIORITY.items()}
+_SEGMENT_GLOB = "segment-*.log"
+_CURSOR_FILE = "cursor"
+
+# A read position in the spool: (segment sequence number, byte offset).
+Position = tuple[int, int]
+# AMQP message headers, e.g. the trace context.
+Headers = dict[str, Any]
+
+
+class SpoolFullError(RuntimeError):
+    pass
+
+
+class Publisher(Protocol):
+    async def connect(self) -> None: ...
+
+    async def disconnect(self) -> None: ...
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None: ...
+
+    @property
+    def is_connected(self) -> bool: ...
+
+
+class Spool:
+    """Disk-backed, append-only FIFO of message bodies.
+
+    Records are appended to numbered segment files and become durable in
+    groups: appenders wait for a shared fsync issued at most every
+    ``fsync_interval_ms``. The reader position is kept in a cursor file and
+    fully drained segments are deleted. On open, a torn record at the tail of
+    the last segment (from a crash mid-write) is truncated away. Only durable
+    records are read; if an fsync fails, the records it covered are
+    truncated away too, as their appenders were told they failed.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int,
+        max_bytes: int,
+        fsync_interval_ms: float,
+    ) -> None:
+        self._dir = Path(directory)
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._fsync_interval = fsync_interval_ms / 1000
+
+        self._write_seq = 0
+        self._file: BinaryIO | None = None
+        self._cursor: Position = (0, 0)
+        self._depth = 0
+        self._size = 0
+        # End of the fsynced records in the write segment, and what follows it.
+        self._durable_end = 0
+        self._unsynced_records = 0
+        self._unsynced_bytes = 0
+
+        self._sync_waiter: asyncio.Future[None] | None = None
+        self._sync_lock = asyncio.Lock()
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def _segment_path(self, seq: int) -> Path:
+        return self._dir / f"segment-{seq:020d}.log"
+
+    def _segments(self) -> list[int]:
+        return sorted(int(p.stem.split("-")[1]) for p in self._dir.glob(_SEGMENT_GLOB))
+
+    def open(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+
+        cursor_path = self._dir / _CURSOR_FILE
+        if cursor_path.exists():
+            seq, offset = cursor_path.read_text().split()
+            self._cursor = (int(seq), int(offset))
+        elif segments:
+            self._cursor = (segments[0], 0)
+        else:
+            self._cursor = (1, 0)
+
+        for seq in segments:
+            if seq < self._cursor[0]:
+                self._segment_path(seq).unlink()
+        segments = [seq for seq in segments if seq >= self._cursor[0]]
+
+        if segments:
+            self._write_seq = segments[-1]
+            valid_end = self._truncate_torn_tail(self._write_seq)
+            self._durable_end = valid_end
+            if self._cursor[0] == self._write_seq and self._cursor[1] > valid_end:
+                self._cursor = (self._write_seq, valid_end)
+        else:
+            self._write_seq = self._cursor[0]
+            self._cursor = (self._write_seq, 0)
+
+        self._size = sum(self._segment_path(seq).stat().st_size for seq in segments)
+        self._depth = sum(
+            1 for _ in self._scan(self._cursor, until_seq=self._write_seq)
+        )
+        self._file = open(self._segment_path(self._write_seq), "ab")
+        logger.info(
+            "Spool opened",
+            extra={"dir": str(self._dir), "depth": self._depth, "bytes": self._size},
+        )
+
+    def _truncate_torn_tail(self, seq: int) -> int:
+        path = self._segment_path(seq)
+        # Offsets only grow, so the largest is the end of the last whole record.
+        valid_end = max(
+            (end for *_, (_, end) in self._scan((seq, 0), until_seq=seq)), default=0
+        )
+        if path.stat().st_size > valid_end:
+            logger.warning(
+                "Truncating torn spool record",
+                extra={"segment": path.name, "offset": valid_end},
+            )
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+                os.fsync(f.fileno())
+        return valid_end
+
+    def _scan(
+        self, start: Position, until_seq: int, limit: int | None = None
+    ) -> Iterator[tuple[bytes, Priority, Headers | None, Position]]:
+        """Yield ``(body, priority, headers, position after record)`` from ``start``."""
+        seq, offset = start
+        count = 0
+        while seq <= until_seq:
+            path = self._segment_path(seq)
+            if path.exists():
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    while limit is None or count < limit:
+                        header = f.read(_HEADER.size)
+                        if len(header) < _HEADER.size:
+                            break
+                        length, crc, level = _HEADER.unpack(header)
+                        encoded = b""
+                        if level & _HAS_HEADERS:
+                            size = f.read(_HEADERS_LENGTH.size)
+                            if len(size) < _HEADERS_LENGTH.size:
+                                break
+                            encoded = f.read(_HEADERS_LENGTH.unpack(size)[0])
+                        body = f.read(length)
+                        if len(body) < length or zlib.crc32(encoded + body) != crc:
+                            break
+                        offset = f.tell()
+                        count += 1
+                        headers = json.loads(encoded) if encoded else None
+                        level &= ~_HAS_HEADERS
+                        priority = _PRIORITY_BY_LEVEL.get(level, Priority.P3)
+                        yield body, priority, headers, (seq, offset)
+            if limit is not None and count >= limit:
+                return
+            seq, offset = seq + 1, 0
+
+    async def append(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        if self._file is None:
+            raise RuntimeError("Spool not open")
+        level = MESSAGE_PRIORITY[priority]
+        prefix = b""
+        encoded = b""
+        if headers:
+            level |= _HAS_HEADERS
+            encoded = json.dumps(headers, separators=(",", ":")).encode()
+            prefix = _HEADERS_LENGTH.pack(len(encoded)) + encoded
+        record_size = _HEADER.size + len(prefix) + len(body)
+        if self._size + record_size > self._max_bytes:
+            raise SpoolFullError("Spool is full")
+
+        self._file.write(_HEADER.pack(len(body), zlib.crc32(encoded + body), level))
+        self._file.write(prefix)
+        self._file.write(body)
+        self._file.flush()
+        self._depth += 1
+        self._size += record_size
+        self._unsynced_records += 1
+        self._unsynced_bytes += record_size
+
+        if self._sync_waiter is None:
+            loop = asyncio.get_running_loop()
+            self._sync_waiter = loop.create_future()
+            loop.call_later(self._fsync_interval, self._schedule_sync)
+        await asyncio.shield(self._sync_waiter)
+
+    def _schedule_sync(self) -> None:
+        waiter, self._sync_waiter = self._sync_waiter, None
+        if waiter is not None:
+            asyncio.create_task(self._sync(waiter))
+
+    async def _sync(self, waiter: asyncio.Future[None]) -> None:
+        async with self._sync_lock:
+            # Records appended during the fsync belong to the next group.
+            end = self._file.tell()
+            records, size = self._unsynced_records, self._unsynced_bytes
+            try:
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+            except Exception as exc:
+                self._discard_unsynced()
+                waiter.set_exception(exc)
+                return
+            self._durable_end = end
+            self._unsynced_records -= records
+            self._unsynced_bytes -= size
+            try:
+                if self._file.tell() >= self._segment_bytes:
+                    self._roll()
+            except Exception as exc:
+                waiter.set_exception(exc)
+            else:
+                waiter.set_result(None)
+
+    def _discard_unsynced(self) -> None:
+        """Truncate records whose fsync failed, so they are never drained."""
+        # The next group shares the truncated tail; fail it now as well.
+        pending, self._sync_waiter = self._sync_waiter, None
+        if pending is not None:
+            pending.set_exception(OSError("Spool fsync failed"))
+        try:
+            os.ftruncate(self._file.fileno(), self._durable_end)
+            self._file.seek(self._durable_end)
+        except OSError as exc:
+            logger.error(
+                "Failed to truncate unsynced spool records; they may be redelivered",
+                extra={"error": str(exc)},
+            )
+            return
+        logger.warning(
+            "Discarded spool records after a failed fsync",
+            extra={"records": self._unsynced_records},
+        )
+        self._depth -= self._unsynced_records
+        self._size -= self._unsynced_bytes
+        self._unsynced_records = self._unsynced_bytes = 0
+
+    def _roll(self) -> None:
+        # Records appended while the fsync above ran are not yet durable.
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._write_seq += 1
+        self._file = open(self._segment_path(self._write_seq), "ab")
+        self._durable_end = 0
+        self._unsynced_records = self._unsynced_bytes = 0
+        dir_fd = os.open(self._dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def read_batch(
+        self, limit: int
+    ) -> list[tuple[bytes, Priority, Headers | None, Position]]:
+        """Up to ``limit`` durable records from the cursor, not yet consumed."""
+        records = self._scan(self._cursor, until_seq=self._write_seq, limit=limit)
+        return list(
+            itertools.takewhile(
+                lambda record: record[-1][0] < self._write_seq
+                or record[-1][1] <= self._durable_end,
+                records,
+            )
+        )
+
+    def commit(self, position: Position, count: int) -> None:
+        """Advance the cursor past ``count`` records ending at ``position``."""
+        for seq in range(self._cursor[0], position[0]):
+            path = self._segment_path(seq)
+            if path.exists():
+                self._size -= path.stat().st_size
+                path.unlink()
+        self._cursor = position
+        self._depth -= count
+
+        tmp = self._dir / f"{_CURSOR_FILE}.tmp"
+        tmp.write_text(f"{position[0]} {position[1]}")
+        os.replace(tmp, self._dir / _CURSOR_FILE)
+
+    async def close(self) -> None:
+        async with self._sync_lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+
+class SpoolingPublisher:
+    """Publisher wrapper that falls back to the local spool when RabbitMQ fails.
+
+    A message goes straight to the broker when nothing is spooled; if the
+    publish fails or exceeds ``spool_publish_timeout`` it is spooled instead.
+    While the spool holds a backlog, new messages are appended behind it so
+    ordering is kept, and a background task drains it once the broker is
+    reachable. Delivery is at-least-once: a timed-out publish may still reach
+    the broker, and a crash between publish and cursor commit replays records.
+    """
+
+    def __init__(self, publisher: Publisher, spool: Spool) -> None:
+        self._publisher = publisher
+        self._spool = spool
+        self._connected_once = False
+        self._wakeup = asyncio.Event()
+        self._drainer: asyncio.Task[None] | None = None
+        self._drained: deque[tuple[float, int]] = deque()
+
+    async def connect(self) -> None:
+        self._spool.open()
+        try:
+            await self._publisher.connect()
+            self._connected_once = True
+        except Exception as exc:
+            logger.error(
+                "RabbitMQ unavailable at startup; spooling until it connects",
+                extra={"error": str(exc)},
+            )
+        self._drainer = asyncio.create_task(self._drain())
+
+    async def disconnect(self) -> None:
+        if self._drainer is not None:
+            self._drainer.cancel()
+            try:
+                await self._drainer
+            except asyncio.CancelledError:
+                pass
+        await self._publisher.disconnect()
+        await self._spool.close()
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        if self._spool.depth == 0 and self.is_connected:
+            try:
+                await asyncio.wait_for(
+                    self._publisher.publish(body, priority, headers),
+                    settings.spool_publish_timeout,
+                )
+                return
+            except Exception as exc:
+                logger.warning(
+                    "Publish failed, spooling message",
+                    extra={"error": str(exc) or type(exc).__name__},
+                )
+        await self._spool.append(body, priority, headers)
+        self._wakeup.set()
+
+    async def _drain(self) -> None:
+        while True:
+            if not self._connected_once:
+                try:
+                    await self._publisher.connect()
+                    self._connected_once = True
+                    logger.info("Connected to RabbitMQ after startup failure")
+                except Exception:
+                    await asyncio.sleep(settings.spool_retry_interval)
+                    continue
+
+            self._wakeup.clear()
+            if self._spool.depth == 0:
+                await self._wakeup.wait()
+                continue
+            if not self._publisher.is_connected:
+                await asyncio.sleep(settings.spool_retry_interval)
+                continue
+
+            published = 0
+            position = None
+            for body, priority, headers, next_position in self._spool.read_batch(
+                settings.spool_drain_batch_size
+            ):
+                try:
+                    # A blocked broker or a lost confirm must not stall the drain;
+                    # the record stays at the cursor and is retried.
+                    await asyncio.wait_for(
+                        self._publisher.publish(body, priority, headers),
+                        settings.spool_drain_publish_timeout,
+                    )
+                except Exception as exc:
+                    logger.warning(
+                        "Spool drain paused",
+                        extra={"error": str(exc) or type(exc).__name__},
+                    )
+                    break
+                published += 1
+                position = next_position
+
+            if position is not None:
+                self._spool.commit(position, published)
+                self._drained.append((time.monotonic(), published))
+                logger.info(
+                    "Drained spooled messages",
+                    extra={"count": published, "remaining": self._spool.depth},
+                )
+            else:
+                await asyncio.sleep(settings.spool_retry_interval)
+
+    def drain_rate(self) -> float:
+        """Messages drained per second over the last minute."""
+        cutoff = time.monotonic() - 60
+        while self._drained and self._drained[0][0] < cutoff:
+            self._drained.popleft()
+        return sum(count for _, count in self._drained) / 60
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "depth": self._spool.depth,
+            "bytes": self._spool.size_bytes,
+            "drain_rate": round(self.drain_rate(), 2),
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        return self._publisher.is_connected
+
+
+def create_spool() -> Spool:
+    return Spool(
+        settings.spool_dir,
+        segment_bytes=settings.spool_segment_bytes,
+        max_bytes=settings.spool_max_bytes,
+        fsync_interval_ms=settings.spool_fsync_interval_ms,
+    )
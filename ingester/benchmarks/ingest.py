@@ -0,0 +1,109 @@
+"""CPU cost per webhook of the dict ingestion path versus the raw-body fast path.
+
+Replays webhook bodies from an NDJSON file where each line is
+``{"source": "jira" | "datadog" | "sonarcloud", "payload": {...}}``; without
+one, synthetic payloads (including a large Jira changelog) are used::
+
+    uv run python -m benchmarks.ingest --requests requests.jsonl --rounds 20
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from app.models.agent_task import Source
+from app.normalizers.registry import get_normalizer
+
+
+def _synthetic() -> list[tuple[Source, bytes]]:
+    changelog = {
+        "items": [
+            {
+                "field": f"customfield_{i}",
+                "fromString": "x" * 200,
+                "toString": "y" * 200,
+            }
+            for i in range(200)
+        ]
+    }
+    jira = {
+        "webhookEvent": "jira:issue_updated",
+        "issue": {
+            "id": "10001",
+            "key": "PROJ-42",
+            "fields": {
+                "summary": "NullPointerException in OrderService",
+                "priority": {"name": "High"},
+                "description": "Stack trace...\n" * 100,
+                "comment": {"comments": [{"body": "c" * 500} for _ in range(30)]},
+            },
+        },
+        "changelog": changelog,
+    }
+    datadog = {
+        "id": "1234567",
+        "title": "[Triggered] High error rate on checkout",
+        "alert_status": "triggered",
+        "tags": [f"env:prod,service:checkout,shard:{i}" for i in range(20)],
+    }
+    sonar = {
+        "taskId": "AX-123",
+        "status": "SUCCESS",
+        "qualityGate": {"status": "ERROR", "conditions": [{"metric": "coverage"}] * 10},
+        "project": {"key": "acme_api", "name": "Acme API"},
+    }
+    return [
+        (Source.JIRA, json.dumps(jira).encode()),
+        (Source.DATADOG, json.dumps(datadog).encode()),
+        (Source.SONARCLOUD, json.dumps(sonar).encode()),
+    ]
+
+
+def _load(path: Path) -> list[tuple[Source, bytes]]:
+    samples = []
+    for line in path.read_text().splitlines():
+        if not line.strip():
+            continue
+        record: dict[str, Any] = json.loads(line)
+        samples.append((Source(record["source"]), json.dumps(record["payload"]).encode()))
+    return samples
+
+
+def _dict_path(source: Source, body: bytes) -> bytes:
+    task = get_normalizer(source).normalize(json.loads(body))
+    return task.model_dump_json().encode()
+
+
+def _fast_path(source: Source, body: bytes) -> bytes:
+    return get_normalizer(source).normalize_body(body)[1]
+
+
+def _measure(fn: Any, samples: list[tuple[Source, bytes]], rounds: int) -> float:
+    started = time.process_time()
+    for _ in range(rounds):
+        for source, body in samples:
+            fn(source, body)
+    return (time.process_time() - started) / (rounds * len(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=Path, default=Path("requests.jsonl"))
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    samples = _load(args.requests) if args.requests.is_file() else _synthetic()
+    avg_bytes = sum(len(body) for _, body in samples) / len(samples)
+    print(f"{len(samples)} payloads, {avg_bytes:.0f} bytes average")
+
+    baseline = _measure(_dict_path, samples, args.rounds)
+    fast = _measure(_fast_path, samples, args.rounds)
+    print(f"dict path: {baseline * 1e6:>9.1f} us/request")
+    print(f"fast path: {fast * 1e6:>9.1f} us/request")
+    print(f"saving:    {(baseline - fast) * 1e6:>9.1f} us/request ({1 - fast / baseline:.0%})")
+
+
+if __name__ == "__main__":
+    main()
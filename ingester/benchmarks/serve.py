@@ -0,0 +1,77 @@
+"""Run the real ingester with task messages sent to a local broker instead of RabbitMQ.
+
+Serves ``app.main:app`` with uvicorn, but publishes each task message as a
+JSON line (priority, headers, body) over a TCP connection to
+``--broker``. Dedup, coalescing and admission control run as configured,
+except that admission has no RabbitMQ queue depth to sample, so only its
+rate limits apply. This is the ingester half of the orchestrator's pipeline
+benchmark, which starts it::
+
+    uv run python -m benchmarks.serve --port 8001 --broker 127.0.0.1:5673
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+import uvicorn
+
+from app import main as ingester
+from app.models.agent_task import Priority
+from app.services.spool import Headers
+
+
+class BrokerPublisher:
+    """Writes task messages as JSON lines to the pipeline benchmark's broker."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def connect(self) -> None:
+        _, self._writer = await asyncio.open_connection(self._host, self._port)
+
+    async def disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        if self._writer is None:
+            raise RuntimeError("Publisher not connected")
+        record = {
+            "priority": priority.value,
+            "headers": headers or {},
+            "body": body.decode(),
+        }
+        self._writer.write(json.dumps(record).encode() + b"\n")
+        await self._writer.drain()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--broker", required=True, help="host:port of the benchmark broker"
+    )
+    args = parser.parse_args()
+
+    host, _, port = args.broker.rpartition(":")
+    ingester.create_publisher = lambda: BrokerPublisher(host, int(port))
+    # The queue depth sampler's failed RabbitMQ connections.
+    logging.getLogger("aiormq").setLevel(logging.CRITICAL)
+    uvicorn.run(ingester.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from collections.abc import AsyncIterator
+
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+
+from app.api.routers import batch, jira
+from app.config import settings
+from app.models.agent_task import Priority, Source
+from app.services.admission import AdmissionController, TokenBucket
+from app.services.coalescer import DatadogCoalescer
+from app.services.dedup import DedupCache, MemoryDedupBackend
+from app.services.spool import Headers
+
+HEADERS = {"X-Webhook-Secret": settings.webhook_secret}
+
+
+class RecordingPublisher:
+    def __init__(self) -> None:
+        self.published: list[bytes] = []
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        self.published.append(body)
+
+
+def jira_event(key: str, priority: str = "Medium") -> dict:
+    return {
+        "webhookEvent": "jira:issue_created",
+        "issue": {
+            "id": key,
+            "key": key,
+            "fields": {"summary": f"Bug {key}", "priority": {"name": priority}},
+        },
+    }
+
+
+async def post(
+    client: httpx.AsyncClient, key: str, priority: str = "Medium"
+) -> httpx.Response:
+    event = jira_event(key, priority)
+    return await client.post("/webhooks/jira", json=event, headers=HEADERS)
+
+
+@pytest.fixture
+def buckets() -> dict[Source, TokenBucket]:
+    # One token, refilled every two seconds.
+    return {source: TokenBucket(0.5, 1) for source in Source}
+
+
+@pytest.fixture
+def app(buckets: dict[Source, TokenBucket]) -> FastAPI:
+    app = FastAPI()
+    app.include_router(jira.router)
+    app.include_router(batch.router)
+    publisher = RecordingPublisher()
+    app.state.publisher = publisher
+    app.state.dedup = DedupCache(MemoryDedupBackend(100), {Source.JIRA: 60})
+    app.state.coalescer = DatadogCoalescer(publisher, app.state.dedup, 0)
+    app.state.admission = AdmissionController(
+        enabled=True,
+        buckets=buckets,
+        queue_name="orchestrator_priority_queue",
+        sample_interval=5,
+        shed_p4_depth=10,
+        shed_p3_depth=100,
+    )
+    return app
+
+
+@pytest.fixture
+async def client(app: FastAPI) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_rate_limited_event_gets_429_with_retry_after(
+    app: FastAPI, client: httpx.AsyncClient
+) -> None:
+    accepted = await post(client, "A-1")
+    assert accepted.status_code == 202
+
+    throttled = await post(client, "A-2")
+    assert throttled.status_code == 429
+    assert throttled.headers["Retry-After"] == "2"
+    assert len(app.state.publisher.published) == 1
+
+
+async def test_throttled_event_is_not_remembered_as_a_duplicate(
+    buckets: dict[Source, TokenBucket], client: httpx.AsyncClient
+) -> None:
+    await post(client, "A-1")
+    throttled = await post(client, "A-2")
+    assert throttled.status_code == 429
+
+    buckets[Source.JIRA] = TokenBucket(0.5, 1)
+    retried = await post(client, "A-2")
+    assert retried.json()["status"] == "accepted"
+
+
+async def test_duplicate_is_acknowledged_before_admission(
+    client: httpx.AsyncClient,
+) -> None:
+    first = await post(client, "A-1")
+    duplicate = await post(client, "A-1")
+    assert duplicate.status_code == 202
+    assert duplicate.json() == {
+        "task_id": first.json()["task_id"],
+        "status": "duplicate",
+    }
+
+
+async def test_queue_depth_sheds_low_priority_but_not_p1(
+    app: FastAPI, client: httpx.AsyncClient
+) -> None:
+    app.state.admission.queue_depth = 10
+    shed = await post(client, "A-1", "Low")
+    assert shed.status_code == 429
+    assert shed.headers["Retry-After"] == "5"
+
+    urgent = await post(client, "A-2", "Highest")
+    assert urgent.status_code == 202
+
+
+async def test_batch_reports_throttled_lines(client: httpx.AsyncClient) -> None:
+    body = b"\n".join(orjson.dumps(jira_event(key)) for key in ("A-1", "A-2"))
+    response = await client.post("/webhooks/jira/batch", content=body, headers=HEADERS)
+    *results, summary = [orjson.loads(line) for line in response.content.splitlines()]
+    assert sorted(result["status"] for result in results) == ["accepted", "throttled"]
+    assert [r["retry_after"] for r in results if r["status"] == "throttled"] == [2]
+    assert summary["summary"]["throttled"] == 1
@@ -0,0 +1,135 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app.models.agent_task import AgentTask, Priority, Source
+from app.services import coalescer
+from app.services.coalescer import DatadogCoalescer
+from app.services.dedup import DedupCache, MemoryDedupBackend
+from app.services.spool import Headers
+
+WINDOW = 0.05
+
+
+class RecordingPublisher:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.published: list[tuple[dict, Priority]] = []
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker down")
+        self.published.append((orjson.loads(body), priority))
+
+
+def alert(
+    monitor: str,
+    title: str = "[Triggered] CPU high on web-1",
+    priority: Priority = Priority.P3,
+    status: str = "Triggered",
+) -> AgentTask:
+    return AgentTask(
+        source=Source.DATADOG,
+        external_id=monitor,
+        title=title,
+        priority=priority,
+        raw_payload={"alert_status": status},
+    )
+
+
+def alert_ids(published: dict) -> list[str]:
+    return [member["external_id"] for member in published["raw_payload"]["alerts"]]
+
+
+@pytest.fixture
+def dedup() -> DedupCache:
+    return DedupCache(MemoryDedupBackend(100), {Source.DATADOG: 300})
+
+
+async def test_related_alerts_are_published_as_one_task(dedup: DedupCache) -> None:
+    publisher = RecordingPublisher()
+    alerts = DatadogCoalescer(publisher, dedup, WINDOW)
+    first = alerts.add(alert("1"))
+    second = alerts.add(alert("2", title="[Triggered] CPU high on web-2"))
+    assert first is not None and second == (first[0], "coalesced")
+    assert alerts.add(alert("3", title="Disk full")) != first
+
+    await asyncio.sleep(WINDOW * 3)
+    grouped = {task["task_id"]: task for task, _ in publisher.published}
+    assert alert_ids(grouped[first[0]]) == ["1", "2"]
+    assert len(grouped) == 2
+
+
+async def test_p1_alert_skips_the_window(dedup: DedupCache) -> None:
+    publisher = RecordingPublisher()
+    alerts = DatadogCoalescer(publisher, dedup, 60)
+    assert alerts.add(alert("1", priority=Priority.P1)) is None
+
+    group_id, _ = alerts.add(alert("2"))
+    assert alerts.add(alert("3", priority=Priority.P1)) == (group_id, "coalesced")
+    await asyncio.sleep(0)
+    [(task, priority)] = publisher.published
+    assert task["task_id"] == group_id
+    assert alert_ids(task) == ["2", "3"]
+    assert priority == Priority.P1
+
+
+async def test_recovery_cancels_only_its_monitor(dedup: DedupCache) -> None:
+    publisher = RecordingPublisher()
+    alerts = DatadogCoalescer(publisher, dedup, WINDOW)
+    recovered = alert("1")
+    assert await dedup.claim(recovered) is None
+    group_id, _ = alerts.add(recovered)
+    alerts.add(alert("2"))
+
+    outcome = alerts.add(alert("1", status="Recovered"))
+    assert outcome == (group_id, "cancelled")
+    await asyncio.sleep(WINDOW * 3)
+    [(task, _)] = publisher.published
+    assert task["external_id"] == "2"
+    # The cancelled alert may be sent again.
+    assert await dedup.claim(recovered) is None
+
+
+async def test_recovery_of_the_whole_group_publishes_nothing(dedup: DedupCache) -> None:
+    publisher = RecordingPublisher()
+    alerts = DatadogCoalescer(publisher, dedup, WINDOW)
+    group_id, _ = alerts.add(alert("1"))
+    assert alerts.add(alert("1", status="Recovered")) == (group_id, "cancelled")
+    assert alerts.add(alert("2", status="Recovered")) is None
+
+    await asyncio.sleep(WINDOW * 3)
+    assert publisher.published == []
+
+
+async def test_failed_group_publish_is_retried(
+    dedup: DedupCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(coalescer, "_RETRY_DELAY", 0.001)
+    publisher = RecordingPublisher(failures=2)
+    alerts = DatadogCoalescer(publisher, dedup, WINDOW)
+    alerts.add(alert("1"))
+    await alerts.close()
+    assert len(publisher.published) == 1
+
+
+async def test_dropped_group_releases_its_dedup_keys(
+    dedup: DedupCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(coalescer, "_RETRY_DELAY", 0.001)
+    publisher = RecordingPublisher(failures=coalescer._PUBLISH_ATTEMPTS)
+    alerts = DatadogCoalescer(publisher, dedup, WINDOW)
+    members = [alert("1"), alert("2")]
+    for member in members:
+        assert await dedup.claim(member) is None
+        alerts.add(member)
+    await alerts.close()
+    await asyncio.sleep(0)
+
+    assert publisher.published == []
+    for member in members:
+        assert await dedup.claim(member) is None
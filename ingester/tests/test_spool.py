@@ -0,0 +1,211 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.models.agent_task import Priority
+from app.services.spool import Headers, Spool, SpoolFullError, SpoolingPublisher
+
+
+def make_spool(directory: Path, max_bytes: int = 1 << 20, opened: bool = True) -> Spool:
+    spool = Spool(
+        str(directory), segment_bytes=1 << 16, max_bytes=max_bytes, fsync_interval_ms=1
+    )
+    if opened:
+        spool.open()
+    return spool
+
+
+def bodies(spool: Spool) -> list[bytes]:
+    return [body for body, *_ in spool.read_batch(100)]
+
+
+def segment(directory: Path) -> Path:
+    return sorted(directory.glob("segment-*.log"))[-1]
+
+
+async def test_records_survive_reopen(tmp_path: Path) -> None:
+    spool = make_spool(tmp_path)
+    await spool.append(b"one", Priority.P1, {"traceparent": "00-abc-def-01"})
+    await spool.append(b"two", Priority.P3)
+    await spool.close()
+
+    spool = make_spool(tmp_path)
+    assert spool.depth == 2
+    assert [record[:3] for record in spool.read_batch(10)] == [
+        (b"one", Priority.P1, {"traceparent": "00-abc-def-01"}),
+        (b"two", Priority.P3, None),
+    ]
+
+
+async def test_commit_is_recovered_from_the_cursor(tmp_path: Path) -> None:
+    spool = make_spool(tmp_path)
+    for body in (b"one", b"two", b"three"):
+        await spool.append(body, Priority.P2)
+    first = spool.read_batch(1)
+    spool.commit(first[-1][-1], len(first))
+    await spool.close()
+
+    spool = make_spool(tmp_path)
+    assert spool.depth == 2
+    assert bodies(spool) == [b"two", b"three"]
+
+
+async def test_torn_tail_is_truncated_on_open(tmp_path: Path) -> None:
+    spool = make_spool(tmp_path)
+    await spool.append(b"whole", Priority.P2)
+    await spool.close()
+    path = segment(tmp_path)
+    valid_size = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"\x00\x00\x00\x10\x01")
+
+    spool = make_spool(tmp_path)
+    assert path.stat().st_size == valid_size
+    assert bodies(spool) == [b"whole"]
+    await spool.append(b"next", Priority.P2)
+    assert bodies(spool) == [b"whole", b"next"]
+
+
+async def test_corrupt_record_is_truncated_on_open(tmp_path: Path) -> None:
+    spool = make_spool(tmp_path)
+    await spool.append(b"good", Priority.P2)
+    await spool.append(b"flipped", Priority.P2)
+    await spool.close()
+    path = segment(tmp_path)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(data)
+
+    spool = make_spool(tmp_path)
+    assert spool.depth == 1
+    assert bodies(spool) == [b"good"]
+
+
+async def test_failed_fsync_discards_its_records(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    spool = make_spool(tmp_path)
+    await spool.append(b"durable", Priority.P2)
+    size = spool.size_bytes
+
+    def fail(fd: int) -> None:
+        raise OSError("EIO")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "fsync", fail)
+        results = await asyncio.gather(
+            spool.append(b"lost", Priority.P2),
+            spool.append(b"also lost", Priority.P2),
+            return_exceptions=True,
+        )
+    assert all(isinstance(result, OSError) for result in results)
+    assert (spool.depth, spool.size_bytes) == (1, size)
+
+    await spool.append(b"after", Priority.P2)
+    assert bodies(spool) == [b"durable", b"after"]
+    await spool.close()
+    assert bodies(make_spool(tmp_path)) == [b"durable", b"after"]
+
+
+async def test_append_beyond_max_bytes_is_refused(tmp_path: Path) -> None:
+    spool = make_spool(tmp_path, max_bytes=32)
+    await spool.append(b"x" * 10, Priority.P2)
+    with pytest.raises(SpoolFullError):
+        await spool.append(b"x" * 10, Priority.P2)
+
+
+class FlakyPublisher:
+    def __init__(self) -> None:
+        self.up = False
+        self.published: list[bytes] = []
+
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        if not self.up:
+            raise ConnectionError("broker down")
+        self.published.append(body)
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+
+async def test_spooled_messages_drain_in_order(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "spool_retry_interval", 0.01)
+    broker = FlakyPublisher()
+    publisher = SpoolingPublisher(broker, make_spool(tmp_path, opened=False))
+    await publisher.connect()
+    try:
+        await publisher.publish(b"first", Priority.P2)
+        await publisher.publish(b"second", Priority.P2)
+        assert publisher.stats()["depth"] == 2
+
+        broker.up = True
+        await publisher.publish(b"third", Priority.P2)
+        for _ in range(100):
+            if len(broker.published) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert broker.published == [b"first", b"second", b"third"]
+        assert publisher.stats()["depth"] == 0
+    finally:
+        await publisher.disconnect()
+
+
+class BlockedPublisher(FlakyPublisher):
+    """Accepts publishes only once unblocked; until then they never complete."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.blocked = True
+        self.attempts = 0
+
+    async def publish(
+        self, body: bytes, priority: Priority, headers: Headers | None = None
+    ) -> None:
+        self.attempts += 1
+        if self.blocked:
+            await asyncio.Event().wait()
+        self.published.append(body)
+
+
+async def test_drain_retries_a_publish_that_never_completes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "spool_retry_interval", 0.01)
+    monkeypatch.setattr(settings, "spool_drain_publish_timeout", 0.01)
+    spool = make_spool(tmp_path)
+    await spool.append(b"stuck", Priority.P2)
+    await spool.close()
+
+    broker = BlockedPublisher()
+    publisher = SpoolingPublisher(broker, make_spool(tmp_path, opened=False))
+    await publisher.connect()
+    try:
+        for _ in range(100):
+            if broker.attempts >= 2:
+                break
+            await asyncio.sleep(0.01)
+        assert broker.attempts >= 2
+        assert publisher.stats()["depth"] == 1
+
+        broker.blocked = False
+        for _ in range(100):
+            if publisher.stats()["depth"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert broker.published == [b"stuck"]
+    finally:
+        await publisher.disconnect()
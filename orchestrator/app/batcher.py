@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from app.models import AgentTask, Priority, RouterPlan
+from app.prompt import Prompt
+
+logger = logging.getLogger(__name__)
+
+RouteOne = Callable[[AgentTask, Prompt], Awaitable[RouterPlan]]
+RouteBatch = Callable[[list[tuple[AgentTask, Prompt]]], Awaitable[dict[str, RouterPlan]]]
+
+
+class RouteBatcher:
+    """Routes low-priority tasks together in one LLM call.
+
+    The first task to arrive opens a window of ``window`` seconds; tasks
+    arriving inside it join the batch, which is sent early once it holds
+    ``max_tasks``. A batch of one uses the single-task path, and tasks missing
+    from (or invalid in) a batch response are routed on their own. If the
+    batch call itself fails, every task in it fails and is retried by the
+    consumer as usual.
+    """
+
+    def __init__(
+        self,
+        route_one: RouteOne,
+        route_batch: RouteBatch,
+        window: float,
+        max_tasks: int,
+        priorities: set[Priority],
+    ) -> None:
+        self._route_one = route_one
+        self._route_batch = route_batch
+        self._window = window
+        self._max_tasks = max_tasks
+        self._priorities = priorities
+        self._pending: list[tuple[AgentTask, Prompt, asyncio.Future[RouterPlan]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._sending: set[asyncio.Task[None]] = set()
+
+    def handles(self, task: AgentTask) -> bool:
+        return self._window > 0 and self._max_tasks > 1 and task.priority in self._priorities
+
+    async def route(self, task: AgentTask, prompt: Prompt) -> RouterPlan:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[RouterPlan] = loop.create_future()
+        self._pending.append((task, prompt, future))
+        if len(self._pending) >= self._max_tasks:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        send = asyncio.create_task(self._send(batch))
+        self._sending.add(send)
+        send.add_done_callback(self._sending.discard)
+
+    async def _send(
+        self, batch: list[tuple[AgentTask, Prompt, asyncio.Future[RouterPlan]]]
+    ) -> None:
+        items = [(task, prompt) for task, prompt, future in batch if not future.done()]
+        if len(items) == 1:
+            plans: dict[str, RouterPlan] = {}
+        else:
+            try:
+                plans = await self._route_batch(items) if items else {}
+            except Exception as exc:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+
+        missing = [entry for entry in batch if str(entry[0].task_id) not in plans]
+        if missing and len(items) > 1:
+            logger.warning(
+                "Batch response missing tasks; routing them individually",
+                extra={"batch": len(items), "missing": len(missing)},
+            )
+        for task, _, future in batch:
+            plan = plans.get(str(task.task_id))
+            if plan is not None and not future.done():
+                future.set_result(plan)
+        await asyncio.gather(*(self._fallback(*entry) for entry in missing))
+
+    async def _fallback(
+        self, task: AgentTask, prompt: Prompt, future: asyncio.Future[RouterPlan]
+    ) -> None:
+        if future.done():
+            return
+        try:
+            plan = await self._route_one(task, prompt)
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+            return
+        if not future.done():
+            future.set_result(plan)
+
+    async def close(self) -> None:
+        """Send any open batch and wait for in-flight batches."""
+        self._flush()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
@@ -1,18 +1,22 @@
 import json
 import logging
+import time
+from typing import Any
 
-import anthropic
+from opentelemetry import trace
 
+from app import metrics, tracing
 from app.config import settings
-from app.models import AgentTask, RouterPlan
+from app.batcher import RouteBatcher
+from app.llm import ClaudeClient, create_claude_client
+from app.models import AgentTask, Priority, RouterPlan
+from app.prompt import Prompt, build_prompt
+from app.route_cache import RouteCache, create_route_cache
+from app.rules import RulesEngine, create_rules_engine
 
 logger = logging.getLogger(__name__)
 
-SYSTEM_PROMPT = (
-    "You are a Technical Lead. Analyze this task and decide which agent "
-    "template to use.\n\n"
-    "You MUST respond with a single JSON object (no markdown fences) "
-    "containing exactly these fields:\n"
+_PLAN_FIELDS = (
     '- "template_id": one of "java-backend", "python-backend", '
     '"react-frontend", "general-research"\n'
     '- "complexity": one of "low", "medium", "high"\n'
@@ -22,34 +26,102 @@ SYSTEM_PROMPT = (
     "for the executing agent\n"
 )
 
+SYSTEM_PROMPT = (
+    "You are a Technical Lead. Analyze this task and decide which agent "
+    "template to use.\n\n"
+    "You MUST respond with a single JSON object (no markdown fences) "
+    "containing exactly these fields:\n" + _PLAN_FIELDS
+)
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a Technical Lead. Analyze each task below (each starts with a "
+    '"### Task <id>" line) and decide which agent template to use for it.\n\n'
+    "You MUST respond with a single JSON object (no markdown fences) whose "
+    "keys are the task ids and whose values are objects containing exactly "
+    "these fields:\n" + _PLAN_FIELDS
+)
+
 
 class TaskRouter:
-    def __init__(self) -> None:
-        self._client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+    def __init__(
+        self,
+        cache: RouteCache | None = None,
+        rules: RulesEngine | None = None,
+        client: ClaudeClient | None = None,
+    ) -> None:
+        self._client = client or create_claude_client()
+        self.breaker = self._client.breaker
+        self._cache = cache or create_route_cache()
+        self._rules = rules or create_rules_engine()
+        self._batcher = RouteBatcher(
+            self._route_one,
+            self._route_batch,
+            window=settings.router_batch_window_ms / 1000,
+            max_tasks=settings.router_batch_max_tasks,
+            priorities={
+                Priority(name.strip())
+                for name in settings.router_batch_priorities.split(",")
+                if name.strip()
+            },
+        )
 
     async def route(self, task: AgentTask) -> RouterPlan:
         task_id = str(task.task_id)
-        logger.info("Routing task via LLM", extra={"task_id": task_id})
-
-        user_content = (
-            f"Source: {task.source.value}\n"
-            f"Priority: {task.priority.value}\n"
-            f"Title: {task.title}\n"
-            f"External ID: {task.external_id}\n"
-            f"Payload:\n{json.dumps(task.raw_payload, indent=2, default=str)}"
-        )
+        matched = self._rules.route(task)
+        if matched is not None:
+            rule, plan = matched
+            metrics.routes[task.source, "rule"].inc()
+            trace.get_current_span().set_attributes(
+                {"anton.route.via": "rule", "anton.route.rule": rule.name}
+            )
+            logger.info(
+                "Task routed by rule",
+                extra={
+                    "task_id": task_id,
+                    "rule": rule.name,
+                    "template_id": plan.template_id.value,
+                    "complexity": plan.complexity.value,
+                },
+            )
+            return plan
 
-        response = await self._client.messages.create(
-            model=settings.anthropic_model,
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_content}],
-        )
+        plan = await self._cache.get(task)
+        if plan is not None:
+            metrics.routes[task.source, "cache"].inc()
+            trace.get_current_span().set_attribute("anton.route.via", "cache")
+            logger.info(
+                "Task routed from cache",
+                extra={
+                    "task_id": task_id,
+                    "template_id": plan.template_id.value,
+                    "complexity": plan.complexity.value,
+                },
+            )
+            return plan
 
-        raw_text = response.content[0].text.strip()
-        logger.debug("LLM raw response", extra={"task_id": task_id, "raw": raw_text})
+        prompt = build_prompt(
+            task,
+            settings.router_prompt_budget_tokens,
+            settings.router_prompt_max_field_tokens,
+        )
+        trace.get_current_span().set_attribute("anton.route.via", "llm")
+        batched = self._batcher.handles(task)
+        with tracing.tracer.start_as_current_span(
+            "llm route",
+            attributes={
+                "anton.route.batched": batched,
+                "anton.prompt.estimated_tokens": prompt.estimated_tokens,
+            },
+        ):
+            if batched:
+                logger.info("Routing task via LLM batch", extra={"task_id": task_id})
+                plan = await self._batcher.route(task, prompt)
+            else:
+                logger.info("Routing task via LLM", extra={"task_id": task_id})
+                plan = await self._route_one(task, prompt)
 
-        plan = RouterPlan.model_validate_json(raw_text)
+        await self._cache.put(task, plan)
+        metrics.routes[task.source, "llm"].inc()
         logger.info(
             "Task routed",
             extra={
@@ -59,3 +131,81 @@ class TaskRouter:
             },
         )
         return plan
+
+    async def _complete(
+        self, system: str, content: str, max_tokens: int, log_extra: dict[str, Any]
+    ) -> str:
+        started = time.perf_counter()
+        response = await self._client.create(
+            model=settings.anthropic_model,
+            max_tokens=max_tokens,
+            system=system,
+            messages=[{"role": "user", "content": content}],
+        )
+        elapsed = time.perf_counter() - started
+        metrics.LLM_SECONDS.observe(elapsed)
+        metrics.LLM_INPUT_TOKENS.observe(response.usage.input_tokens)
+        logger.info(
+            "LLM call finished",
+            extra={
+                **log_extra,
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens,
+                "budget_tokens": settings.router_prompt_budget_tokens,
+                "latency_ms": round(elapsed * 1000, 1),
+            },
+        )
+        raw_text = response.content[0].text.strip()
+        logger.debug("LLM raw response", extra={**log_extra, "raw": raw_text})
+        return raw_text
+
+    async def _route_one(self, task: AgentTask, prompt: Prompt) -> RouterPlan:
+        raw_text = await self._complete(
+            SYSTEM_PROMPT,
+            prompt.text,
+            1024,
+            {
+                "task_id": str(task.task_id),
+                "estimated_tokens": prompt.estimated_tokens,
+                "fields_kept": prompt.fields_kept,
+                "fields_dropped": prompt.fields_dropped,
+            },
+        )
+        return RouterPlan.model_validate_json(raw_text)
+
+    async def _route_batch(
+        self, items: list[tuple[AgentTask, Prompt]]
+    ) -> dict[str, RouterPlan]:
+        """Route several tasks in one call; returns the plans that came back valid."""
+        content = "\n\n".join(f"### Task {task.task_id}\n{prompt.text}" for task, prompt in items)
+        metrics.LLM_BATCH_TASKS.observe(len(items))
+        raw_text = await self._complete(
+            BATCH_SYSTEM_PROMPT,
+            content,
+            min(512 * len(items), 8192),
+            {
+                "task_ids": [str(task.task_id) for task, _ in items],
+                "batch": len(items),
+                "estimated_tokens": sum(prompt.estimated_tokens for _, prompt in items),
+            },
+        )
+        answers = json.loads(raw_text)
+        if not isinstance(answers, dict):
+            raise ValueError("Batch routing response is not a JSON object")
+
+        plans = {}
+        for task, _ in items:
+            task_id = str(task.task_id)
+            try:
+                plans[task_id] = RouterPlan.model_validate(answers[task_id])
+            except (KeyError, ValueError) as exc:
+                logger.warning(
+                    "Invalid plan in batch response",
+                    extra={"task_id": task_id, "error": str(exc)},
+                )
+        return plans
+
+    async def close(self) -> None:
+        await self._batcher.close()
+        await self._cache.close()
+        await self._client.close()
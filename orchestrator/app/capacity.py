@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from app import metrics
+from app.models import MESSAGE_PRIORITY, AgentTask, TemplateId
+from app.watcher import JobWatcher, job_finished, job_labels
+
+logger = logging.getLogger(__name__)
+
+_TOP_PRIORITY = max(MESSAGE_PRIORITY.values())
+# A reservation the watch never confirms (the create failed after all, or
+# the Job was deleted before it was seen) stops counting after this long.
+RESERVATION_TTL = 300.0
+
+
+class CapacityTimeout(Exception):
+    """Raised when a task gets no Job slot within ``max_wait`` seconds, or on close."""
+
+
+def parse_template_limits(value: str) -> dict[str, int]:
+    """Parse ``"java-backend=4,python-backend=8"``; unknown templates are rejected."""
+    limits: dict[str, int] = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        template, _, limit = item.partition("=")
+        limits[TemplateId(template.strip()).value] = int(limit)
+    return limits
+
+
+class JobCapacity:
+    """Caps unfinished runner Jobs, globally and per template.
+
+    Counts come from the ``JobWatcher``'s view of the namespace, so Jobs
+    created by other replicas count too, plus this replica's reservations for
+    Jobs it is creating but has not yet seen through the watch. Tasks over a
+    cap wait in the same priority/aging order as the scheduler; when a Job
+    finishes, every waiter that now fits is admitted in that order, so a
+    waiting ``java-backend`` task does not hold up a ``python-backend`` one.
+    A task that waits ``max_wait`` seconds gets ``CapacityTimeout``.
+    """
+
+    def __init__(
+        self,
+        watcher: JobWatcher | None,
+        max_active: int,
+        template_limits: dict[str, int],
+        max_wait: float,
+        aging: float,
+    ) -> None:
+        self._watcher = watcher
+        self._max_active = max_active
+        self._template_limits = template_limits
+        self._max_wait = max_wait
+        self._aging = aging
+        self._reserved: dict[str, tuple[str, float]] = {}
+        self._waiters: list[tuple[float, float, int, str, str, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        if watcher is not None:
+            watcher.subscribe(self._on_job_event)
+        metrics.JOB_ADMISSION_WAITING.set_function(lambda: len(self._waiters))
+        for template in TemplateId:
+            metrics.ACTIVE_JOBS.labels(template.value).set_function(
+                lambda template=template.value: self.active()[template]
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self._watcher is not None and (self._max_active > 0 or bool(self._template_limits))
+
+    def active(self) -> Counter[str]:
+        """Unfinished Jobs per template, including unconfirmed reservations."""
+        # Also read by the metrics thread, so only take snapshots here.
+        counts: Counter[str] = Counter()
+        seen: set[str] = set()
+        if self._watcher is not None:
+            for job in list(self._watcher.jobs.values()):
+                if not job_finished(job):
+                    labels = job_labels(job)
+                    counts[labels.get("template", "")] += 1
+                    seen.add(labels.get("task-id", ""))
+        expired = time.monotonic() - RESERVATION_TTL
+        for task_id, (template, reserved_at) in list(self._reserved.items()):
+            if reserved_at >= expired and task_id not in seen:
+                counts[template] += 1
+        return counts
+
+    def _prune(self) -> None:
+        expired = time.monotonic() - RESERVATION_TTL
+        for task_id, (_, reserved_at) in list(self._reserved.items()):
+            if reserved_at < expired:
+                logger.warning("Job reservation expired unconfirmed", extra={"task_id": task_id})
+                del self._reserved[task_id]
+
+    def _fits(self, counts: Counter[str], template: str) -> bool:
+        if self._max_active > 0 and counts.total() >= self._max_active:
+            return False
+        limit = self._template_limits.get(template)
+        return limit is None or counts[template] < limit
+
+    def _key(self, task: AgentTask) -> tuple[float, float]:
+        created = task.created_at.timestamp()
+        levels = _TOP_PRIORITY - MESSAGE_PRIORITY[task.priority]
+        return created + levels * self._aging, created
+
+    @asynccontextmanager
+    async def hold(self, task: AgentTask, template: str) -> AsyncIterator[None]:
+        """Hold a Job slot for ``task`` while its Job is being created.
+
+        The slot stays reserved after a clean exit, until the watch reports
+        the Job; it is given back if the body raises.
+        """
+        if not self.enabled:
+            yield
+            return
+        task_id = str(task.task_id)
+        await self._acquire(task, task_id, template)
+        try:
+            yield
+        except BaseException:
+            self._reserved.pop(task_id, None)
+            self._admit()
+            raise
+
+    async def _acquire(self, task: AgentTask, task_id: str, template: str) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._watcher.synced.wait(), self._max_wait or None)
+        except asyncio.TimeoutError:
+            raise CapacityTimeout(template) from None
+        if f"agent-job-{task_id}" in self._watcher.jobs:
+            # Redelivered after its Job was created; the Job already counts.
+            return
+        self._prune()
+        if not self._waiters and self._fits(self.active(), template):
+            self._reserved[task_id] = (template, started)
+            metrics.job_admission_wait[task.priority].observe(time.monotonic() - started)
+            return
+
+        granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, (*self._key(task), next(self._order), task_id, template, granted)
+        )
+        self._admit()
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self._max_wait or None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if granted.done():
+                # Admitted just as the wait ended: give the slot back.
+                self._reserved.pop(task_id, None)
+                self._admit()
+            else:
+                granted.cancel()
+                self._waiters = [entry for entry in self._waiters if entry[-1] is not granted]
+            if isinstance(exc, asyncio.TimeoutError):
+                raise CapacityTimeout(template) from None
+            raise
+        finally:
+            metrics.job_admission_wait[task.priority].observe(time.monotonic() - started)
+
+    def _admit(self) -> None:
+        """Admit waiters that fit, in priority order, skipping those that do not."""
+        if not self._waiters:
+            return
+        self._prune()
+        counts = self.active()
+        still_waiting = []
+        for entry in sorted(self._waiters):
+            *_, task_id, template, granted = entry
+            if granted.done():
+                continue
+            if self._fits(counts, template):
+                self._reserved[task_id] = (template, time.monotonic())
+                counts[template] += 1
+                granted.set_result(None)
+            else:
+                still_waiting.append(entry)
+        self._waiters = still_waiting  # sorted, so still a valid heap
+
+    def _on_job_event(self, kind: str, job: dict[str, Any]) -> None:
+        # Once the watch has seen a Job it counts from the Job itself.
+        self._reserved.pop(job_labels(job).get("task-id", ""), None)
+        if kind == "DELETED" or job_finished(job):
+            self._admit()
+
+    def close(self) -> None:
+        """Fail every waiter with ``CapacityTimeout`` so its task is requeued."""
+        for *_, template, granted in self._waiters:
+            if not granted.done():
+                granted.set_exception(CapacityTimeout(template))
+        self._waiters.clear()
@@ -1,130 +1,398 @@
 import asyncio
 import logging
+import time
 
 import aio_pika
 from aio_pika import ExchangeType
 from aio_pika.abc import AbstractIncomingMessage
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from pydantic import ValidationError
 
+from app import metrics, tracing
 from app.brain import TaskRouter
+from app.capacity import CapacityTimeout
 from app.config import settings
 from app.dispatcher import JobManager
-from app.models import AgentTask
+from app.inflight import DEFER, InFlight
+from app.llm import OPEN
+from app.models import MESSAGE_PRIORITY, AgentTask
+from app.retry import PermanentError, RetryPolicy, is_permanent
+from app.scheduler import Scheduler, SchedulerClosed
 
 logger = logging.getLogger(__name__)
 
 EXCHANGE_NAME = "agent_events"
 ROUTING_KEY = "task.created"
-QUEUE_NAME = "orchestrator_queue"
+QUEUE_NAME = "orchestrator_priority_queue"
+# Pre-priority FIFO queue; unbound and drained on startup if it still exists.
+LEGACY_QUEUE_NAME = "orchestrator_queue"
+MAX_PRIORITY = max(MESSAGE_PRIORITY.values())
 DLQ_EXCHANGE = "agent_events_dlq"
 DLQ_QUEUE = "task.dlq"
 RETRY_HEADER = "x-retry-count"
 
 
 class Consumer:
-    def __init__(self) -> None:
+    """Routes and dispatches buffered tasks through the priority scheduler.
+
+    Each of the up to ``consumer_prefetch_count`` deliveries runs in its own
+    task and waits in the scheduler for a routing slot, then for runner Job
+    capacity, then a dispatch slot. Every message is acked, retried or
+    dead-lettered on its own. On shutdown consumption is cancelled, tasks
+    already being routed or dispatched are allowed to finish (up to
+    ``consumer_drain_timeout``), and messages still waiting to be routed or
+    for capacity are requeued. Failed tasks wait in a delay queue before
+    their retry (see ``RetryPolicy``); permanent failures and tasks out of
+    retries go to the DLQ. Tasks for an issue that already has a runner Job
+    are dropped, deferred or supersede it, before routing (see
+    ``InFlightIndex``). While the LLM circuit breaker is open the consumers
+    are cancelled, so new messages stay in the queue.
+    """
+
+    def __init__(
+        self,
+        router: TaskRouter | None = None,
+        dispatcher: JobManager | None = None,
+    ) -> None:
         self._connection: aio_pika.abc.AbstractRobustConnection | None = None
         self._channel: aio_pika.abc.AbstractChannel | None = None
-        self._router = TaskRouter()
-        self._dispatcher = JobManager()
+        self._router = router or TaskRouter()
+        self._dispatcher = dispatcher or JobManager()
+        self._scheduler = Scheduler(
+            route_limit=settings.route_concurrency,
+            dispatch_limit=settings.dispatch_concurrency,
+            aging=settings.scheduler_aging_seconds,
+        )
+        self._retry = RetryPolicy(
+            base=settings.retry_base_delay_seconds,
+            max_delay=settings.retry_max_delay_seconds,
+            jitter=settings.retry_jitter,
+            max_retries=settings.max_retries,
+        )
+        self._consumers: list[tuple[aio_pika.abc.AbstractQueue, str]] = []
+        # Consumption is paused while the LLM circuit breaker is open.
+        self._paused: list[aio_pika.abc.AbstractQueue] = []
+        self._pausing = asyncio.Lock()
+        if self._router.breaker is not None:
+            self._router.breaker.subscribe(self._on_breaker)
+        self._processing: set[asyncio.Task[None]] = set()
         self._shutdown = asyncio.Event()
+        self._closed = asyncio.Event()
 
     async def connect(self) -> None:
         self._connection = await aio_pika.connect_robust(settings.rabbitmq_url)
-        self._channel = await self._connection.channel()
-        await self._channel.set_qos(prefetch_count=1)
+        channel = await self._connection.channel()
+        await channel.set_qos(prefetch_count=settings.consumer_prefetch_count)
 
         # Declare DLQ infrastructure
-        dlq_exchange = await self._channel.declare_exchange(
+        dlq_exchange = await channel.declare_exchange(
             DLQ_EXCHANGE, ExchangeType.DIRECT, durable=True
         )
-        dlq_queue = await self._channel.declare_queue(DLQ_QUEUE, durable=True)
+        dlq_queue = await channel.declare_queue(DLQ_QUEUE, durable=True)
         await dlq_queue.bind(dlq_exchange, routing_key=DLQ_QUEUE)
 
         # Declare main exchange & queue
-        exchange = await self._channel.declare_exchange(
+        exchange = await channel.declare_exchange(
             EXCHANGE_NAME, ExchangeType.TOPIC, durable=True
         )
-        queue = await self._channel.declare_queue(QUEUE_NAME, durable=True)
+        queue = await channel.declare_queue(
+            QUEUE_NAME, durable=True, arguments={"x-max-priority": MAX_PRIORITY}
+        )
         await queue.bind(exchange, routing_key=ROUTING_KEY)
 
-        await queue.consume(self._on_message)
+        # Delay queues: expired retries and deferred tasks are dead-lettered
+        # back onto the exchange.
+        steps = set(self._retry.steps)
+        if settings.inflight_defer_seconds > 0:
+            steps.add(settings.inflight_defer_seconds)
+        for step in sorted(steps):
+            await channel.declare_queue(
+                RetryPolicy.queue(step),
+                durable=True,
+                arguments={
+                    "x-dead-letter-exchange": EXCHANGE_NAME,
+                    "x-dead-letter-routing-key": ROUTING_KEY,
+                },
+            )
+
+        await self.start(queue, channel)
+        await self._drain_legacy_queue(exchange)
         logger.info(
             "Consumer started",
-            extra={"queue": QUEUE_NAME, "routing_key": ROUTING_KEY},
+            extra={
+                "queue": QUEUE_NAME,
+                "routing_key": ROUTING_KEY,
+                "prefetch": settings.consumer_prefetch_count,
+                "route_concurrency": settings.route_concurrency,
+                "dispatch_concurrency": settings.dispatch_concurrency,
+            },
         )
 
+    async def start(
+        self,
+        queue: aio_pika.abc.AbstractQueue,
+        channel: aio_pika.abc.AbstractChannel | None = None,
+    ) -> None:
+        """Start the dispatcher and consume ``queue``.
+
+        ``connect`` calls this with the declared priority queue; any queue-like
+        broker can be passed instead. Retries, deferrals and dead letters are
+        published on ``channel``. Without a channel, deferred tasks are
+        requeued at once and failed tasks are acked without a retry.
+        """
+        await self._dispatcher.start()
+        self._channel = channel
+        self._consumers.append((queue, await queue.consume(self._on_message)))
+
+    async def _drain_legacy_queue(self, exchange: aio_pika.abc.AbstractExchange) -> None:
+        """Stop routing to the old FIFO queue and consume whatever is left in it."""
+        # A passive declare of a missing queue closes its channel, so probe on
+        # a throwaway one.
+        probe = await self._connection.channel()
+        try:
+            await probe.declare_queue(LEGACY_QUEUE_NAME, passive=True)
+        except aio_pika.exceptions.ChannelClosed:
+            return
+        finally:
+            if not probe.is_closed:
+                await probe.close()
+
+        legacy = await self._channel.get_queue(LEGACY_QUEUE_NAME)
+        await legacy.unbind(exchange, routing_key=ROUTING_KEY)
+        self._consumers.append((legacy, await legacy.consume(self._on_message)))
+        logger.info("Draining legacy queue", extra={"queue": LEGACY_QUEUE_NAME})
+
+    def _on_breaker(self, state: str) -> None:
+        # Half-open resumes too, so that a new message can probe the API.
+        asyncio.ensure_future(self._pause() if state == OPEN else self._resume())
+
+    async def _pause(self) -> None:
+        async with self._pausing:
+            if self._shutdown.is_set() or not self._consumers:
+                return
+            for queue, consumer_tag in self._consumers:
+                try:
+                    await queue.cancel(consumer_tag)
+                except Exception as exc:
+                    logger.warning("Failed to cancel consumer", extra={"error": str(exc)})
+                self._paused.append(queue)
+            self._consumers.clear()
+            logger.warning("Consumption paused: LLM circuit breaker open")
+
+    async def _resume(self) -> None:
+        async with self._pausing:
+            if self._shutdown.is_set() or not self._paused:
+                return
+            for queue in self._paused:
+                self._consumers.append((queue, await queue.consume(self._on_message)))
+            self._paused.clear()
+            logger.info("Consumption resumed")
+
     async def _on_message(self, message: AbstractIncomingMessage) -> None:
         if self._shutdown.is_set():
             await message.nack(requeue=True)
             return
 
+        current = asyncio.current_task()
+        if current is not None:
+            self._processing.add(current)
+        headers = message.headers or {}
+        try:
+            with tracing.tracer.start_as_current_span(
+                "process task", context=tracing.extract(headers), kind=SpanKind.CONSUMER
+            ):
+                published = headers.get(tracing.PUBLISHED_AT_HEADER)
+                if isinstance(published, int):
+                    tracing.record_span("queue wait", published)
+                await self._process(message)
+        finally:
+            self._processing.discard(current)
+
+    async def _process(self, message: AbstractIncomingMessage) -> None:
         retry_count = (message.headers or {}).get(RETRY_HEADER, 0)
         task_id = "unknown"
 
         try:
-            task = AgentTask.model_validate_json(message.body)
+            try:
+                task = AgentTask.model_validate_json(message.body)
+            except ValidationError as exc:
+                raise PermanentError(f"Invalid task message: {exc.error_count()} errors") from exc
             task_id = str(task.task_id)
             logger.info("Processing task", extra={"task_id": task_id, "retry": retry_count})
+            trace.get_current_span().set_attributes(
+                {
+                    "anton.task_id": task_id,
+                    "anton.source": task.source.value,
+                    "anton.external_id": task.external_id,
+                    "anton.priority": task.priority.value,
+                    "anton.retry": retry_count,
+                }
+            )
 
-            plan = await self._router.route(task)
-            self._dispatcher.create_job(task_id, plan, task)
+            try:
+                async with self._dispatcher.inflight.claim(task):
+                    if not await self._route_and_dispatch(message, task):
+                        return
+            except InFlight as exc:
+                logger.info(
+                    "Task already in flight",
+                    extra={"task_id": task_id, "holder": exc.holder, "policy": exc.policy},
+                )
+                if exc.policy == DEFER and not await self._defer(message):
+                    return
+                await message.ack()
+                return
 
             await message.ack()
             logger.info("Task completed", extra={"task_id": task_id})
 
-        except Exception:
-            logger.exception("Failed to process message", extra={"task_id": task_id, "retry": retry_count})
+        except Exception as exc:
+            permanent = is_permanent(exc)
+            logger.exception(
+                "Failed to process message",
+                extra={"task_id": task_id, "retry": retry_count, "permanent": permanent},
+            )
 
-            if retry_count + 1 >= settings.max_retries:
-                await self._send_to_dlq(message)
-                await message.ack()
+            # Publish before acking: if publishing fails the message is redelivered.
+            if permanent:
+                await self._send_to_dlq(message, "permanent", exc)
+            elif retry_count + 1 >= settings.max_retries:
+                await self._send_to_dlq(message, "max_retries", exc)
             else:
-                await message.nack(requeue=False)
                 await self._republish_with_retry(message, retry_count + 1)
+            await message.ack()
+
+    async def _route_and_dispatch(self, message: AbstractIncomingMessage, task: AgentTask) -> bool:
+        """Route ``task`` and create its Job; False if the message was handed back."""
+        task_id = str(task.task_id)
+        try:
+            with tracing.tracer.start_as_current_span("route"):
+                async with self._scheduler.route.slot(task):
+                    plan = await self._router.route(task)
+        except SchedulerClosed:
+            # Shutting down before routing started: hand it back to the broker.
+            await message.nack(requeue=True)
+            return False
+        try:
+            with tracing.tracer.start_as_current_span(
+                "dispatch", attributes={"anton.template_id": plan.template_id.value}
+            ):
+                async with self._dispatcher.capacity.hold(task, plan.template_id.value):
+                    async with self._scheduler.dispatch.slot(task):
+                        await self._dispatcher.create_job(task_id, plan, task)
+        except CapacityTimeout:
+            # No Job slot in time, or shutting down: let the broker hold it.
+            logger.info("No Job capacity; requeueing", extra={"task_id": task_id})
+            await message.nack(requeue=True)
+            return False
+        return True
+
+    async def _defer(self, original: AbstractIncomingMessage) -> bool:
+        """Put a task back via the defer delay queue; False if it was requeued instead."""
+        if self._channel is None or settings.inflight_defer_seconds <= 0:
+            await original.nack(requeue=True)
+            return False
+        await self._channel.default_exchange.publish(
+            aio_pika.Message(
+                body=original.body,
+                headers={
+                    **(original.headers or {}),
+                    tracing.PUBLISHED_AT_HEADER: time.time_ns(),
+                },
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                content_type="application/json",
+                priority=original.priority,
+                expiration=settings.inflight_defer_seconds,
+            ),
+            routing_key=RetryPolicy.queue(settings.inflight_defer_seconds),
+        )
+        return True
 
     async def _republish_with_retry(
         self, original: AbstractIncomingMessage, new_count: int
     ) -> None:
         if self._channel is None:
             return
-        exchange = await self._channel.get_exchange(EXCHANGE_NAME)
         headers = dict(original.headers or {})
         headers[RETRY_HEADER] = new_count
-        await exchange.publish(
-            aio_pika.Message(
-                body=original.body,
-                headers=headers,
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                content_type="application/json",
-            ),
-            routing_key=ROUTING_KEY,
+        headers[tracing.PUBLISHED_AT_HEADER] = time.time_ns()
+        queue, delay = self._retry.delay(new_count) if self._retry.steps else ("", None)
+        message = aio_pika.Message(
+            body=original.body,
+            headers=headers,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            content_type="application/json",
+            priority=original.priority,
+            expiration=delay,
         )
+        metrics.RETRIES.inc()
+        if not queue:
+            exchange = await self._channel.get_exchange(EXCHANGE_NAME)
+            await exchange.publish(message, routing_key=ROUTING_KEY)
+            logger.info("Republished for retry", extra={"retry": new_count})
+            return
+
+        await self._channel.default_exchange.publish(message, routing_key=queue)
         logger.info(
-            "Republished for retry",
-            extra={"retry": new_count},
+            "Scheduled retry",
+            extra={"retry": new_count, "delay_s": round(delay, 1), "queue": queue},
         )
 
-    async def _send_to_dlq(self, message: AbstractIncomingMessage) -> None:
+    async def _send_to_dlq(
+        self, message: AbstractIncomingMessage, reason: str, exc: Exception
+    ) -> None:
         if self._channel is None:
             return
+        headers = dict(message.headers or {})
+        headers["x-dlq-reason"] = reason
+        headers["x-error"] = f"{type(exc).__name__}: {exc}"[:1000]
         dlq_exchange = await self._channel.get_exchange(DLQ_EXCHANGE)
         await dlq_exchange.publish(
             aio_pika.Message(
                 body=message.body,
-                headers=dict(message.headers or {}),
+                headers=headers,
                 delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
                 content_type="application/json",
             ),
             routing_key=DLQ_QUEUE,
         )
+        metrics.dead_lettered[reason].inc()
         logger.warning(
-            "Message sent to DLQ after max retries",
-            extra={"max_retries": settings.max_retries},
+            "Message sent to DLQ",
+            extra={"reason": reason, "max_retries": settings.max_retries},
         )
 
     async def shutdown(self) -> None:
         logger.info("Shutting down consumer...")
         self._shutdown.set()
+        for queue, consumer_tag in self._consumers:
+            try:
+                await queue.cancel(consumer_tag)
+            except Exception as exc:
+                logger.warning("Failed to cancel consumer", extra={"error": str(exc)})
+        self._scheduler.route.close()
+        self._dispatcher.capacity.close()
+
+        if self._processing:
+            logger.info("Draining in-flight tasks", extra={"in_flight": len(self._processing)})
+            _, pending = await asyncio.wait(
+                self._processing, timeout=settings.consumer_drain_timeout
+            )
+            if pending:
+                # Unacked messages are redelivered once the connection closes.
+                logger.warning(
+                    "Drain timed out; unfinished tasks will be redelivered",
+                    extra={"in_flight": len(pending)},
+                )
+
         if self._connection and not self._connection.is_closed:
             await self._connection.close()
+        self._dispatcher.close()
+        await self._router.close()
+        self._closed.set()
         logger.info("Consumer shut down")
+
+    async def wait_closed(self) -> None:
+        """Wait until ``shutdown`` has drained in-flight tasks and disconnected."""
+        await self._closed.wait()
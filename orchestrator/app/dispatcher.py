@@ -1,34 +1,137 @@
+import asyncio
+import functools
 import json
 import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
-import yaml
 from jinja2 import Environment, FileSystemLoader
 from kubernetes import client as k8s_client, config as k8s_config
+from kubernetes.client.rest import ApiException
 
+from app import metrics, tracing
+from app.capacity import JobCapacity, parse_template_limits
 from app.config import settings
+from app.inflight import InFlightIndex, parse_policies, work_key, work_key_label
+from app.job_template import JobTemplate
 from app.models import AgentTask, RouterPlan
+from app.lifecycle import JobLifecycle
+from app.profiles import create_profile_table
+from app.watcher import RUNNER_SELECTOR, JobWatcher
 
 logger = logging.getLogger(__name__)
 
 TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
 
+# Per call: the outcome on success, and the status that means the call's
+# goal already holds with the outcome recorded for it.
+_OUTCOMES = {
+    "create_configmap": ("created", 409, "exists"),
+    "create_job": ("created", 409, "exists"),
+    "delete_configmap": ("deleted", 404, "missing"),
+    "delete_job": ("deleted", 404, "missing"),
+    "list_configmaps": ("listed", None, None),
+}
+
 
 class JobManager:
-    def __init__(self) -> None:
-        try:
-            k8s_config.load_incluster_config()
-        except k8s_config.ConfigException:
-            k8s_config.load_kube_config()
+    """Creates a task's ConfigMap and Job without blocking the event loop.
+
+    The Kubernetes client is synchronous, so calls run on a dedicated pool of
+    ``k8s_dispatch_workers`` threads sharing one API client whose connection
+    pool is sized to match. Responses are not deserialized into models.
+    ``capacity`` gates dispatch on the runner Jobs seen by a ``JobWatcher``
+    and ``lifecycle`` cleans up after them; ``inflight`` tracks their work
+    keys to keep one Job per external issue. The Job template is parsed once
+    and each Job takes its image, resources, deadline and node selector from
+    the profile for its template and complexity.
+    """
+
+    def __init__(self, configuration: k8s_client.Configuration | None = None) -> None:
+        if configuration is None:
+            try:
+                k8s_config.load_incluster_config()
+            except k8s_config.ConfigException:
+                k8s_config.load_kube_config()
+            configuration = k8s_client.Configuration.get_default_copy()
 
-        self._core = k8s_client.CoreV1Api()
-        self._batch = k8s_client.BatchV1Api()
+        # One pooled connection per dispatch thread, plus the Job watch.
+        configuration.connection_pool_maxsize = settings.k8s_dispatch_workers + 1
+        self._api = k8s_client.ApiClient(configuration)
+        self._core = k8s_client.CoreV1Api(self._api)
+        self._batch = k8s_client.BatchV1Api(self._api)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.k8s_dispatch_workers,
+            thread_name_prefix="k8s-dispatch",
+        )
+        self.watcher = JobWatcher(self._batch, settings.k8s_namespace)
+        self.capacity = JobCapacity(
+            self.watcher,
+            max_active=settings.job_max_active,
+            template_limits=parse_template_limits(settings.job_template_limits),
+            max_wait=settings.job_admission_max_wait_seconds,
+            aging=settings.scheduler_aging_seconds,
+        )
+        self.lifecycle = JobLifecycle(
+            self.watcher,
+            delete_context=self.delete_context,
+            list_contexts=self.list_contexts,
+            sweep_interval=settings.context_gc_interval_seconds,
+            sweep_grace=settings.context_gc_grace_seconds,
+        )
+        self.inflight = InFlightIndex(
+            self.watcher,
+            policies=parse_policies(settings.inflight_policies),
+            supersede=self.supersede,
+        )
         self._jinja = Environment(
             loader=FileSystemLoader(str(TEMPLATES_DIR)),
             autoescape=False,
         )
+        self._job_template = JobTemplate(self._jinja, "base_job.yaml.j2")
+        self.profiles = create_profile_table()
+
+    async def start(self) -> None:
+        await self.watcher.start()
+        self.lifecycle.start()
+
+    async def _call(
+        self, call: str, task_id: str, method: Callable[..., Any], **kwargs: Any
+    ) -> bytes:
+        """Run one API call on the dispatch pool and return the raw body.
 
-    def create_job(
+        A create that finds the object already there, or a delete that finds
+        it already gone, counts as done and returns an empty body.
+        """
+        request = functools.partial(method, _preload_content=False, **kwargs)
+        outcome, settled_status, settled_outcome = _OUTCOMES[call]
+        started = time.perf_counter()
+        try:
+            # Reading the body returns the connection to the pool.
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: request().data
+            )
+        except ApiException as exc:
+            # Retries of a partly dispatched task find objects already there.
+            if exc.status != settled_status:
+                outcome = "error"
+                raise
+            outcome = settled_outcome
+            logger.info(
+                "Object already %s", settled_outcome, extra={"task_id": task_id, "call": call}
+            )
+            return b""
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            metrics.k8s_call_seconds[call].observe(time.perf_counter() - started)
+            metrics.k8s_calls[call, outcome].inc()
+
+    async def create_job(
         self,
         task_id: str,
         plan: RouterPlan,
@@ -38,42 +141,125 @@ class JobManager:
         job_name = f"agent-job-{task_id}"
         namespace = settings.k8s_namespace
 
-        # 1. Create ConfigMap with task context
+        # 1. ConfigMap with task context
         context_data = {
             "task": original_task.model_dump(mode="json"),
             "plan": plan.model_dump(mode="json"),
         }
-        configmap = k8s_client.V1ConfigMap(
-            metadata=k8s_client.V1ObjectMeta(
-                name=configmap_name,
-                namespace=namespace,
-                labels={"app": "anton-runner", "task-id": task_id},
-            ),
-            data={"task.json": json.dumps(context_data, indent=2, default=str)},
-        )
-        self._core.create_namespaced_config_map(namespace=namespace, body=configmap)
-        logger.info(
-            "ConfigMap created",
-            extra={"task_id": task_id, "configmap": configmap_name},
-        )
+        configmap = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {
+                "name": configmap_name,
+                "namespace": namespace,
+                "labels": {"app": "anton-runner", "task-id": task_id},
+            },
+            "data": {"task.json": json.dumps(context_data, default=str)},
+        }
 
-        # 2. Render Job manifest from Jinja2 template
-        template = self._jinja.get_template("base_job.yaml.j2")
-        rendered = template.render(
+        # 2. Fill in the Job manifest template with the task's profile
+        profile = self.profiles.get(plan.template_id.value, plan.complexity.value)
+        job_manifest = self._job_template.render(
             job_name=job_name,
             namespace=namespace,
             task_id=task_id,
             template_id=plan.template_id.value,
             complexity=plan.complexity.value,
             configmap_name=configmap_name,
-            agent_image=settings.agent_image,
+            image=profile.image,
+            resources=profile.resources,
+            active_deadline_seconds=profile.active_deadline_seconds,
+            node_selector=profile.node_selector,
+            source=original_task.source.value,
+            work_key=work_key_label(original_task),
+            external_id=work_key(original_task)[1],
+            # The runner continues the task's trace and reports its pod start.
+            traceparent=tracing.inject().get("traceparent", ""),
+            otlp_endpoint=settings.otel_exporter_otlp_endpoint,
+            dispatched_at=str(time.time_ns()),
         )
-        job_manifest = yaml.safe_load(rendered)
 
-        # 3. Submit Job
-        self._batch.create_namespaced_job(namespace=namespace, body=job_manifest)
+        # 3. Submit the ConfigMap, then the Job: a Job created without its
+        # ConfigMap would start a pod that can never mount its context.
+        started = time.perf_counter()
+        with tracing.tracer.start_as_current_span(
+            "k8s dispatch", attributes={"anton.job": job_name}
+        ):
+            await self._call(
+                "create_configmap",
+                task_id,
+                self._core.create_namespaced_config_map,
+                namespace=namespace,
+                body=configmap,
+            )
+            await self._call(
+                "create_job",
+                task_id,
+                self._batch.create_namespaced_job,
+                namespace=namespace,
+                body=job_manifest,
+            )
+        elapsed = time.perf_counter() - started
+        self.inflight.dispatched(original_task, task_id)
+        metrics.DISPATCH_SECONDS.observe(elapsed)
         logger.info(
             "Job submitted",
-            extra={"task_id": task_id, "job": job_name, "namespace": namespace},
+            extra={
+                "task_id": task_id,
+                "job": job_name,
+                "configmap": configmap_name,
+                "namespace": namespace,
+                "image": profile.image,
+                "duration_ms": round(elapsed * 1000, 1),
+            },
         )
         return job_name
+
+    async def delete_context(self, task_id: str) -> None:
+        await self._call(
+            "delete_configmap",
+            task_id,
+            self._core.delete_namespaced_config_map,
+            name=f"agent-ctx-{task_id}",
+            namespace=settings.k8s_namespace,
+        )
+
+    async def supersede(self, task_id: str) -> None:
+        """Delete a task's Job (and its pods) and context, as a newer task replaces it."""
+        await self._call(
+            "delete_job",
+            task_id,
+            self._batch.delete_namespaced_job,
+            name=f"agent-job-{task_id}",
+            namespace=settings.k8s_namespace,
+            propagation_policy="Background",
+        )
+        await self.delete_context(task_id)
+
+    async def list_contexts(self) -> list[dict[str, Any]]:
+        """All runner context ConfigMaps in the namespace, as raw dicts."""
+        items: list[dict[str, Any]] = []
+        token = None
+        while True:
+            body = json.loads(
+                await self._call(
+                    "list_configmaps",
+                    "",
+                    self._core.list_namespaced_config_map,
+                    namespace=settings.k8s_namespace,
+                    label_selector=RUNNER_SELECTOR,
+                    limit=500,
+                    _continue=token,
+                )
+            )
+            items.extend(body.get("items") or [])
+            token = body["metadata"].get("continue")
+            if not token:
+                return items
+
+    def close(self) -> None:
+        self.lifecycle.close()
+        self.capacity.close()
+        self.watcher.close()
+        self._executor.shutdown(wait=True)
+        self._api.close()
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from app import metrics
+from app.models import AgentTask, Source
+from app.watcher import JobWatcher, job_finished, job_labels
+
+logger = logging.getLogger(__name__)
+
+DROP, SUPERSEDE, DEFER = metrics.INFLIGHT_POLICIES
+WORK_KEY_LABEL = "work-key"
+
+Supersede = Callable[[str], Awaitable[None]]
+
+
+class InFlight(Exception):
+    """Raised for a task whose work is already in flight, to be dropped or deferred."""
+
+    def __init__(self, policy: str, holder: str) -> None:
+        super().__init__(f"{policy}: in flight as task {holder}")
+        self.policy = policy
+        self.holder = holder
+
+
+def work_key(task: AgentTask) -> tuple[str, str]:
+    """``(source, external_id)``; Sonar analyses key by project, as each has its own ID."""
+    if task.source == Source.SONARCLOUD:
+        project = task.raw_payload.get("project")
+        if isinstance(project, dict) and project.get("key"):
+            return task.source.value, str(project["key"])
+    return task.source.value, task.external_id
+
+
+def work_key_label(task: AgentTask) -> str:
+    """The work key as a label value (external IDs may not be valid ones)."""
+    source, external_id = work_key(task)
+    return hashlib.blake2b(f"{source}:{external_id}".encode(), digest_size=10).hexdigest()
+
+
+def parse_policies(value: str) -> dict[str, str]:
+    """Parse ``"jira=defer,sonarcloud=drop"``; unknown sources and policies are rejected."""
+    policies: dict[str, str] = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        source, _, policy = item.partition("=")
+        policy = policy.strip()
+        if policy not in metrics.INFLIGHT_POLICIES:
+            raise ValueError(f"Unknown in-flight policy {policy!r} for {source.strip()}")
+        policies[Source(source.strip()).value] = policy
+    return policies
+
+
+class InFlightIndex:
+    """Runner work in flight per ``(source, external_id)``.
+
+    Built from the ``work-key`` label of the unfinished Jobs seen by the
+    ``JobWatcher`` (so it is rebuilt from the cluster at startup and covers
+    other replicas' Jobs) plus this replica's tasks between ``claim`` and
+    Job creation. A task whose source has a policy and whose key is in
+    flight under another task is dropped or deferred (``InFlight`` is raised
+    before it is routed), or supersedes it: the earlier task's Job is
+    deleted, after waiting for its dispatch if it is still being routed.
+    Sources without a policy are dispatched regardless.
+    """
+
+    def __init__(
+        self,
+        watcher: JobWatcher | None,
+        policies: dict[str, str],
+        supersede: Supersede,
+    ) -> None:
+        self._watcher = watcher
+        self._policies = policies
+        self._supersede = supersede
+        # Work key -> task IDs of its unfinished Jobs.
+        self._jobs: dict[str, set[str]] = {}
+        # Work key -> (task ID, done) for tasks being routed and dispatched here.
+        self._claims: dict[str, tuple[str, asyncio.Future[None]]] = {}
+        if watcher is not None:
+            watcher.subscribe(self._on_job_event)
+        metrics.INFLIGHT_WORK.set_function(lambda: len(self._jobs))
+
+    @asynccontextmanager
+    async def claim(self, task: AgentTask) -> AsyncIterator[None]:
+        """Hold ``task``'s work key while it is routed and its Job created."""
+        policy = self._policies.get(task.source.value)
+        if self._watcher is None or policy is None:
+            yield
+            return
+        await self._watcher.synced.wait()
+        key = work_key_label(task)
+        task_id = str(task.task_id)
+        while key in self._claims:
+            holder, done = self._claims[key]
+            if policy != SUPERSEDE:
+                self._duplicate(task, policy, holder)
+            await asyncio.shield(done)
+        # A redelivered task finds its own Job, which create_job tolerates.
+        holders = self._jobs.get(key, set()) - {task_id}
+        if holders and policy != SUPERSEDE:
+            self._duplicate(task, policy, min(holders))
+
+        done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._claims[key] = (task_id, done)
+        try:
+            for holder in sorted(holders):
+                metrics.inflight_duplicates[SUPERSEDE].inc()
+                logger.info(
+                    "Superseding in-flight task",
+                    extra={"task_id": task_id, "superseded": holder, "source": task.source.value},
+                )
+                await self._supersede(holder)
+                self._forget(key, holder)
+            yield
+        finally:
+            del self._claims[key]
+            done.set_result(None)
+
+    def _duplicate(self, task: AgentTask, policy: str, holder: str) -> None:
+        metrics.inflight_duplicates[policy].inc()
+        raise InFlight(policy, holder)
+
+    def dispatched(self, task: AgentTask, task_id: str) -> None:
+        """Count ``task``'s Job as in flight before the watch reports it."""
+        if self._watcher is not None and task.source.value in self._policies:
+            self._jobs.setdefault(work_key_label(task), set()).add(task_id)
+
+    def _forget(self, key: str, task_id: str) -> None:
+        holders = self._jobs.get(key)
+        if holders is not None:
+            holders.discard(task_id)
+            if not holders:
+                del self._jobs[key]
+
+    def _on_job_event(self, kind: str, job: dict[str, Any]) -> None:
+        labels = job_labels(job)
+        key, task_id = labels.get(WORK_KEY_LABEL), labels.get("task-id")
+        if not key or not task_id:
+            return
+        if kind == "DELETED" or job_finished(job):
+            self._forget(key, task_id)
+        else:
+            self._jobs.setdefault(key, set()).add(task_id)
@@ -0,0 +1,53 @@
+import re
+from typing import Any
+
+import yaml
+from jinja2 import Environment, nodes
+
+_PLACEHOLDER = re.compile(r"__anton_(\w+?)__")
+
+
+class JobTemplate:
+    """A Jinja Job manifest template, rendered and parsed once.
+
+    At load every template variable is rendered as a placeholder and the
+    result parsed into a skeleton; ``render`` copies the skeleton with the
+    placeholders replaced, so no YAML is parsed per Job. A placeholder that
+    is a whole scalar takes the value as is (so mappings and numbers keep
+    their type; render them with ``tojson``); one inside a longer string is
+    substituted as text. Variables must therefore only appear in values,
+    not in keys or control structures.
+    """
+
+    def __init__(self, environment: Environment, name: str) -> None:
+        source = environment.loader.get_source(environment, name)[0]
+        # Every name the template loads, including ones shadowing Jinja
+        # globals such as ``namespace``.
+        self.variables = {
+            node.name
+            for node in environment.parse(source).find_all(nodes.Name)
+            if node.ctx == "load"
+        }
+        rendered = environment.get_template(name).render(
+            {variable: f"__anton_{variable}__" for variable in self.variables}
+        )
+        self._skeleton = yaml.safe_load(rendered)
+
+    def render(self, **values: Any) -> dict[str, Any]:
+        missing = self.variables - values.keys()
+        if missing:
+            raise ValueError(f"Missing Job template values: {', '.join(sorted(missing))}")
+        return _fill(self._skeleton, values)
+
+
+def _fill(node: Any, values: dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        return {key: _fill(value, values) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_fill(value, values) for value in node]
+    if isinstance(node, str) and "__anton_" in node:
+        whole = _PLACEHOLDER.fullmatch(node)
+        if whole:
+            return values[whole[1]]
+        return _PLACEHOLDER.sub(lambda match: str(values[match[1]]), node)
+    return node
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+from app import metrics
+from app.watcher import JobWatcher, job_finished, job_labels
+
+logger = logging.getLogger(__name__)
+
+DeleteContext = Callable[[str], Awaitable[None]]
+ListContexts = Callable[[], Awaitable[list[dict[str, Any]]]]
+
+
+def _timestamp(value: str | None) -> float | None:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def job_outcome(job: dict[str, Any]) -> tuple[str, float | None]:
+    """``("succeeded" | "failed", finish time)`` for a finished Job."""
+    status = job.get("status") or {}
+    for condition in status.get("conditions") or []:
+        if condition.get("status") != "True":
+            continue
+        if condition.get("type") == "Complete":
+            finished = status.get("completionTime") or condition.get("lastTransitionTime")
+            return "succeeded", _timestamp(finished)
+        if condition.get("type") == "Failed":
+            return "failed", _timestamp(condition.get("lastTransitionTime"))
+    raise ValueError("Job has not finished")
+
+
+class JobLifecycle:
+    """Records how runner Jobs end and deletes their task context ConfigMaps.
+
+    When the ``JobWatcher`` reports a Job finishing, its outcome, pending time
+    and duration are logged and recorded per template, and the task's
+    ``agent-ctx-<task_id>`` ConfigMap is deleted. Jobs already finished when
+    the watch first syncs were recorded by a previous run and are left to the
+    sweep, which deletes every context ConfigMap whose Job is finished or
+    gone: once at startup and then every ``sweep_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        watcher: JobWatcher,
+        delete_context: DeleteContext,
+        list_contexts: ListContexts,
+        sweep_interval: float,
+        sweep_grace: float,
+    ) -> None:
+        self._watcher = watcher
+        self._delete_context = delete_context
+        self._list_contexts = list_contexts
+        self._sweep_interval = sweep_interval
+        self._sweep_grace = sweep_grace
+        self._finished: set[str] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._sweeper: asyncio.Task[None] | None = None
+        watcher.subscribe(self._on_job_event)
+
+    def start(self) -> None:
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    def _spawn(self, coroutine: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_job_event(self, kind: str, job: dict[str, Any]) -> None:
+        uid = job["metadata"].get("uid", job["metadata"]["name"])
+        if kind == "DELETED":
+            self._finished.discard(uid)
+            return
+        if uid in self._finished or not job_finished(job):
+            return
+        self._finished.add(uid)
+        if self._watcher.synced.is_set():
+            self._record(job)
+            self._spawn(self._cleanup(job_labels(job).get("task-id", "")))
+
+    def _record(self, job: dict[str, Any]) -> None:
+        labels = job_labels(job)
+        template = labels.get("template", "")
+        outcome, finished = job_outcome(job)
+        status = job.get("status") or {}
+        created = _timestamp(job["metadata"].get("creationTimestamp"))
+        started = _timestamp(status.get("startTime"))
+        duration = finished - created if finished and created else None
+        pending = started - created if started and created else None
+
+        if (template, outcome) in metrics.jobs_finished:
+            metrics.jobs_finished[template, outcome].inc()
+            if duration is not None:
+                metrics.job_seconds[template, outcome].observe(duration)
+            if pending is not None:
+                metrics.job_pending_seconds[template].observe(pending)
+        log = logger.info if outcome == "succeeded" else logger.warning
+        log(
+            "Job finished",
+            extra={
+                "task_id": labels.get("task-id"),
+                "job": job["metadata"]["name"],
+                "template": template,
+                "outcome": outcome,
+                "duration_s": duration,
+                "pending_s": pending,
+                "failed_pods": status.get("failed", 0),
+            },
+        )
+
+    async def _cleanup(self, task_id: str) -> None:
+        if not task_id:
+            return
+        try:
+            await self._delete_context(task_id)
+        except Exception as exc:
+            # The next sweep gets it.
+            logger.warning(
+                "Failed to delete task context", extra={"task_id": task_id, "error": str(exc)}
+            )
+
+    async def _sweep_loop(self) -> None:
+        await self._watcher.synced.wait()
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Context sweep failed")
+            if self._sweep_interval <= 0:
+                return
+            await asyncio.sleep(self._sweep_interval)
+
+    async def sweep(self) -> int:
+        """Delete context ConfigMaps whose Job is finished or gone; return how many."""
+        contexts = await self._list_contexts()
+        cutoff = time.time() - self._sweep_grace
+        orphans = []
+        for context in contexts:
+            task_id = job_labels(context).get("task-id")
+            created = _timestamp(context["metadata"].get("creationTimestamp"))
+            if not task_id or (created is not None and created > cutoff):
+                continue
+            job = self._watcher.jobs.get(f"agent-job-{task_id}")
+            if job is None or job_finished(job):
+                orphans.append(task_id)
+
+        results = await asyncio.gather(
+            *(self._delete_context(task_id) for task_id in orphans), return_exceptions=True
+        )
+        failed = sum(isinstance(result, Exception) for result in results)
+        metrics.CONTEXTS_SWEPT.inc(len(orphans) - failed)
+        logger.info(
+            "Swept task contexts",
+            extra={"contexts": len(contexts), "deleted": len(orphans) - failed, "failed": failed},
+        )
+        return len(orphans) - failed
+
+    def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,295 @@
+import asyncio
+import collections
+import logging
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+import anthropic
+
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = metrics.BREAKER_STATES
+# Errors that mean Claude is overloaded or rate limiting us, so shed load.
+_CONGESTION = {"rate_limited", "overloaded", "timeout"}
+# Errors worth retrying right away (after any retry-after) within one call.
+_RETRY_NOW = {"rate_limited", "overloaded"}
+
+
+class CircuitOpenError(Exception):
+    """Raised to calls that waited too long for an open breaker to close."""
+
+
+def failure_kind(exc: BaseException) -> str | None:
+    """Classify a failed call as a dependency problem, or None for a bad request."""
+    if isinstance(exc, anthropic.RateLimitError):
+        return "rate_limited"
+    if isinstance(exc, anthropic.APIStatusError):
+        if exc.status_code in (503, 529):
+            return "overloaded"
+        return "server_error" if exc.status_code >= 500 else None
+    if isinstance(exc, anthropic.APITimeoutError):
+        return "timeout"
+    if isinstance(exc, anthropic.APIConnectionError):
+        return "connection"
+    return None
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds the API asked us to wait, from ``retry-after-ms`` or ``retry-after``."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(response.headers[header]) * scale
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows additively and shrinks multiplicatively.
+
+    Every successful call within ``latency_target`` adds ``1/limit``, so the
+    limit grows by one per round of calls. A congested call (429/529, a
+    timeout, or slower than ``latency_target``) multiplies it by
+    ``backoff``, at most once per round: calls started before the last
+    decrease do not decrease it again.
+    """
+
+    def __init__(
+        self, minimum: int, maximum: int, latency_target: float, backoff: float = 0.5
+    ) -> None:
+        self._minimum = minimum
+        self._maximum = maximum
+        self._latency_target = latency_target
+        self._backoff = backoff
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._waiters: collections.deque[asyncio.Future[None]] = collections.deque()
+        self._last_decrease = 0.0
+        metrics.LLM_CONCURRENCY_LIMIT.set_function(lambda: int(self.limit))
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the start time to pass to ``release``."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+        else:
+            granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            self._waiters.append(granted)
+            try:
+                await granted
+            except asyncio.CancelledError:
+                if granted.done() and not granted.cancelled():
+                    self.in_flight -= 1
+                    self._wake()
+                raise
+        return time.monotonic()
+
+    def release(self, started: float, congested: bool) -> None:
+        self.in_flight -= 1
+        latency = time.monotonic() - started
+        if self._latency_target > 0 and latency > self._latency_target:
+            congested = True
+        if not congested:
+            self.limit = min(self._maximum, self.limit + 1 / self.limit)
+        elif started > self._last_decrease:
+            self.limit = max(self._minimum, self.limit * self._backoff)
+            self._last_decrease = time.monotonic()
+            logger.warning(
+                "LLM concurrency decreased",
+                extra={"limit": int(self.limit), "latency_ms": round(latency * 1000, 1)},
+            )
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            granted = self._waiters.popleft()
+            if not granted.done():
+                self.in_flight += 1
+                granted.set_result(None)
+
+
+class CircuitBreaker:
+    """Stops calls to Claude while it keeps failing, and honours retry-after.
+
+    ``failures`` consecutive failed calls open the breaker for
+    ``open_seconds`` (or the retry-after, if longer). It then goes half-open
+    and lets one probe call through: success closes it, failure opens it
+    again. A retry-after on any failure also holds every call until it has
+    passed. Calls wait up to ``max_wait`` seconds for the breaker, then fail
+    with ``CircuitOpenError``. Listeners are told about every state change.
+    """
+
+    def __init__(self, failures: int, open_seconds: float, max_wait: float) -> None:
+        self._threshold = failures
+        self._open_seconds = open_seconds
+        self._max_wait = max_wait
+        self.state = CLOSED
+        self._failures = 0
+        self._resume_at = 0.0
+        self._probing = False
+        self._wakeup = asyncio.Event()
+        self._timer: asyncio.TimerHandle | None = None
+        self._listeners: list[Callable[[str], None]] = []
+        metrics.LLM_BREAKER_STATE.set(0)
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    async def enter(self) -> None:
+        """Wait until a call may go out."""
+        deadline = time.monotonic() + self._max_wait
+        while True:
+            now = time.monotonic()
+            if now >= self._resume_at:
+                if self.state == CLOSED:
+                    return
+                if self.state == HALF_OPEN and not self._probing:
+                    self._probing = True
+                    return
+            if now >= deadline:
+                raise CircuitOpenError(self.state)
+            wakeup = self._wakeup
+            timeout = deadline - now
+            if now < self._resume_at:
+                timeout = min(timeout, self._resume_at - now)
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        if self.state != CLOSED:
+            self._set(CLOSED)
+
+    def failure(self, wait: float | None) -> None:
+        self._failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self._failures >= self._threshold:
+            self._open(max(self._open_seconds, wait or 0.0))
+        elif wait:
+            self._resume_at = max(self._resume_at, time.monotonic() + wait)
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed because of Claude."""
+        if self._probing:
+            self._probing = False
+            self._notify()
+
+    def _open(self, seconds: float) -> None:
+        self._resume_at = time.monotonic() + seconds
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(seconds, self._half_open)
+        logger.warning(
+            "LLM circuit breaker opened",
+            extra={"failures": self._failures, "open_seconds": round(seconds, 1)},
+        )
+        if self.state != OPEN:
+            self._set(OPEN)
+
+    def _half_open(self) -> None:
+        self._timer = None
+        if self.state == OPEN:
+            self._set(HALF_OPEN)
+
+    def _set(self, state: str) -> None:
+        self.state = state
+        metrics.LLM_BREAKER_STATE.set(metrics.BREAKER_STATES.index(state))
+        logger.info("LLM circuit breaker state changed", extra={"state": state})
+        self._notify()
+        for listener in self._listeners:
+            listener(state)
+
+    def _notify(self) -> None:
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+
+class ClaudeClient:
+    """``messages.create`` behind an AIMD concurrency limit and a circuit breaker.
+
+    The SDK's own retries are off so that every 429/529 reaches the limiter
+    and the breaker. Rate-limited and overloaded calls are retried here up
+    to ``max_attempts`` times, after the retry-after the API asked for or a
+    short jittered backoff; other failures are raised to the caller.
+    """
+
+    def __init__(
+        self,
+        client: anthropic.AsyncAnthropic,
+        limiter: AIMDLimiter,
+        breaker: CircuitBreaker,
+        max_attempts: int,
+    ) -> None:
+        self._client = client
+        self.limiter = limiter
+        self.breaker = breaker
+        self._max_attempts = max(1, max_attempts)
+
+    async def create(self, **kwargs: Any) -> anthropic.types.Message:
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.breaker.enter()
+            started = await self.limiter.acquire()
+            congested = False
+            try:
+                response = await self._client.messages.create(**kwargs)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as exc:
+                kind = failure_kind(exc)
+                if kind is None:
+                    self.breaker.release()
+                    raise
+                congested = kind in _CONGESTION
+                wait = retry_after(exc)
+                metrics.llm_errors[kind].inc()
+                self.breaker.failure(wait)
+                if kind not in _RETRY_NOW or attempt >= self._max_attempts:
+                    raise
+                logger.warning(
+                    "LLM call failed; retrying",
+                    extra={"error": kind, "attempt": attempt, "retry_after": wait},
+                )
+            else:
+                self.breaker.success()
+                return response
+            finally:
+                self.limiter.release(started, congested)
+            if wait is None:
+                await asyncio.sleep(random.uniform(0.5, 1.0) * 2**attempt)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def create_claude_client() -> ClaudeClient:
+    return ClaudeClient(
+        anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            base_url=settings.anthropic_base_url or None,
+            max_retries=0,
+        ),
+        AIMDLimiter(
+            minimum=settings.llm_concurrency_min,
+            maximum=settings.llm_concurrency_max,
+            latency_target=settings.llm_latency_target_seconds,
+        ),
+        CircuitBreaker(
+            failures=settings.llm_breaker_failures,
+            open_seconds=settings.llm_breaker_open_seconds,
+            max_wait=settings.llm_breaker_max_wait_seconds,
+        ),
+        max_attempts=settings.llm_max_attempts,
+    )
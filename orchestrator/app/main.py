@@ -2,14 +2,21 @@ import asyncio
 import logging
 import signal
 
+from prometheus_client import start_http_server
+
+from app.config import settings
 from app.consumer import Consumer
 from app.logging_config import setup_logging
+from app.tracing import setup_tracing, shutdown_tracing
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
 async def main() -> None:
+    if settings.metrics_port:
+        start_http_server(settings.metrics_port)
+    setup_tracing()
     consumer = Consumer()
     loop = asyncio.get_running_loop()
 
@@ -23,8 +30,9 @@ async def main() -> None:
     await consumer.connect()
     logger.info("Orchestrator running — waiting for tasks")
 
-    # Block until shutdown is signalled
-    await consumer._shutdown.wait()
+    # Block until shutdown has drained in-flight tasks
+    await consumer.wait_closed()
+    shutdown_tracing()
 
 
 if __name__ == "__main__":
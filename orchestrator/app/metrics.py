@@ -0,0 +1,190 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.models import Priority, Source, TemplateId
+
+# Every label combination is known up front (sources, priorities, templates,
+# Kubernetes calls), so each metric's children are built once below.
+
+STAGES = ("route", "dispatch")
+K8S_CALLS = (
+    "create_configmap",
+    "create_job",
+    "delete_configmap",
+    "delete_job",
+    "list_configmaps",
+)
+K8S_OUTCOMES = ("created", "exists", "deleted", "missing", "listed", "error")
+JOB_OUTCOMES = ("succeeded", "failed")
+DLQ_REASONS = ("permanent", "max_retries")
+BREAKER_STATES = ("closed", "half_open", "open")
+INFLIGHT_POLICIES = ("drop", "supersede", "defer")
+LLM_ERRORS = ("rate_limited", "overloaded", "timeout", "server_error", "connection")
+
+_QUEUE_WAIT = Histogram(
+    "anton_orchestrator_queue_wait_seconds",
+    "Time tasks wait in the scheduler for a stage slot",
+    ["stage", "priority"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+SCHEDULER_WAITING = Gauge(
+    "anton_orchestrator_scheduler_waiting",
+    "Tasks waiting in the scheduler for a stage slot",
+    ["stage"],
+)
+_K8S_CALL_SECONDS = Histogram(
+    "anton_orchestrator_k8s_call_seconds",
+    "Latency of Kubernetes API calls made by the dispatcher",
+    ["call"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+_K8S_CALLS_TOTAL = Counter(
+    "anton_orchestrator_k8s_calls_total",
+    "Kubernetes API calls made by the dispatcher, by outcome",
+    ["call", "outcome"],
+)
+ROUTE_VIA = ("rule", "cache", "llm")
+
+_ROUTES = Counter(
+    "anton_orchestrator_routes_total",
+    "Routing decisions by how they were made",
+    ["source", "via"],
+)
+# Labelled by rule name; children are resolved when the rules are loaded.
+RULE_MATCHES = Counter(
+    "anton_orchestrator_rule_matches_total",
+    "Tasks routed by each deterministic rule",
+    ["rule"],
+)
+LLM_SECONDS = Histogram(
+    "anton_orchestrator_llm_seconds",
+    "Latency of routing calls to the LLM",
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "anton_orchestrator_llm_concurrency_limit",
+    "Current adaptive limit on concurrent routing calls to the LLM",
+)
+LLM_BREAKER_STATE = Gauge(
+    "anton_orchestrator_llm_breaker_state",
+    "LLM circuit breaker state: 0 closed, 1 half-open, 2 open",
+)
+_LLM_ERRORS = Counter(
+    "anton_orchestrator_llm_errors_total",
+    "Failed routing calls to the LLM caused by the API, by kind",
+    ["kind"],
+)
+LLM_INPUT_TOKENS = Histogram(
+    "anton_orchestrator_llm_input_tokens",
+    "Input tokens per routing call, as reported by the API",
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 5000, 10000, 25000, 50000),
+)
+LLM_BATCH_TASKS = Histogram(
+    "anton_orchestrator_llm_batch_tasks",
+    "Tasks routed per batched LLM call",
+    buckets=(2, 3, 4, 6, 8, 12, 16, 24, 32),
+)
+_ROUTE_CACHE = Counter(
+    "anton_orchestrator_route_cache_total",
+    "Routing cache lookups by result",
+    ["source", "result"],
+)
+ACTIVE_JOBS = Gauge(
+    "anton_orchestrator_active_jobs",
+    "Unfinished runner Jobs counted against the capacity caps",
+    ["template"],
+)
+JOB_ADMISSION_WAITING = Gauge(
+    "anton_orchestrator_job_admission_waiting",
+    "Routed tasks waiting for runner Job capacity",
+)
+_JOB_ADMISSION_WAIT = Histogram(
+    "anton_orchestrator_job_admission_wait_seconds",
+    "Time routed tasks wait for runner Job capacity",
+    ["priority"],
+    buckets=(0.01, 0.1, 1, 5, 15, 30, 60, 120, 300, 600, 1200),
+)
+_JOBS_FINISHED = Counter(
+    "anton_orchestrator_jobs_finished_total",
+    "Runner Jobs seen finishing, by outcome",
+    ["template", "outcome"],
+)
+_JOB_PENDING_SECONDS = Histogram(
+    "anton_orchestrator_job_pending_seconds",
+    "Time from runner Job creation to its pod starting",
+    ["template"],
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+_JOB_SECONDS = Histogram(
+    "anton_orchestrator_job_duration_seconds",
+    "Time from runner Job creation to completion or failure",
+    ["template", "outcome"],
+    buckets=(30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600, 7200),
+)
+CONTEXTS_SWEPT = Counter(
+    "anton_orchestrator_contexts_swept_total",
+    "Orphaned task context ConfigMaps deleted by the sweep",
+)
+INFLIGHT_WORK = Gauge(
+    "anton_orchestrator_inflight_work",
+    "Work keys (source and external ID) with an unfinished runner Job",
+)
+_INFLIGHT_DUPLICATES = Counter(
+    "anton_orchestrator_inflight_duplicates_total",
+    "Tasks for work already in flight, by the policy applied",
+    ["policy"],
+)
+RETRIES = Counter(
+    "anton_orchestrator_retries_total",
+    "Failed tasks scheduled for another attempt",
+)
+_DEAD_LETTERED = Counter(
+    "anton_orchestrator_dead_lettered_total",
+    "Tasks sent to the DLQ, by reason",
+    ["reason"],
+)
+DISPATCH_SECONDS = Histogram(
+    "anton_orchestrator_dispatch_seconds",
+    "Time to create a task's ConfigMap and Job",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+queue_wait = {
+    (stage, priority): _QUEUE_WAIT.labels(stage, priority.value)
+    for stage in STAGES
+    for priority in Priority
+}
+job_admission_wait = {
+    priority: _JOB_ADMISSION_WAIT.labels(priority.value) for priority in Priority
+}
+llm_errors = {kind: _LLM_ERRORS.labels(kind) for kind in LLM_ERRORS}
+inflight_duplicates = {
+    policy: _INFLIGHT_DUPLICATES.labels(policy) for policy in INFLIGHT_POLICIES
+}
+dead_lettered = {reason: _DEAD_LETTERED.labels(reason) for reason in DLQ_REASONS}
+jobs_finished = {
+    (template, outcome): _JOBS_FINISHED.labels(template.value, outcome)
+    for template in TemplateId
+    for outcome in JOB_OUTCOMES
+}
+job_pending_seconds = {
+    template: _JOB_PENDING_SECONDS.labels(template.value) for template in TemplateId
+}
+job_seconds = {
+    (template, outcome): _JOB_SECONDS.labels(template.value, outcome)
+    for template in TemplateId
+    for outcome in JOB_OUTCOMES
+}
+k8s_call_seconds = {call: _K8S_CALL_SECONDS.labels(call) for call in K8S_CALLS}
+k8s_calls = {
+    (call, outcome): _K8S_CALLS_TOTAL.labels(call, outcome)
+    for call in K8S_CALLS
+    for outcome in K8S_OUTCOMES
+}
+route_cache = {
+    (source, result): _ROUTE_CACHE.labels(source.value, result)
+    for source in Source
+    for result in ("hit", "miss")
+}
+routes = {
+    (source, via): _ROUTES.labels(source.value, via) for source in Source for via in ROUTE_VIA
+}
@@ -22,6 +22,15 @@ class Priority(str, Enum):
     P4 = "P4"
 
 
+# AMQP message priority per task priority, as published by the Ingester.
+MESSAGE_PRIORITY: dict[Priority, int] = {
+    Priority.P1: 4,
+    Priority.P2: 3,
+    Priority.P3: 2,
+    Priority.P4: 1,
+}
+
+
 class AgentTask(BaseModel):
     task_id: UUID
     source: Source
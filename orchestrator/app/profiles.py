@@ -0,0 +1,164 @@
+import itertools
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from app.config import settings
+from app.models import Complexity, TemplateId
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = {
+    "template",
+    "complexity",
+    "image",
+    "resources",
+    "active_deadline_seconds",
+    "node_selector",
+}
+
+# Built-in profiles, layered under the ones in job_profiles_path. Java
+# builds (Maven/Gradle daemons) need the most memory; research tasks only
+# read code and call the LLM.
+DEFAULT_PROFILES: list[dict[str, Any]] = [
+    {
+        "resources": {
+            "requests": {"cpu": "500m", "memory": "512Mi"},
+            "limits": {"cpu": "2", "memory": "2Gi"},
+        },
+        "active_deadline_seconds": 3600,
+    },
+    {"complexity": "low", "active_deadline_seconds": 1800},
+    {"complexity": "high", "active_deadline_seconds": 7200},
+    {
+        "template": "java-backend",
+        "resources": {
+            "requests": {"cpu": "1", "memory": "1536Mi"},
+            "limits": {"cpu": "2", "memory": "3Gi"},
+        },
+    },
+    {
+        "template": "java-backend",
+        "complexity": "high",
+        "resources": {
+            "requests": {"cpu": "2", "memory": "3Gi"},
+            "limits": {"cpu": "4", "memory": "6Gi"},
+        },
+    },
+    {
+        "template": "python-backend",
+        "complexity": "high",
+        "resources": {"requests": {"memory": "1Gi"}, "limits": {"memory": "3Gi"}},
+    },
+    {
+        "template": "react-frontend",
+        "resources": {"requests": {"memory": "1Gi"}, "limits": {"memory": "3Gi"}},
+    },
+    {
+        "template": "general-research",
+        "resources": {
+            "requests": {"cpu": "250m", "memory": "256Mi"},
+            "limits": {"cpu": "1", "memory": "1Gi"},
+        },
+    },
+]
+
+
+@dataclass(frozen=True)
+class JobProfile:
+    """What a runner Job gets: image, resources, deadline and node placement."""
+
+    image: str
+    resources: dict[str, dict[str, str]]
+    active_deadline_seconds: int | None
+    node_selector: dict[str, str]
+
+
+def _merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = _merge(merged[key], value)
+        merged[key] = value
+    return merged
+
+
+def _validate(spec: dict[str, Any]) -> dict[str, Any]:
+    unknown = set(spec) - _FIELDS
+    if unknown:
+        raise ValueError(f"Unknown job profile fields: {', '.join(sorted(unknown))}")
+    if "template" in spec:
+        TemplateId(spec["template"])
+    if "complexity" in spec:
+        Complexity(spec["complexity"])
+    resources = spec.get("resources", {})
+    if not isinstance(resources, dict) or set(resources) - {"requests", "limits"}:
+        raise ValueError("Job profile resources take only requests and limits")
+    for quantities in resources.values():
+        if not isinstance(quantities, dict):
+            raise ValueError("Job profile requests and limits must be mappings")
+    deadline = spec.get("active_deadline_seconds")
+    if deadline is not None and (not isinstance(deadline, int) or deadline <= 0):
+        raise ValueError("active_deadline_seconds must be a positive integer or null")
+    if not isinstance(spec.get("node_selector", {}), dict):
+        raise ValueError("node_selector must be a mapping")
+    return spec
+
+
+class ProfileTable:
+    """Job profiles per ``(template, complexity)``, resolved once at load.
+
+    Each spec may name a template, a complexity, both or neither, and sets
+    any of ``image``, ``resources``, ``active_deadline_seconds`` and
+    ``node_selector``. A combination's profile layers the matching specs from
+    least to most specific (neither, complexity, template, both; the later spec
+    wins among equals), merging ``resources`` and ``node_selector`` key by
+    key and replacing the other fields.
+    """
+
+    def __init__(self, specs: list[dict[str, Any]], default_image: str) -> None:
+        specs = [_validate(spec) for spec in specs]
+        layers = sorted(
+            specs, key=lambda spec: 2 * ("template" in spec) + ("complexity" in spec)
+        )
+        base = {
+            "image": default_image,
+            "resources": {},
+            "active_deadline_seconds": None,
+            "node_selector": {},
+        }
+        self._profiles: dict[tuple[str, str], JobProfile] = {}
+        for template, complexity in itertools.product(TemplateId, Complexity):
+            resolved = base
+            for spec in layers:
+                if spec.get("template", template.value) != template.value:
+                    continue
+                if spec.get("complexity", complexity.value) != complexity.value:
+                    continue
+                fields = {k: v for k, v in spec.items() if k not in ("template", "complexity")}
+                resolved = _merge(resolved, fields)
+            self._profiles[template.value, complexity.value] = JobProfile(
+                image=resolved["image"] or default_image,
+                resources={kind: dict(q) for kind, q in resolved["resources"].items()},
+                active_deadline_seconds=resolved["active_deadline_seconds"],
+                node_selector={k: str(v) for k, v in resolved["node_selector"].items()},
+            )
+
+    def get(self, template: str, complexity: str) -> JobProfile:
+        return self._profiles[template, complexity]
+
+    @classmethod
+    def load(cls, path: str | Path, default_image: str) -> "ProfileTable":
+        document = yaml.safe_load(Path(path).read_text()) or {}
+        return cls(DEFAULT_PROFILES + list(document.get("profiles", [])), default_image)
+
+
+def create_profile_table() -> ProfileTable:
+    if not settings.job_profiles_path:
+        return ProfileTable(DEFAULT_PROFILES, settings.agent_image)
+    table = ProfileTable.load(settings.job_profiles_path, settings.agent_image)
+    logger.info("Job profiles loaded", extra={"path": settings.job_profiles_path})
+    return table
@@ -0,0 +1,165 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from app.models import AgentTask, Source
+
+# Rough size of a token for English text and JSON-ish payload lines. Only
+# used to fit the budget; real counts come back in the response usage.
+CHARS_PER_TOKEN = 4
+
+# Payload paths in order of usefulness for choosing a template, per source.
+# A path ranks by the first prefix it falls under; unlisted paths come last.
+FIELD_RANKS: dict[Source, tuple[str, ...]] = {
+    Source.JIRA: (
+        "issue.fields.summary",
+        "issue.fields.issuetype",
+        "issue.fields.components",
+        "issue.fields.labels",
+        "issue.fields.project",
+        "issue.fields.priority",
+        "issue.fields.description",
+        "issue.fields.status",
+        "issue.fields.comment",
+        "issue.key",
+        "webhookEvent",
+    ),
+    Source.DATADOG: (
+        "title",
+        "alert_type",
+        "alert_transition",
+        "alert_query",
+        "tags",
+        "hostname",
+        "event_msg",
+        "body",
+        "alert_priority",
+        "alert_status",
+    ),
+    Source.SONARCLOUD: (
+        "project",
+        "qualityGate.status",
+        "qualityGate.conditions",
+        "branch",
+        "status",
+        "qualityGate.name",
+    ),
+}
+
+# Keys that never help routing: links, avatars, ids, bookkeeping, history.
+_NOISE = re.compile(
+    r"(^|\.)(_projection|self|avatarUrls|iconUrl|url|link|accountId|timeZone|"
+    r"expand|revision|taskId|analysedAt|date|id|changelog)(\.|$)"
+)
+_SPACES = re.compile(r"\s+")
+_MIN_TRUNCATED_TOKENS = 24
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _scalar(value: Any) -> str:
+    return _SPACES.sub(" ", str(value)).strip()
+
+
+def _inline(value: Any) -> str:
+    """One line for a list item: scalars as-is, objects as ``key=value`` pairs."""
+    if isinstance(value, dict):
+        pairs = ((key, _inline(item)) for key, item in value.items() if not _NOISE.search(key))
+        return " ".join(f"{key}={text}" for key, text in pairs if text)
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_inline(item) for item in value)))
+    return "" if value is None else _scalar(value)
+
+
+def _leaves(payload: Any, path: str = "") -> list[tuple[str, str]]:
+    """Flatten ``payload`` to ``(dotted path, text)``; lists become one line."""
+    if path and _NOISE.search(path):
+        return []
+    if isinstance(payload, dict):
+        return [
+            leaf
+            for key, value in payload.items()
+            for leaf in _leaves(value, f"{path}.{key}" if path else key)
+        ]
+    if isinstance(payload, list):
+        separator = " | " if any(isinstance(item, dict) for item in payload) else ", "
+        text = separator.join(filter(None, (_inline(item) for item in payload)))
+    elif payload is None:
+        return []
+    else:
+        text = _scalar(payload)
+    return [(path, text)] if text else []
+
+
+def _rank(path: str, ranks: tuple[str, ...]) -> int:
+    for index, prefix in enumerate(ranks):
+        if path == prefix or path.startswith(prefix + "."):
+            return index
+    return len(ranks)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of ``text`` at word boundaries, marking the cut."""
+    marker = " […] "
+    limit = max(max_tokens * CHARS_PER_TOKEN, len(marker) * 2)
+    if len(text) <= limit:
+        return text
+    head_chars = (limit - len(marker)) * 2 // 3
+    tail_chars = limit - len(marker) - head_chars
+    head = text[:head_chars].rsplit(" ", 1)[0]
+    tail = text[-tail_chars:].split(" ", 1)[-1] if tail_chars > 0 else ""
+    return f"{head}{marker}{tail}"
+
+
+@dataclass(frozen=True)
+class Prompt:
+    text: str
+    estimated_tokens: int
+    fields_kept: int
+    fields_dropped: int
+
+
+def build_prompt(task: AgentTask, budget_tokens: int, max_field_tokens: int) -> Prompt:
+    """Render the router's user prompt within ``budget_tokens``.
+
+    Payload fields are flattened to ``path: value`` lines, noise is dropped,
+    whitespace collapsed, and lines are added by per-source usefulness. Each
+    field is capped at ``max_field_tokens``; a field that no longer fits is
+    truncated into the remaining budget. ``budget_tokens`` of 0 renders the
+    full payload as indented JSON, as before.
+    """
+    header = (
+        f"Source: {task.source.value}\n"
+        f"Priority: {task.priority.value}\n"
+        f"Title: {task.title}\n"
+        f"External ID: {task.external_id}\n"
+    )
+    if budget_tokens <= 0:
+        text = header + f"Payload:\n{json.dumps(task.raw_payload, indent=2, default=str)}"
+        return Prompt(text, estimate_tokens(text), 0, 0)
+
+    ranks = FIELD_RANKS.get(task.source, ())
+    leaves = sorted(_leaves(task.raw_payload), key=lambda leaf: _rank(leaf[0], ranks))
+
+    lines: list[str] = []
+    remaining = budget_tokens - estimate_tokens(header) - 2
+    dropped = 0
+    for path, value in leaves:
+        line = f"{path}: {truncate(value, max_field_tokens)}"
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            if remaining < _MIN_TRUNCATED_TOKENS:
+                dropped += 1
+                continue
+            line = f"{path}: {truncate(value, remaining - estimate_tokens(path) - 1)}"
+            cost = estimate_tokens(line)
+        lines.append(line)
+        remaining -= cost
+
+    text = header + "Payload:\n" + "\n".join(lines)
+    if dropped:
+        text += f"\n({dropped} lower-ranked fields omitted)"
+    return Prompt(text, estimate_tokens(text), len(lines), dropped)
@@ -0,0 +1,56 @@
+import random
+
+import anthropic
+from kubernetes.client.rest import ApiException
+
+RETRY_QUEUE_PREFIX = "task.retry."
+
+
+class PermanentError(Exception):
+    """A failure that retrying the same message cannot fix."""
+
+
+def is_permanent(exc: BaseException) -> bool:
+    """Whether ``exc`` rejects the task itself rather than a struggling dependency.
+
+    Malformed messages, requests the Anthropic API refuses as invalid, and
+    manifests the Kubernetes API rejects as invalid fail the same way on
+    every attempt. Everything else (timeouts, 429/5xx, unparseable model
+    output, conflicts) is worth retrying later.
+    """
+    if isinstance(exc, (PermanentError, anthropic.BadRequestError)):
+        return True
+    if isinstance(exc, anthropic.UnprocessableEntityError):
+        return True
+    return isinstance(exc, ApiException) and exc.status in (400, 422)
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter over a ladder of delay queues.
+
+    Retry ``n`` waits ``base * 2**(n-1)`` seconds, capped at ``max_delay``,
+    in the delay queue for that step, then is dead-lettered back onto the
+    task exchange. Each message's expiration is jittered by ``±jitter`` of
+    the step; as RabbitMQ only expires messages at the head of a queue, one
+    queue per step keeps a message from waiting behind a longer delay.
+    """
+
+    def __init__(self, base: float, max_delay: float, jitter: float, max_retries: int) -> None:
+        self._base = base
+        self._max_delay = max_delay
+        self._jitter = jitter
+        self.steps = (
+            sorted({self.step(retry) for retry in range(1, max_retries)}) if base > 0 else []
+        )
+
+    def step(self, retry: int) -> float:
+        return min(self._base * 2 ** (retry - 1), self._max_delay)
+
+    @staticmethod
+    def queue(step: float) -> str:
+        return f"{RETRY_QUEUE_PREFIX}{step:g}s"
+
+    def delay(self, retry: int) -> tuple[str, float]:
+        """The delay queue for retry ``retry`` and this message's jittered delay."""
+        step = self.step(retry)
+        return self.queue(step), step * random.uniform(1 - self._jitter, 1 + self._jitter)
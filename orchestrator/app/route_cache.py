@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+import redis.asyncio as redis
+
+from app import metrics
+from app.config import settings
+from app.models import AgentTask, RouterPlan, Source
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "anton:route"
+_DECISION_FIELDS = {"template_id", "complexity", "required_skills"}
+
+# Leading "[Triggered]", "[P1]", "[Warn on host:web-1]" style markers.
+_TITLE_MARKERS = re.compile(r"^(\s*\[[^\]]*\])+\s*")
+# Numbers, hex ids and UUID-like tokens vary between otherwise identical titles.
+_VARIABLE = re.compile(r"\b(?:[0-9a-f]{8,}|[0-9a-f-]{36}|\d+(?:\.\d+)*)\b", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def _dig(payload: dict[str, Any], *path: str) -> Any:
+    for key in path:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload
+
+
+def subject_key(task: AgentTask) -> str:
+    """The thing a task is about: Sonar project, Datadog monitor or Jira project."""
+    payload = task.raw_payload
+    if task.source == Source.SONARCLOUD:
+        key = _dig(payload, "project", "key")
+    elif task.source == Source.JIRA:
+        key = _dig(payload, "issue", "fields", "project", "key") or task.external_id.split("-")[0]
+    else:
+        key = None
+    return str(key or task.external_id)
+
+
+def title_template(title: str) -> str:
+    title = _VARIABLE.sub("#", _TITLE_MARKERS.sub("", title))
+    return _SPACES.sub(" ", title).strip().lower()
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def summary_template(task: AgentTask, summary: str) -> str:
+    """``summary`` with ``task``'s title and external ID as placeholders.
+
+    A summary that mentions neither gets the title prefixed, so a task
+    rendered from it is still named.
+    """
+    template = _escape(summary)
+    if task.title:
+        template = template.replace(_escape(task.title), "{title}")
+    if task.external_id:
+        template = re.sub(
+            rf"(?<![\w-]){re.escape(_escape(task.external_id))}(?![\w-])",
+            "{external_id}",
+            template,
+        )
+    if "{title}" not in template and "{external_id}" not in template:
+        template = "{title}: " + template
+    return template
+
+
+def fingerprint(task: AgentTask) -> str:
+    content = f"{task.source.value}\0{subject_key(task)}\0{title_template(task.title)}"
+    return hashlib.blake2b(content.encode(), digest_size=12).hexdigest()
+
+
+class RouteCacheBackend(Protocol):
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryRouteCacheBackend:
+    """Per-process TTL cache with LRU eviction once ``max_entries`` is reached."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisRouteCacheBackend:
+    """Shared backend so replicas and restarts reuse each other's decisions.
+
+    Configure the Redis instance with an LRU ``maxmemory-policy`` to bound it.
+    """
+
+    def __init__(self, url: str) -> None:
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000))
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class RouteCache:
+    """Caches routing decisions by task fingerprint.
+
+    Re-triggers of the same Datadog monitor or quality gate failures of the
+    same Sonar project get the template, complexity and skills routed for
+    the first one. Its LLM-written context summary is kept as a template
+    (see ``summary_template``) and filled in with each hit's own title and
+    external ID. Backend errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self, backend: RouteCacheBackend, ttl: float, sources: set[Source]
+    ) -> None:
+        self._backend = backend
+        self._ttl = ttl
+        self._sources = sources
+
+    def handles(self, task: AgentTask) -> bool:
+        return self._ttl > 0 and task.source in self._sources
+
+    @staticmethod
+    def key(task: AgentTask) -> str:
+        return f"{KEY_PREFIX}:{task.source.value}:{fingerprint(task)}"
+
+    async def get(self, task: AgentTask) -> RouterPlan | None:
+        if not self.handles(task):
+            return None
+        try:
+            cached = await self._backend.get(self.key(task))
+            plan = None
+            if cached is not None:
+                decision = json.loads(cached)
+                summary = decision.pop("summary_template", "{title}").format_map(
+                    {"title": task.title, "external_id": task.external_id}
+                )
+                plan = RouterPlan.model_validate({**decision, "context_summary": summary})
+        except Exception as exc:
+            logger.warning(
+                "Route cache lookup failed",
+                extra={"task_id": str(task.task_id), "error": str(exc)},
+            )
+            plan = None
+        metrics.route_cache[task.source, "miss" if plan is None else "hit"].inc()
+        return plan
+
+    async def put(self, task: AgentTask, plan: RouterPlan) -> None:
+        if not self.handles(task):
+            return
+        decision = {
+            **plan.model_dump(mode="json", include=_DECISION_FIELDS),
+            "summary_template": summary_template(task, plan.context_summary),
+        }
+        try:
+            await self._backend.set(self.key(task), json.dumps(decision), self._ttl)
+        except Exception as exc:
+            logger.warning(
+                "Route cache store failed",
+                extra={"task_id": str(task.task_id), "error": str(exc)},
+            )
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+
+def create_route_cache() -> RouteCache:
+    backend: RouteCacheBackend
+    if settings.route_cache_redis_url:
+        backend = RedisRouteCacheBackend(settings.route_cache_redis_url)
+    else:
+        backend = MemoryRouteCacheBackend(settings.route_cache_max_entries)
+    sources = {
+        Source(name.strip())
+        for name in settings.route_cache_sources.split(",")
+        if name.strip()
+    }
+    logger.info(
+        "Route cache configured",
+        extra={
+            "backend": type(backend).__name__,
+            "ttl": settings.route_cache_ttl_seconds,
+            "sources": sorted(source.value for source in sources),
+        },
+    )
+    return RouteCache(backend, settings.route_cache_ttl_seconds, sources)
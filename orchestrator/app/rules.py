@@ -0,0 +1,133 @@
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from app import metrics
+from app.config import settings
+from app.models import AgentTask, RouterPlan, Source
+
+logger = logging.getLogger(__name__)
+
+
+def _values(payload: Any, path: list[str]) -> list[Any]:
+    """Values at a dotted path; a path through a list yields one value per item."""
+    if not path:
+        if isinstance(payload, list):
+            return [value for item in payload for value in _values(item, path)]
+        return [] if payload is None else [payload]
+    if isinstance(payload, list):
+        return [value for item in payload for value in _values(item, path)]
+    if isinstance(payload, dict) and path[0] in payload:
+        return _values(payload[path[0]], path[1:])
+    return []
+
+
+def _labels(task: AgentTask) -> set[str]:
+    """Jira labels and Datadog tags."""
+    if task.source == Source.JIRA:
+        return {str(label) for label in _values(task.raw_payload, ["issue", "fields", "labels"])}
+    tags = task.raw_payload.get("tags")
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if isinstance(tags, list):
+        return {str(tag).strip() for tag in tags if str(tag).strip()}
+    return set()
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A compiled routing rule; every condition it sets must hold."""
+
+    name: str
+    plan: dict[str, Any]
+    sources: frozenset[Source] = frozenset()
+    title: re.Pattern[str] | None = None
+    fields: tuple[tuple[list[str], re.Pattern[str]], ...] = ()
+    labels: frozenset[str] = frozenset()
+
+    def matches(self, task: AgentTask) -> bool:
+        if self.sources and task.source not in self.sources:
+            return False
+        if self.title is not None and not self.title.search(task.title):
+            return False
+        for path, pattern in self.fields:
+            if not any(pattern.fullmatch(str(value)) for value in _values(task.raw_payload, path)):
+                return False
+        return not self.labels or self.labels <= _labels(task)
+
+    def _render(self, values: dict[str, str]) -> RouterPlan:
+        summary = self.plan.get("context_summary", "{title}").format_map(values)
+        return RouterPlan.model_validate({**self.plan, "context_summary": summary})
+
+    def build_plan(self, task: AgentTask) -> RouterPlan:
+        return self._render(
+            {"title": task.title, "external_id": task.external_id, "source": task.source.value}
+        )
+
+    @classmethod
+    def compile(cls, spec: dict[str, Any]) -> "Rule":
+        name = spec.get("name")
+        if not name:
+            raise ValueError("Routing rule without a name")
+        try:
+            source = spec.get("source", [])
+            if isinstance(source, str):
+                source = [source]
+            sources = frozenset(Source(value) for value in source)
+            title = re.compile(spec["title"], re.IGNORECASE) if spec.get("title") else None
+            fields = tuple(
+                (path.split("."), re.compile(str(pattern)))
+                for path, pattern in (spec.get("match") or {}).items()
+            )
+            rule = cls(
+                name=name,
+                plan=dict(spec["plan"]),
+                sources=sources,
+                title=title,
+                fields=fields,
+                labels=frozenset(str(label) for label in spec.get("labels", [])),
+            )
+            # Fail at startup, not on the first matching task.
+            rule._render(dict.fromkeys(("title", "external_id", "source"), ""))
+        except (KeyError, ValueError, re.error) as exc:
+            raise ValueError(f"Invalid routing rule {name!r}: {exc}") from exc
+        return rule
+
+
+class RulesEngine:
+    """Routes mechanical tasks without the LLM: the first matching rule wins."""
+
+    def __init__(self, rules: list[Rule]) -> None:
+        self.rules = rules
+        self._matches = {rule.name: metrics.RULE_MATCHES.labels(rule.name) for rule in rules}
+
+    def route(self, task: AgentTask) -> tuple[Rule, RouterPlan] | None:
+        for rule in self.rules:
+            if rule.matches(task):
+                self._matches[rule.name].inc()
+                return rule, rule.build_plan(task)
+        return None
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RulesEngine":
+        document = yaml.safe_load(Path(path).read_text()) or {}
+        rules = [Rule.compile(spec) for spec in document.get("rules", [])]
+        names = [rule.name for rule in rules]
+        if len(names) != len(set(names)):
+            raise ValueError(f"Duplicate routing rule names in {path}")
+        return cls(rules)
+
+
+def create_rules_engine() -> RulesEngine:
+    if not settings.routing_rules_path:
+        return RulesEngine([])
+    engine = RulesEngine.load(settings.routing_rules_path)
+    logger.info(
+        "Routing rules loaded",
+        extra={"path": settings.routing_rules_path, "rules": len(engine.rules)},
+    )
+    return engine
@@ -0,0 +1,96 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app import metrics
+from app.models import MESSAGE_PRIORITY, AgentTask
+
+_TOP_PRIORITY = max(MESSAGE_PRIORITY.values())
+
+
+class SchedulerClosed(Exception):
+    """Raised to tasks still waiting for a slot when a stage is closed."""
+
+
+class PriorityLimiter:
+    """A concurrency limit whose waiters are served by priority, with aging.
+
+    Waiters are ordered by a virtual deadline: the task's ``created_at`` plus
+    ``aging`` seconds per priority level below P1. A P4 task therefore goes
+    ahead of a P1 task created more than three ``aging`` periods after it, so
+    low priorities are delayed under load but never starved. Ties go to the
+    older task.
+    """
+
+    def __init__(self, stage: str, limit: int, aging: float) -> None:
+        self._stage = stage
+        self._limit = limit
+        self._aging = aging
+        self._active = 0
+        self._waiters: list[tuple[float, float, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        self._closed = False
+        metrics.SCHEDULER_WAITING.labels(stage).set_function(lambda: len(self._waiters))
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _key(self, task: AgentTask) -> tuple[float, float]:
+        created = task.created_at.timestamp()
+        levels = _TOP_PRIORITY - MESSAGE_PRIORITY[task.priority]
+        return created + levels * self._aging, created
+
+    @asynccontextmanager
+    async def slot(self, task: AgentTask) -> AsyncIterator[None]:
+        await self._acquire(task)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, task: AgentTask) -> None:
+        if self._closed:
+            raise SchedulerClosed(self._stage)
+        started = time.monotonic()
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+        else:
+            granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (*self._key(task), next(self._order), granted))
+            try:
+                await granted
+            except asyncio.CancelledError:
+                # The slot may have been handed over just before cancellation.
+                if granted.done() and not granted.cancelled() and granted.exception() is None:
+                    self._release()
+                raise
+        metrics.queue_wait[self._stage, task.priority].observe(time.monotonic() - started)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter.
+        while self._waiters:
+            granted = heapq.heappop(self._waiters)[-1]
+            if not granted.done():
+                granted.set_result(None)
+                return
+        self._active -= 1
+
+    def close(self) -> None:
+        """Fail every waiter with ``SchedulerClosed`` and refuse new ones."""
+        self._closed = True
+        for *_, granted in self._waiters:
+            if not granted.done():
+                granted.set_exception(SchedulerClosed(self._stage))
+        self._waiters.clear()
+
+
+class Scheduler:
+    """Separate priority-ordered limits for the routing and dispatch stages."""
+
+    def __init__(self, route_limit: int, dispatch_limit: int, aging: float) -> None:
+        self.route = PriorityLimiter("route", route_limit, aging)
+        self.dispatch = PriorityLimiter("dispatch", dispatch_limit, aging)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from kubernetes import client as k8s_client
+
+logger = logging.getLogger(__name__)
+
+RUNNER_SELECTOR = "app=anton-runner"
+
+Listener = Callable[[str, dict[str, Any]], None]
+
+
+def job_finished(job: dict[str, Any]) -> bool:
+    conditions = (job.get("status") or {}).get("conditions") or []
+    return any(
+        condition.get("type") in ("Complete", "Failed") and condition.get("status") == "True"
+        for condition in conditions
+    )
+
+
+def job_labels(job: dict[str, Any]) -> dict[str, str]:
+    return job.get("metadata", {}).get("labels") or {}
+
+
+class JobWatcher:
+    """Live view of runner Jobs from a list + watch on ``app=anton-runner``.
+
+    The Kubernetes client is blocking, so the list/watch loop runs in its own
+    thread and hands events to the event loop, where ``jobs`` is updated and
+    listeners are called with ``(event type, raw job)``. After a relist, jobs
+    that disappeared are reported as ``DELETED``. Events are raw JSON; they
+    are never deserialized into client models.
+    """
+
+    def __init__(
+        self,
+        batch: k8s_client.BatchV1Api,
+        namespace: str,
+        timeout_seconds: int = 300,
+    ) -> None:
+        self._batch = batch
+        self._namespace = namespace
+        self._timeout_seconds = timeout_seconds
+        self._listeners: list[Listener] = []
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self.synced = asyncio.Event()
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._run, name="job-watch", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        # The thread notices at the next event or watch timeout; it is a daemon.
+        self._stopped.set()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            try:
+                self._watch(self._list())
+                backoff = 1.0
+            except Exception as exc:
+                if self._stopped.is_set():
+                    return
+                logger.warning("Job watch failed; relisting", extra={"error": str(exc)})
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _list(self) -> str:
+        response = self._batch.list_namespaced_job(
+            self._namespace, label_selector=RUNNER_SELECTOR, _preload_content=False
+        )
+        body = json.loads(response.data)
+        self._loop.call_soon_threadsafe(self._replace, body.get("items") or [])
+        return body["metadata"]["resourceVersion"]
+
+    def _watch(self, resource_version: str) -> None:
+        """Stream events until the watch expires (410) or the watcher stops."""
+        while not self._stopped.is_set():
+            response = self._batch.list_namespaced_job(
+                self._namespace,
+                label_selector=RUNNER_SELECTOR,
+                watch=True,
+                allow_watch_bookmarks=True,
+                resource_version=resource_version,
+                timeout_seconds=self._timeout_seconds,
+                _request_timeout=self._timeout_seconds + 10,
+                _preload_content=False,
+            )
+            try:
+                for line in response:
+                    if self._stopped.is_set():
+                        return
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    kind, job = event["type"], event["object"]
+                    if kind == "ERROR":
+                        if job.get("code") == 410:
+                            return
+                        raise RuntimeError(job.get("message", "watch error"))
+                    resource_version = job["metadata"]["resourceVersion"]
+                    if kind != "BOOKMARK":
+                        self._loop.call_soon_threadsafe(self._apply, kind, job)
+            finally:
+                response.release_conn()
+
+    def _replace(self, items: list[dict[str, Any]]) -> None:
+        current = {item["metadata"]["name"]: item for item in items}
+        for name in self.jobs.keys() - current.keys():
+            self._apply("DELETED", self.jobs[name])
+        for name, job in current.items():
+            self._apply("MODIFIED" if name in self.jobs else "ADDED", job)
+        if not self.synced.is_set():
+            logger.info("Job watch synced", extra={"jobs": len(current)})
+            self.synced.set()
+
+    def _apply(self, kind: str, job: dict[str, Any]) -> None:
+        name = job["metadata"]["name"]
+        if kind == "DELETED":
+            self.jobs.pop(name, None)
+        else:
+            self.jobs[name] = job
+        for listener in self._listeners:
+            try:
+                listener(kind, job)
+            except Exception:
+                logger.exception("Job watch listener failed", extra={"job": name})
@@ -0,0 +1,116 @@
+"""Benchmark batched LLM routing of low-priority tasks against a fake LLM.
+
+Routes a stream of P4 tasks through the real ``TaskRouter`` (rules and cache
+disabled) against ``benchmarks.fake_llm``, once with immediate routing and
+once with batching, and reports LLM calls saved and the latency added.
+Tasks waiting for a batch hold a consumer slot, so arrival rates near the
+consumer's capacity show the throughput cost too::
+
+    uv run python -m benchmarks.batching --tasks 200 --rate 4 --window-ms 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.brain import TaskRouter
+from app.config import settings
+from app.models import AgentTask, Priority, Source
+from app.rules import RulesEngine
+from benchmarks.fake_llm import FakeLLM
+
+TITLES = (
+    "NullPointerException in Spring order service",
+    "React checkout button misaligned on mobile",
+    "Django migration fails on payments table",
+    "Investigate flaky nightly build",
+)
+
+
+def _task(i: int) -> AgentTask:
+    return AgentTask(
+        task_id=uuid.uuid4(),
+        source=Source.JIRA,
+        external_id=f"BENCH-{i}",
+        title=f"{random.choice(TITLES)} #{i}",
+        priority=Priority.P4,
+        raw_payload={"issue": {"fields": {"description": "Details " * 40}}},
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+async def _run(window_ms: float, args: argparse.Namespace) -> tuple[FakeLLM, list[float]]:
+    fake = FakeLLM(args.latency_ms / 1000, args.per_task_ms / 1000)
+    server = await fake.start()
+    settings.anthropic_base_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    settings.route_cache_ttl_seconds = 0
+    settings.router_batch_window_ms = window_ms
+    settings.router_batch_max_tasks = args.max_batch
+    router = TaskRouter(rules=RulesEngine([]))
+
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def consume(task: AgentTask) -> None:
+        arrived = time.perf_counter()
+        async with slots:
+            await router.route(task)
+        latencies.append(time.perf_counter() - arrived)
+
+    random.seed(1)
+    consumers = []
+    for i in range(args.tasks):
+        consumers.append(asyncio.create_task(consume(_task(i))))
+        await asyncio.sleep(random.expovariate(args.rate))
+    await asyncio.gather(*consumers)
+
+    await router.close()
+    server.close()
+    await server.wait_closed()
+    return fake, latencies
+
+
+def _report(name: str, fake: FakeLLM, latencies: list[float]) -> float:
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    mean = statistics.mean(latencies)
+    print(
+        f"{name:>9}: {fake.calls:>5} LLM calls  {fake.tasks / fake.calls:>5.1f} tasks/call  "
+        f"mean={mean * 1000:>7.0f}ms  p95={p95 * 1000:>7.0f}ms"
+    )
+    return mean
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=4.0, help="Task arrivals per second")
+    parser.add_argument("--concurrency", type=int, default=settings.route_concurrency)
+    parser.add_argument("--window-ms", type=float, default=settings.router_batch_window_ms)
+    parser.add_argument("--max-batch", type=int, default=settings.router_batch_max_tasks)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Fake LLM base latency")
+    parser.add_argument("--per-task-ms", type=float, default=100.0, help="Fake LLM latency per task")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    immediate = asyncio.run(_run(0, args))
+    batched = asyncio.run(_run(args.window_ms, args))
+    base = _report("immediate", *immediate)
+    mean = _report("batched", *batched)
+    saved = immediate[0].calls - batched[0].calls
+    print(
+        f"calls saved: {saved} ({saved / immediate[0].calls:.0%}), "
+        f"added mean latency: {(mean - base) * 1000:+.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
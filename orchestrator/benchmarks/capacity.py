@@ -0,0 +1,189 @@
+"""Job capacity benchmark: a Sonar burst with P1 fixes, against a fake K8s API.
+
+Runs the real ``Consumer`` and ``JobManager`` (with its Job watcher and
+capacity caps) against ``benchmarks.fake_k8s``, fed from an in-process
+priority broker that honours the prefetch window. A burst of P4 Sonar
+tasks arrives at once, then P1 Jira tasks trickle in. Each run reports the
+most runner Jobs active at once and how long each priority waited from
+task creation to Job creation; with caps the peak stays at the cap while P1
+tasks still get the next free slot::
+
+    uv run python -m benchmarks.capacity
+    uv run python -m benchmarks.capacity --burst 300 --max-active 10 \
+        --template-limits java-backend=4
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import logging
+import statistics
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+from kubernetes import client as k8s_client
+
+from app.config import settings
+from app.consumer import Consumer
+from app.dispatcher import JobManager
+from app.models import (
+    MESSAGE_PRIORITY,
+    AgentTask,
+    Complexity,
+    Priority,
+    RouterPlan,
+    Source,
+    TemplateId,
+)
+from benchmarks.consumer import StandInMessage
+from benchmarks.fake_k8s import FakeKubernetes
+
+
+class StandInRouter:
+    """Sonar tasks go to java-backend, everything else to python-backend."""
+
+    breaker = None
+
+    def __init__(self, latency: float) -> None:
+        self._latency = latency
+
+    async def route(self, task: AgentTask) -> RouterPlan:
+        await asyncio.sleep(self._latency)
+        template = TemplateId.PYTHON_BACKEND
+        if task.source == Source.SONARCLOUD:
+            template = TemplateId.JAVA_BACKEND
+        return RouterPlan(
+            template_id=template, complexity=Complexity.LOW, context_summary=task.title
+        )
+
+    async def close(self) -> None:
+        pass
+
+
+class PriorityBroker:
+    """Delivers the highest-priority ready message, at most ``prefetch`` unacked."""
+
+    def __init__(self, prefetch: int) -> None:
+        self._callback: Callable[[StandInMessage], Awaitable[None]] | None = None
+        self._window = asyncio.Semaphore(prefetch)
+        self._ready: list[tuple[int, int, bytes]] = []
+        self._order = itertools.count()
+        self._available = asyncio.Event()
+        self._deliveries: set[asyncio.Task[None]] = set()
+        self.outcomes: dict[str, int] = {"acked": 0, "nacked": 0, "requeued": 0}
+
+    def publish(self, task: AgentTask) -> None:
+        body = task.model_dump_json().encode()
+        heapq.heappush(self._ready, (-MESSAGE_PRIORITY[task.priority], next(self._order), body))
+        self._available.set()
+
+    async def consume(self, callback: Callable[[StandInMessage], Awaitable[None]]) -> str:
+        self._callback = callback
+        return "capacity"
+
+    async def cancel(self, consumer_tag: str) -> None:
+        self._callback = None
+
+    def settle(self, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        self._window.release()
+
+    async def run(self) -> None:
+        while True:
+            await self._window.acquire()
+            while not self._ready:
+                self._available.clear()
+                await self._available.wait()
+            *_, body = heapq.heappop(self._ready)
+            assert self._callback is not None
+            delivery = asyncio.create_task(self._callback(StandInMessage(self, body)))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+
+def _task(source: Source, priority: Priority, index: int) -> AgentTask:
+    return AgentTask(
+        task_id=uuid.uuid4(),
+        source=source,
+        external_id=f"BENCH-{index}",
+        title=f"Benchmark task {index}",
+        priority=priority,
+        raw_payload={},
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+async def _run(args: argparse.Namespace, max_active: int) -> None:
+    fake = FakeKubernetes(start_delay=args.start_delay, duration=args.job_seconds)
+    server = await fake.start()
+    configuration = k8s_client.Configuration()
+    configuration.host = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    settings.job_max_active = max_active
+    settings.job_template_limits = args.template_limits if max_active else ""
+    consumer = Consumer(
+        router=StandInRouter(args.route_ms / 1000),
+        dispatcher=JobManager(configuration),
+    )
+    broker = PriorityBroker(args.prefetch)
+    await consumer.start(broker)
+    delivering = asyncio.create_task(broker.run())
+
+    started = time.monotonic()
+    tasks = [_task(Source.SONARCLOUD, Priority.P4, i) for i in range(args.burst)]
+    for task in tasks:
+        broker.publish(task)
+    for i in range(args.p1):
+        await asyncio.sleep(args.p1_interval)
+        task = _task(Source.JIRA, Priority.P1, i)
+        tasks.append(task)
+        broker.publish(task)
+    while len(fake.created) < len(tasks):
+        await asyncio.sleep(0.1)
+    elapsed = time.monotonic() - started
+
+    delivering.cancel()
+    await consumer.shutdown()
+    fake.close()
+    server.close()
+
+    waits: dict[Priority, list[float]] = {Priority.P1: [], Priority.P4: []}
+    for task in tasks:
+        created = fake.created[f"agent-job-{task.task_id}"]
+        waits[task.priority].append(created - task.created_at.timestamp())
+    caps = f"max_active={max_active or 'off'}"
+    if max_active and args.template_limits:
+        caps += f" ({args.template_limits})"
+    print(f"{caps}: {len(tasks)} jobs in {elapsed:.1f}s, peak active={fake.max_active}")
+    for priority, values in waits.items():
+        print(
+            f"  {priority.value} wait: mean={statistics.mean(values):6.2f}s  "
+            f"max={max(values):6.2f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=120, help="P4 Sonar tasks at once")
+    parser.add_argument("--p1", type=int, default=5, help="P1 tasks arriving after the burst")
+    parser.add_argument("--p1-interval", type=float, default=1.0)
+    parser.add_argument("--max-active", type=int, nargs="+", default=[0, 20])
+    parser.add_argument("--template-limits", default="java-backend=15")
+    parser.add_argument("--prefetch", type=int, default=32)
+    parser.add_argument("--route-ms", type=float, default=50.0, help="Stand-in LLM latency")
+    parser.add_argument("--start-delay", type=float, default=0.2, help="Seconds until a Job runs")
+    parser.add_argument("--job-seconds", type=float, default=2.0, help="Seconds a Job runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    settings.job_admission_max_wait_seconds = 0
+    for max_active in args.max_active:
+        asyncio.run(_run(args, max_active))
+
+
+if __name__ == "__main__":
+    main()
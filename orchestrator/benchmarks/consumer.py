@@ -0,0 +1,174 @@
+"""Throughput benchmark for the Consumer's concurrent task processing.
+
+Feeds the real ``Consumer._on_message`` from an in-process stand-in broker
+that honours the prefetch window, with stand-in router and dispatcher
+latencies (an LLM call and the Kubernetes round trip). ``--concurrency``
+sets both stage limits; throughput should scale near-linearly with it::
+
+    uv run python -m benchmarks.consumer
+    uv run python -m benchmarks.consumer --concurrency 1 4 16 --route-ms 500
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+from app.capacity import JobCapacity
+from app.config import settings
+from app.consumer import Consumer
+from app.inflight import InFlightIndex
+from app.models import AgentTask, Complexity, Priority, RouterPlan, Source, TemplateId
+
+
+class StandInRouter:
+    breaker = None
+
+    def __init__(self, latency: float) -> None:
+        self._latency = latency
+
+    async def route(self, task: AgentTask) -> RouterPlan:
+        await asyncio.sleep(self._latency)
+        return RouterPlan(
+            template_id=TemplateId.PYTHON_BACKEND,
+            complexity=Complexity.LOW,
+            context_summary=task.title,
+        )
+
+    async def close(self) -> None:
+        pass
+
+
+class StandInDispatcher:
+    def __init__(self, latency: float) -> None:
+        self._latency = latency
+        self.capacity = JobCapacity(None, 0, {}, 0, 0)
+        self.inflight = InFlightIndex(None, {}, self.supersede)
+
+    async def start(self) -> None:
+        pass
+
+    async def supersede(self, task_id: str) -> None:
+        pass
+
+    async def create_job(
+        self, task_id: str, plan: RouterPlan, original_task: AgentTask
+    ) -> str:
+        await asyncio.sleep(self._latency)
+        return f"agent-job-{task_id}"
+
+    def close(self) -> None:
+        pass
+
+
+class StandInMessage:
+    def __init__(self, broker: "StandInBroker", body: bytes) -> None:
+        self._broker = broker
+        self.body = body
+        self.headers: dict = {}
+        self.priority = 2
+
+    async def ack(self) -> None:
+        self._broker.settle("acked")
+
+    async def nack(self, requeue: bool = True) -> None:
+        self._broker.settle("requeued" if requeue else "nacked")
+
+
+class StandInBroker:
+    """Delivers messages one task per delivery, at most ``prefetch`` unacked."""
+
+    def __init__(self, bodies: list[bytes], prefetch: int) -> None:
+        self._callback: Callable[[StandInMessage], Awaitable[None]] | None = None
+        self._bodies = bodies
+        self._window = asyncio.Semaphore(prefetch)
+        self._settled = 0
+        self._done = asyncio.Event()
+        self.outcomes: dict[str, int] = {"acked": 0, "nacked": 0, "requeued": 0}
+
+    async def consume(self, callback: Callable[[StandInMessage], Awaitable[None]]) -> str:
+        self._callback = callback
+        return "consumer"
+
+    async def cancel(self, consumer_tag: str) -> None:
+        self._callback = None
+
+    def settle(self, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        self._settled += 1
+        self._window.release()
+        if self._settled == len(self._bodies):
+            self._done.set()
+
+    async def run(self) -> None:
+        assert self._callback is not None
+        deliveries = set()
+        for body in self._bodies:
+            await self._window.acquire()
+            delivery = asyncio.create_task(self._callback(StandInMessage(self, body)))
+            deliveries.add(delivery)
+            delivery.add_done_callback(deliveries.discard)
+        await self._done.wait()
+
+
+def _bodies(count: int) -> list[bytes]:
+    return [
+        AgentTask(
+            task_id=uuid.uuid4(),
+            source=Source.JIRA,
+            external_id=f"BENCH-{i}",
+            title=f"Benchmark task {i}",
+            priority=Priority.P3,
+            raw_payload={},
+            created_at=datetime.now(timezone.utc),
+        )
+        .model_dump_json()
+        .encode()
+        for i in range(count)
+    ]
+
+
+async def _run(concurrency: int, args: argparse.Namespace) -> tuple[float, int, dict[str, int]]:
+    settings.route_concurrency = settings.dispatch_concurrency = concurrency
+    prefetch = args.prefetch or concurrency * 2
+    consumer = Consumer(
+        router=StandInRouter(args.route_ms / 1000),
+        dispatcher=StandInDispatcher(args.dispatch_ms / 1000),
+    )
+    broker = StandInBroker(_bodies(args.messages), prefetch)
+    await consumer.start(broker)
+
+    started = time.perf_counter()
+    await broker.run()
+    elapsed = time.perf_counter() - started
+
+    return args.messages / elapsed, prefetch, broker.outcomes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--prefetch", type=int, default=0, help="Default: 2x concurrency")
+    parser.add_argument("--route-ms", type=float, default=200.0, help="Stand-in LLM latency")
+    parser.add_argument("--dispatch-ms", type=float, default=20.0, help="Stand-in K8s latency")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    baseline = None
+    for concurrency in args.concurrency:
+        rate, prefetch, outcomes = asyncio.run(_run(concurrency, args))
+        baseline = baseline or rate / concurrency
+        print(
+            f"concurrency={concurrency:>3} prefetch={prefetch:>3}: {rate:>8.1f} tasks/s  "
+            f"scaling={rate / (baseline * concurrency):>4.0%}  "
+            f"acked={outcomes['acked']} nacked={outcomes['nacked']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
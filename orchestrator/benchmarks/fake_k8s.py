@@ -0,0 +1,312 @@
+"""Local stand-in for the Kubernetes API used by the orchestrator.
+
+Serves ConfigMaps and Jobs (create, get, list by label selector, delete)
+and Job watches (``watch=true``, chunked JSON events with resource versions
+and ``410 Gone`` for expired ones). Created Jobs start after ``start_delay``
+and complete after ``duration``, failing a configurable share; finished
+Jobs are deleted after ``ttl`` if set. ``created`` (Job name to creation
+time) and ``max_active`` (most unfinished Jobs at once) record what the
+orchestrator did. Point the orchestrator at it with a kubeconfig whose
+server is the fake's address (see ``kubeconfig``)::
+
+    uv run python -m benchmarks.fake_k8s --port 18080 --duration 30
+    KUBECONFIG=fake-kubeconfig uv run python -m app.main
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import time
+import json
+import logging
+import random
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+_PATH = re.compile(
+    r"^/(?:api/v1|apis/batch/v1)/namespaces/(?P<namespace>[^/]+)/"
+    r"(?P<kind>configmaps|jobs)(?:/(?P<name>[^/]+))?$"
+)
+_KINDS = {"configmaps": ("v1", "ConfigMap"), "jobs": ("batch/v1", "Job")}
+_REASONS = {200: "OK", 201: "Created", 404: "Not Found", 409: "Conflict", 410: "Gone"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _status(code: int, reason: str, message: str) -> dict:
+    return {
+        "kind": "Status",
+        "apiVersion": "v1",
+        "metadata": {},
+        "status": "Failure",
+        "message": message,
+        "reason": reason,
+        "code": code,
+    }
+
+
+def _selected(obj: dict, selector: str) -> bool:
+    labels = obj["metadata"].get("labels") or {}
+    for term in filter(None, selector.split(",")):
+        key, _, value = term.partition("=")
+        if labels.get(key) != value:
+            return False
+    return True
+
+
+@dataclass
+class FakeKubernetes:
+    start_delay: float = 0.5
+    duration: float = 5.0
+    failure_rate: float = 0.0
+    ttl: float | None = None
+    history_limit: int = 10_000
+    objects: dict[tuple[str, str, str], dict] = field(default_factory=dict)
+    created: dict[str, float] = field(default_factory=dict)
+    max_active: int = 0
+    _versions: itertools.count = field(default_factory=lambda: itertools.count(1))
+    _events: list[tuple[int, str, dict]] = field(default_factory=list)
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    _timers: set[asyncio.TimerHandle] = field(default_factory=set)
+
+    @property
+    def resource_version(self) -> int:
+        return self._events[-1][0] if self._events else 0
+
+    def active_jobs(self) -> list[dict]:
+        return [
+            obj
+            for (kind, _, _), obj in self.objects.items()
+            if kind == "jobs" and not obj["status"].get("conditions")
+        ]
+
+    def _record(self, kind: str, event: str, obj: dict) -> None:
+        version = next(self._versions)
+        obj["metadata"]["resourceVersion"] = str(version)
+        if kind == "jobs":
+            self._events.append((version, event, json.loads(json.dumps(obj))))
+            del self._events[: -self.history_limit]
+            self.max_active = max(self.max_active, len(self.active_jobs()))
+            asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _later(self, delay: float, callback, *args) -> None:
+        handle = asyncio.get_running_loop().call_later(delay, callback, *args)
+        self._timers.add(handle)
+
+    def create(self, kind: str, namespace: str, body: dict) -> tuple[int, dict]:
+        name = body["metadata"]["name"]
+        key = (kind, namespace, name)
+        if key in self.objects:
+            return 409, _status(409, "AlreadyExists", f'{kind} "{name}" already exists')
+        api_version, type_name = _KINDS[kind]
+        obj = {**body, "apiVersion": api_version, "kind": type_name}
+        obj["metadata"] = {
+            **body["metadata"],
+            "namespace": namespace,
+            "uid": str(uuid.uuid4()),
+            "creationTimestamp": _now(),
+        }
+        if kind == "jobs":
+            obj["status"] = {}
+            self.created[name] = time.time()
+            self._later(self.start_delay, self._start_job, key)
+        self.objects[key] = obj
+        self._record(kind, "ADDED", obj)
+        return 201, obj
+
+    def _start_job(self, key: tuple[str, str, str]) -> None:
+        job = self.objects.get(key)
+        if job is None:
+            return
+        job["status"] = {"active": 1, "startTime": _now()}
+        self._record("jobs", "MODIFIED", job)
+        self._later(self.duration, self._finish_job, key)
+
+    def _finish_job(self, key: tuple[str, str, str]) -> None:
+        job = self.objects.get(key)
+        if job is None:
+            return
+        failed = random.random() < self.failure_rate
+        now = _now()
+        condition = {
+            "type": "Failed" if failed else "Complete",
+            "status": "True",
+            "lastProbeTime": now,
+            "lastTransitionTime": now,
+        }
+        job["status"] = {
+            "startTime": job["status"].get("startTime", now),
+            "conditions": [condition],
+            **({"failed": 1} if failed else {"succeeded": 1, "completionTime": now}),
+        }
+        self._record("jobs", "MODIFIED", job)
+        if self.ttl is not None:
+            self._later(self.ttl, self.delete, *key)
+
+    def delete(self, kind: str, namespace: str, name: str) -> tuple[int, dict]:
+        obj = self.objects.pop((kind, namespace, name), None)
+        if obj is None:
+            return 404, _status(404, "NotFound", f'{kind} "{name}" not found')
+        self._record(kind, "DELETED", obj)
+        return 200, obj
+
+    def list(self, kind: str, namespace: str, selector: str) -> dict:
+        api_version, type_name = _KINDS[kind]
+        items = [
+            obj
+            for (obj_kind, obj_namespace, _), obj in self.objects.items()
+            if obj_kind == kind and obj_namespace == namespace and _selected(obj, selector)
+        ]
+        return {
+            "apiVersion": api_version,
+            "kind": f"{type_name}List",
+            "metadata": {"resourceVersion": str(self.resource_version)},
+            "items": items,
+        }
+
+    async def _watch(
+        self, writer: asyncio.StreamWriter, namespace: str, query: dict[str, str]
+    ) -> None:
+        selector = query.get("labelSelector", "")
+        since = int(query.get("resourceVersion") or self.resource_version)
+        timeout = float(query.get("timeoutSeconds", 300))
+        writer.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b"transfer-encoding: chunked\r\n\r\n"
+        )
+
+        def send(event: dict) -> None:
+            data = json.dumps(event).encode() + b"\n"
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        deadline = asyncio.get_running_loop().time() + timeout
+        if self._events and since < self._events[0][0] - 1:
+            send({"type": "ERROR", "object": _status(410, "Expired", "too old resource version")})
+        else:
+            while (remaining := deadline - asyncio.get_running_loop().time()) > 0:
+                start = bisect.bisect_right(self._events, since, key=lambda entry: entry[0])
+                for version, event, obj in self._events[start:]:
+                    since = version
+                    if obj["metadata"]["namespace"] == namespace and _selected(obj, selector):
+                        send({"type": event, "object": obj})
+                await writer.drain()
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                method, target, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                url = urlsplit(target)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                match = _PATH.match(url.path)
+                if match is None:
+                    status, payload = 404, _status(404, "NotFound", url.path)
+                else:
+                    kind, namespace, name = match["kind"], match["namespace"], match["name"]
+                    watch = query.get("watch", "").lower() in ("true", "1")
+                    if method == "GET" and name is None and watch:
+                        await self._watch(writer, namespace, query)
+                        continue
+                    if method == "POST" and name is None:
+                        status, payload = self.create(kind, namespace, json.loads(body))
+                    elif method == "DELETE" and name is not None:
+                        status, payload = self.delete(kind, namespace, name)
+                    elif method == "GET" and name is None:
+                        status, payload = 200, self.list(
+                            kind, namespace, query.get("labelSelector", "")
+                        )
+                    elif method == "GET" and (kind, namespace, name) in self.objects:
+                        status, payload = 200, self.objects[kind, namespace, name]
+                    else:
+                        status, payload = 404, _status(404, "NotFound", url.path)
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'Fake')}\r\n"
+                    f"content-type: application/json\r\ncontent-length: {len(data)}\r\n\r\n"
+                    .encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cancelled when the loop shuts down with watches still open.
+            return
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Start serving; the bound port is ``server.sockets[0].getsockname()[1]``."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self) -> None:
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+
+
+def kubeconfig(port: int, host: str = "127.0.0.1") -> str:
+    """A kubeconfig document pointing at a fake listening on ``host:port``."""
+    return json.dumps(
+        {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": "fake", "cluster": {"server": f"http://{host}:{port}"}}],
+            "users": [{"name": "fake", "user": {"token": "fake"}}],
+            "contexts": [{"name": "fake", "context": {"cluster": "fake", "user": "fake"}}],
+            "current-context": "fake",
+        }
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    fake = FakeKubernetes(args.start_delay, args.duration, args.failure_rate, args.ttl)
+    server = await fake.start(args.host, args.port)
+    logger.warning("Fake Kubernetes API listening on %s:%s", args.host, args.port)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--start-delay", type=float, default=0.5, help="Seconds until a Job runs")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds a Job runs")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of Jobs that fail")
+    parser.add_argument(
+        "--ttl", type=float, default=None, help="Seconds until finished Jobs are deleted"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
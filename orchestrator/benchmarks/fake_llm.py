@@ -0,0 +1,158 @@
+"""Local stand-in for the Anthropic Messages API.
+
+Answers ``POST /v1/messages`` with router plans after a configurable
+latency, and fails a configurable share of calls with 429 or 529. Single-
+task prompts get one plan; batch prompts (``### Task <id>`` sections) get a
+plan per task id. Point the orchestrator at it with ``ANTHROPIC_BASE_URL``::
+
+    uv run python -m benchmarks.fake_llm --port 8089 --latency-ms 800
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089 uv run python -m app.main
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+from dataclasses import dataclass, field
+
+from app.models import Complexity, TemplateId
+
+logger = logging.getLogger(__name__)
+
+_TASK_HEADER = re.compile(r"^### Task (\S+)$", re.MULTILINE)
+_KEYWORDS = {
+    TemplateId.JAVA_BACKEND: ("java", "spring", "jvm", "kotlin"),
+    TemplateId.REACT_FRONTEND: ("react", "frontend", "css", "button", "ui"),
+    TemplateId.PYTHON_BACKEND: ("python", "django", "api", "backend", "sql"),
+}
+
+
+def _plan(text: str) -> dict:
+    lowered = text.lower()
+    template = next(
+        (
+            template
+            for template, words in _KEYWORDS.items()
+            if any(word in lowered for word in words)
+        ),
+        TemplateId.GENERAL_RESEARCH,
+    )
+    complexity = list(Complexity)[hashlib.blake2b(text.encode(), digest_size=1).digest()[0] % 3]
+    title = next((line[7:] for line in text.splitlines() if line.startswith("Title: ")), "")
+    return {
+        "template_id": template.value,
+        "complexity": complexity.value,
+        "required_skills": [],
+        "context_summary": title or text[:80],
+    }
+
+
+@dataclass
+class FakeLLM:
+    latency: float = 0.5
+    per_task_latency: float = 0.05
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    tasks: int = 0
+    batch_sizes: list[int] = field(default_factory=list)
+
+    def answer(self, request: dict) -> tuple[int, dict, float]:
+        """Return (status, body, delay) for one Messages API request."""
+        self.calls += 1
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            status = random.choice((429, 529))
+            kind = "rate_limit_error" if status == 429 else "overloaded_error"
+            return status, {"type": "error", "error": {"type": kind, "message": "fake"}}, 0.01
+
+        content = request["messages"][-1]["content"]
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content)
+        sections = _TASK_HEADER.split(content)
+        if len(sections) > 1:
+            # ["", id1, body1, id2, body2, ...]
+            answer = {
+                task_id: _plan(body) for task_id, body in zip(sections[1::2], sections[2::2])
+            }
+            count = len(answer)
+        else:
+            answer, count = _plan(content), 1
+        self.tasks += count
+        self.batch_sizes.append(count)
+
+        text = json.dumps(answer)
+        body = {
+            "id": f"msg_fake_{self.calls}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(content) // 4 + 1, "output_tokens": len(text) // 4 + 1},
+        }
+        return 200, body, self.latency + self.per_task_latency * count
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                if not request_line.split()[1].startswith(b"/v1/messages"):
+                    error = {"type": "not_found_error", "message": "fake"}
+                    status, payload, delay = 404, {"type": "error", "error": error}, 0.0
+                else:
+                    status, payload, delay = self.answer(json.loads(body))
+                await asyncio.sleep(delay)
+
+                data = json.dumps(payload).encode()
+                extra = "retry-after: 1\r\n" if status == 429 else ""
+                writer.write(
+                    f"HTTP/1.1 {status} Fake\r\ncontent-type: application/json\r\n"
+                    f"content-length: {len(data)}\r\n{extra}\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Start serving; the bound port is ``server.sockets[0].getsockname()[1]``."""
+        return await asyncio.start_server(self._handle, host, port)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    fake = FakeLLM(args.latency_ms / 1000, args.per_task_ms / 1000, args.error_rate)
+    server = await fake.start(args.host, args.port)
+    logger.warning("Fake LLM listening on %s:%s", args.host, args.port)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--per-task-ms", type=float, default=50.0, help="Added per task in a batch")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered 429/529")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Job manifest benchmark: Jinja render and YAML parse per Job vs the cached skeleton.
+
+Builds the runner Job manifest for every template and complexity, both the
+old way (render ``base_job.yaml.j2`` and ``yaml.safe_load`` it) and with
+``JobTemplate``, checks they agree, and reports the cost per manifest::
+
+    uv run python -m benchmarks.job_manifest
+    uv run python -m benchmarks.job_manifest --profiles profiles.example.yaml
+"""
+
+import argparse
+import itertools
+import time
+
+import yaml
+from jinja2 import Environment, FileSystemLoader
+
+from app.config import settings
+from app.dispatcher import TEMPLATES_DIR
+from app.job_template import JobTemplate
+from app.models import Complexity, TemplateId
+from app.profiles import DEFAULT_PROFILES, ProfileTable
+
+
+def _values(profiles: ProfileTable, index: int) -> dict:
+    template, complexity = list(itertools.product(TemplateId, Complexity))[index % 12]
+    profile = profiles.get(template.value, complexity.value)
+    task_id = f"00000000-0000-0000-0000-{index:012d}"
+    return {
+        "job_name": f"agent-job-{task_id}",
+        "namespace": settings.k8s_namespace,
+        "task_id": task_id,
+        "template_id": template.value,
+        "complexity": complexity.value,
+        "source": "jira",
+        "work_key": f"{index:020x}",
+        "external_id": f"PROJ-{index}",
+        "traceparent": f"00-{index:032x}-{index:016x}-01",
+        "otlp_endpoint": "",
+        "dispatched_at": str(1_700_000_000_000_000_000 + index),
+        "configmap_name": f"agent-ctx-{task_id}",
+        "image": profile.image,
+        "resources": profile.resources,
+        "active_deadline_seconds": profile.active_deadline_seconds,
+        "node_selector": profile.node_selector,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--profiles", help="Job profiles YAML (default: built-in)")
+    args = parser.parse_args()
+
+    profiles = (
+        ProfileTable.load(args.profiles, settings.agent_image)
+        if args.profiles
+        else ProfileTable(DEFAULT_PROFILES, settings.agent_image)
+    )
+    environment = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), autoescape=False)
+    values = [_values(profiles, index) for index in range(args.jobs)]
+
+    started = time.perf_counter()
+    job_template = JobTemplate(environment, "base_job.yaml.j2")
+    load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    template = environment.get_template("base_job.yaml.j2")
+    parsed = [yaml.safe_load(template.render(**job)) for job in values]
+    per_job = (time.perf_counter() - started) / args.jobs
+
+    started = time.perf_counter()
+    cached = [job_template.render(**job) for job in values]
+    per_job_cached = (time.perf_counter() - started) / args.jobs
+
+    assert parsed == cached, "cached skeleton disagrees with render + safe_load"
+    print(f"{args.jobs} manifests, identical: yes")
+    print(f"  render + safe_load: {per_job * 1e6:8.1f} us/job")
+    print(
+        f"  cached skeleton:    {per_job_cached * 1e6:8.1f} us/job "
+        f"({per_job / per_job_cached:.0f}x, one-off load {load * 1000:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""End-to-end pipeline benchmark: webhooks to runner Jobs, without external services.
+
+Runs the real ingester (``benchmarks.serve`` from ../ingester, in a
+subprocess) and, in this process, the real ``Consumer``, ``TaskRouter`` and
+``JobManager``, wired to local stand-ins: an in-memory priority broker
+(prefetch window, delay queues for retries and deferred tasks, consumer
+cancel and resume for the LLM circuit breaker), ``benchmarks.fake_llm`` and
+``benchmarks.fake_k8s``. Webhooks are replayed from a JSON lines file
+(``{"source": "jira", "payload": {...}, "at": 1.5}``, ``at`` in seconds from
+the start and optional) or generated as a storm arriving at ``--rate``. The
+report gives p50/p95/p99 per stage, from the pipeline's own trace spans, and
+the sustained throughput. The ingester reads its other settings (admission
+control, dedup windows) from the environment as usual::
+
+    uv run python -m benchmarks.pipeline --events 500 --rate 50
+    uv run python -m benchmarks.pipeline --replay webhooks.jsonl --llm-error-rate 0.1
+    ADMISSION_ENABLED=false uv run python -m benchmarks.pipeline --events 2000 --rate 200 \
+        --ingester-python ../ingester/.venv/bin/python
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import sys
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import aio_pika
+import httpx
+from kubernetes import client as k8s_client
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.config import settings
+from app.consumer import DLQ_EXCHANGE, ROUTING_KEY, Consumer
+from app.dispatcher import JobManager
+from app.models import MESSAGE_PRIORITY, Priority, Source
+from benchmarks.fake_k8s import FakeKubernetes
+from benchmarks.fake_llm import FakeLLM
+
+INGESTER_DIR = Path(__file__).resolve().parents[2] / "ingester"
+WEBHOOK_SECRET = "pipeline-benchmark"
+PATHS = {Source.JIRA: "jira", Source.DATADOG: "datadog", Source.SONARCLOUD: "sonar"}
+# Orchestrator spans reported per stage, in pipeline order.
+STAGES = ("queue wait", "process task", "route", "llm route", "dispatch", "k8s dispatch")
+
+TITLES = (
+    "NullPointerException in Spring order service",
+    "React checkout button misaligned on mobile",
+    "Django migration fails on payments table",
+    "Investigate flaky nightly build",
+)
+ALERTS = ("High error rate", "Latency above SLO", "Pod restarts", "Disk almost full")
+
+Event = tuple[float | None, Source, bytes]
+
+
+class BrokerMessage:
+    """A delivered message, as the Consumer sees it."""
+
+    def __init__(
+        self, broker: "InMemoryBroker", body: bytes, headers: dict, priority: int
+    ) -> None:
+        self._broker = broker
+        self.body = body
+        self.headers = headers
+        self.priority = priority
+
+    async def ack(self) -> None:
+        self._broker.settle("acked")
+
+    async def nack(self, requeue: bool = True) -> None:
+        self._broker.settle("requeued" if requeue else "nacked")
+        if requeue:
+            self._broker.put(self)
+
+
+class _Exchange:
+    def __init__(self, broker: "InMemoryBroker", name: str) -> None:
+        self._broker = broker
+        self._name = name
+
+    async def publish(self, message: aio_pika.Message, routing_key: str) -> None:
+        self._broker.route(self._name, routing_key, message)
+
+
+class InMemoryBroker:
+    """The orchestrator's task queue, and the channel it republishes on.
+
+    Delivers the highest-priority ready message to the consumer callback
+    (none while consumption is cancelled), with at most ``prefetch``
+    unacked. Messages published to a delay queue come back once they
+    expire, as RabbitMQ dead-letters them onto the exchange; messages sent
+    to the DLQ are counted. ``serve`` accepts the ingester's messages.
+    """
+
+    def __init__(self, prefetch: int) -> None:
+        self.default_exchange = _Exchange(self, "")
+        self._window = asyncio.Semaphore(prefetch)
+        self._ready: list[tuple[int, int, BrokerMessage]] = []
+        self._order = itertools.count()
+        self._available = asyncio.Event()
+        self._callback: Callable[[BrokerMessage], Awaitable[None]] | None = None
+        self._deliveries: set[asyncio.Task[None]] = set()
+        self.published = 0
+        self.unacked = 0
+        self.delayed = 0
+        self.outcomes: Counter[str] = Counter()
+
+    @property
+    def idle(self) -> bool:
+        return not self._ready and not self.unacked and not self.delayed
+
+    def put(self, message: BrokerMessage) -> None:
+        heapq.heappush(self._ready, (-message.priority, next(self._order), message))
+        self._available.set()
+
+    def route(self, exchange: str, routing_key: str, message: aio_pika.Message) -> None:
+        if exchange == DLQ_EXCHANGE:
+            self.outcomes["dead-lettered"] += 1
+            return
+        incoming = BrokerMessage(
+            self, message.body, dict(message.headers or {}), message.priority or 0
+        )
+        if routing_key == ROUTING_KEY:
+            self.put(incoming)
+            return
+        self.outcomes["delayed"] += 1
+        self.delayed += 1
+        asyncio.get_running_loop().call_later(
+            float(message.expiration or 0), self._expire, incoming
+        )
+
+    def _expire(self, message: BrokerMessage) -> None:
+        self.delayed -= 1
+        self.put(message)
+
+    async def get_exchange(self, name: str) -> _Exchange:
+        return _Exchange(self, name)
+
+    async def consume(self, callback: Callable[[BrokerMessage], Awaitable[None]]) -> str:
+        self._callback = callback
+        self._available.set()
+        return "pipeline"
+
+    async def cancel(self, consumer_tag: str) -> None:
+        self._callback = None
+
+    def settle(self, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        self.unacked -= 1
+        self._window.release()
+
+    async def run(self) -> None:
+        while True:
+            await self._window.acquire()
+            while not self._ready or self._callback is None:
+                self._available.clear()
+                await self._available.wait()
+            *_, message = heapq.heappop(self._ready)
+            self.unacked += 1
+            delivery = asyncio.create_task(self._callback(message))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async for line in reader:
+            record = json.loads(line)
+            self.published += 1
+            priority = MESSAGE_PRIORITY[Priority(record["priority"])]
+            self.put(BrokerMessage(self, record["body"].encode(), record["headers"], priority))
+        writer.close()
+
+
+@dataclass
+class Results:
+    statuses: Counter[str] = field(default_factory=Counter)
+    ingest_seconds: list[float] = field(default_factory=list)
+    # Task ID -> when its (first) webhook was sent, for accepted and coalesced ones.
+    sent_at: dict[str, float] = field(default_factory=dict)
+    groups: set[str] = field(default_factory=set)
+    cancelled: set[str] = field(default_factory=set)
+
+    @property
+    def expected_messages(self) -> int:
+        return self.statuses["accepted"] + len(self.groups - self.cancelled)
+
+
+def _storm(args: argparse.Namespace) -> list[Event]:
+    rng = random.Random(args.seed)
+    mix = {
+        Source(source.strip()): float(weight)
+        for source, _, weight in (item.partition("=") for item in args.mix.split(","))
+    }
+    events: list[Event] = []
+    for i in range(args.events):
+        source = rng.choices(list(mix), list(mix.values()))[0]
+        issue = rng.randrange(args.issues)
+        if source == Source.JIRA:
+            payload: dict = {
+                "webhookEvent": "jira:issue_updated",
+                "issue": {
+                    "id": str(10_000 + issue),
+                    "key": f"BENCH-{issue}",
+                    "fields": {
+                        "summary": f"{rng.choice(TITLES)} #{issue}",
+                        "priority": {"name": rng.choice(("Highest", "High", "Medium", "Low"))},
+                        "description": "Details " * 40,
+                    },
+                },
+            }
+        elif source == Source.DATADOG:
+            payload = {
+                "id": str(issue),
+                "title": f"[Triggered] {rng.choice(ALERTS)} on svc-{issue % 20}",
+                "alert_status": rng.choice(("triggered", "warn")),
+                "tags": f"env:prod,service:svc-{issue % 20}",
+            }
+        else:
+            payload = {
+                "taskId": f"AX-{i}",
+                "status": "SUCCESS",
+                "qualityGate": {"status": rng.choice(("ERROR", "WARN", "OK"))},
+                "project": {"key": f"proj_{issue}", "name": f"Project {issue}"},
+            }
+        events.append((None, source, json.dumps(payload).encode()))
+    return events
+
+
+def _replay(path: str) -> list[Event]:
+    events: list[Event] = []
+    for line in Path(path).read_text().splitlines():
+        if line.strip():
+            record = json.loads(line)
+            payload = json.dumps(record["payload"]).encode()
+            events.append((record.get("at"), Source(record["source"]), payload))
+    return events
+
+
+async def _post(client: httpx.AsyncClient, source: Source, body: bytes, results: Results) -> None:
+    sent = time.time()
+    try:
+        response = await client.post(f"/webhooks/{PATHS[source]}", content=body)
+    except httpx.HTTPError:
+        results.statuses["error"] += 1
+        return
+    results.ingest_seconds.append(time.time() - sent)
+    if response.status_code == 429:
+        results.statuses["throttled"] += 1
+        return
+    if response.status_code != 202:
+        results.statuses[f"http {response.status_code}"] += 1
+        return
+    outcome = response.json()
+    status, task_id = outcome["status"], outcome["task_id"]
+    results.statuses[status] += 1
+    if status in ("accepted", "coalesced"):
+        results.sent_at.setdefault(task_id, sent)
+    if status == "coalesced":
+        results.groups.add(task_id)
+    elif status == "cancelled":
+        results.cancelled.add(task_id)
+
+
+async def _send(
+    client: httpx.AsyncClient, events: list[Event], rate: float, seed: int, results: Results
+) -> None:
+    """Send each event at its ``at`` offset, or with Poisson arrivals at ``rate``."""
+    rng = random.Random(seed)
+    started = time.monotonic()
+    offset = 0.0
+    posts = []
+    for at, source, body in events:
+        if at is None and rate > 0:
+            offset += rng.expovariate(rate)
+        delay = (offset if at is None else at) - (time.monotonic() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        posts.append(asyncio.create_task(_post(client, source, body, results)))
+    await asyncio.gather(*posts)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_ingester(
+    args: argparse.Namespace, broker_port: int, client: httpx.AsyncClient, port: int
+) -> asyncio.subprocess.Process:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(INGESTER_DIR),
+        "WEBHOOK_SECRET": WEBHOOK_SECRET,
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+        "COALESCE_DATADOG_WINDOW_SECONDS": str(args.coalesce_window),
+    }
+    # The ingester logs to stdout; keep the report on stdout readable.
+    process = await asyncio.create_subprocess_exec(
+        args.ingester_python,
+        "-m",
+        "benchmarks.serve",
+        "--port",
+        str(port),
+        "--broker",
+        f"127.0.0.1:{broker_port}",
+        cwd=INGESTER_DIR,
+        env=env,
+        stdout=sys.stderr.fileno(),
+    )
+    for _ in range(300):
+        if process.returncode is not None:
+            raise RuntimeError(f"Ingester exited with code {process.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Ingester did not become ready")
+
+
+def _percentiles(values: list[float]) -> tuple[float, float, float]:
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def _report(
+    results: Results,
+    spans: tuple[ReadableSpan, ...],
+    broker: InMemoryBroker,
+    fake_llm: FakeLLM,
+    fake_k8s: FakeKubernetes,
+    finished: bool,
+) -> None:
+    durations: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for span in spans:
+        if span.name in durations and span.end_time is not None:
+            durations[span.name].append((span.end_time - span.start_time) / 1e9)
+    to_job = [
+        fake_k8s.created[job] - sent
+        for task_id, sent in results.sent_at.items()
+        if (job := f"agent-job-{task_id}") in fake_k8s.created
+    ]
+    rows = [("ingest (HTTP)", results.ingest_seconds)]
+    rows += [(stage, durations[stage]) for stage in STAGES]
+    rows.append(("webhook to Job", to_job))
+
+    print(f"{'stage':<16}{'count':>7}{'p50':>11}{'p95':>11}{'p99':>11}")
+    for name, values in rows:
+        p50, p95, p99 = _percentiles(values)
+        print(
+            f"{name:<16}{len(values):>7}{p50 * 1000:>9.1f}ms"
+            f"{p95 * 1000:>9.1f}ms{p99 * 1000:>9.1f}ms"
+        )
+
+    events = sum(results.statuses.values())
+    outcomes = ", ".join(f"{status}={count}" for status, count in sorted(results.statuses.items()))
+    print(f"webhooks: {events} ({outcomes})")
+    if fake_k8s.created and results.sent_at:
+        elapsed = max(fake_k8s.created.values()) - min(results.sent_at.values())
+        jobs = len(fake_k8s.created)
+        print(
+            f"jobs: {jobs} created in {elapsed:.1f}s ({jobs / elapsed:.1f}/s sustained), "
+            f"peak active={fake_k8s.max_active}"
+        )
+    settled = ", ".join(f"{outcome}={count}" for outcome, count in sorted(broker.outcomes.items()))
+    print(f"broker: published={broker.published} ({settled})")
+    answered = fake_llm.calls - fake_llm.errors
+    print(
+        f"LLM: {fake_llm.calls} calls, {fake_llm.errors} errors, "
+        f"{fake_llm.tasks / answered if answered else 0:.1f} tasks/call"
+    )
+    if not finished:
+        print("incomplete: timed out before every message was settled")
+
+
+async def _run(args: argparse.Namespace, events: list[Event]) -> None:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    fake_llm = FakeLLM(args.llm_latency_ms / 1000, args.llm_per_task_ms / 1000, args.llm_error_rate)
+    llm_server = await fake_llm.start()
+    fake_k8s = FakeKubernetes(args.start_delay, args.job_seconds, args.job_failure_rate)
+    k8s_server = await fake_k8s.start()
+    broker = InMemoryBroker(args.prefetch)
+    broker_server = await asyncio.start_server(broker.serve, "127.0.0.1", 0)
+
+    settings.anthropic_base_url = f"http://127.0.0.1:{llm_server.sockets[0].getsockname()[1]}"
+    settings.retry_base_delay_seconds = args.retry_delay
+    settings.retry_max_delay_seconds = args.retry_delay * 8
+    settings.inflight_defer_seconds = args.defer_seconds
+    settings.job_max_active = args.max_active
+    configuration = k8s_client.Configuration()
+    configuration.host = f"http://127.0.0.1:{k8s_server.sockets[0].getsockname()[1]}"
+    consumer = Consumer(dispatcher=JobManager(configuration))
+    await consumer.start(broker, broker)
+    delivering = asyncio.create_task(broker.run())
+
+    port = _free_port()
+    client = httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}",
+        headers={"X-Webhook-Secret": WEBHOOK_SECRET},
+        limits=httpx.Limits(max_connections=args.connections),
+        timeout=60,
+    )
+    ingester = await _start_ingester(
+        args, broker_server.sockets[0].getsockname()[1], client, port
+    )
+
+    results = Results()
+    finished = False
+    try:
+        await _send(client, events, args.rate, args.seed, results)
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline:
+            if broker.published >= results.expected_messages and broker.idle:
+                finished = True
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        ingester.terminate()
+        await ingester.wait()
+        await client.aclose()
+        delivering.cancel()
+        await consumer.shutdown()
+        fake_k8s.close()
+        for server in (broker_server, llm_server, k8s_server):
+            server.close()
+
+    _report(results, exporter.get_finished_spans(), broker, fake_llm, fake_k8s, finished)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replay", help="Webhooks to replay (JSON lines) instead of a storm")
+    parser.add_argument("--events", type=int, default=500, help="Storm size")
+    parser.add_argument(
+        "--rate", type=float, default=50.0, help="Storm arrivals per second; 0 sends at once"
+    )
+    parser.add_argument("--mix", default="jira=0.5,datadog=0.3,sonarcloud=0.2")
+    parser.add_argument("--issues", type=int, default=200, help="Distinct issues per source")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-per-task-ms", type=float, default=50.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--start-delay", type=float, default=0.2, help="Seconds until a Job runs")
+    parser.add_argument("--job-seconds", type=float, default=2.0, help="Seconds a Job runs")
+    parser.add_argument("--job-failure-rate", type=float, default=0.0)
+    parser.add_argument("--prefetch", type=int, default=settings.consumer_prefetch_count)
+    parser.add_argument("--max-active", type=int, default=settings.job_max_active)
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="First retry delay")
+    parser.add_argument("--defer-seconds", type=float, default=2.0)
+    parser.add_argument("--coalesce-window", type=float, default=2.0)
+    parser.add_argument("--connections", type=int, default=64, help="Concurrent webhook posts")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait to drain")
+    parser.add_argument("--ingester-python", default=sys.executable)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    events = _replay(args.replay) if args.replay else _storm(args)
+    asyncio.run(_run(args, events))
+
+
+if __name__ == "__main__":
+    main()
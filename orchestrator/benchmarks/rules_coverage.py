@@ -0,0 +1,85 @@
+"""Replay historical tasks through the routing rules and report coverage.
+
+Reads AgentTask JSON, one per line (as published to the orchestrator queue,
+e.g. exported from the DLQ or message logs), and reports how many tasks the
+rules would route without the LLM, per source and per rule, plus the most
+common unmatched title templates as candidates for new rules::
+
+    uv run python -m benchmarks.rules_coverage --rules rules.yaml tasks.ndjson
+"""
+
+import argparse
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.config import settings
+from app.models import AgentTask, Source
+from app.route_cache import title_template
+from app.rules import RulesEngine
+
+
+def _load(paths: list[Path]) -> list[AgentTask]:
+    tasks = []
+    for path in paths:
+        for line in path.read_text().splitlines():
+            if line.strip():
+                tasks.append(AgentTask.model_validate_json(line))
+    return tasks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tasks", type=Path, nargs="+", help="NDJSON files of AgentTask")
+    parser.add_argument(
+        "--rules",
+        default=settings.routing_rules_path,
+        required=not settings.routing_rules_path,
+        help="Rules YAML (default: ROUTING_RULES_PATH)",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Unmatched title templates to list")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    engine = RulesEngine.load(args.rules)
+    tasks = _load(args.tasks)
+
+    per_rule: Counter[str] = Counter()
+    total: Counter[Source] = Counter()
+    matched: Counter[Source] = Counter()
+    unmatched: Counter[tuple[str, str]] = Counter()
+
+    started = time.perf_counter()
+    for task in tasks:
+        total[task.source] += 1
+        result = engine.route(task)
+        if result is None:
+            unmatched[task.source.value, title_template(task.title)] += 1
+        else:
+            matched[task.source] += 1
+            per_rule[result[0].name] += 1
+    elapsed = time.perf_counter() - started
+
+    count = max(len(tasks), 1)
+    print(
+        f"{len(tasks)} tasks, {len(engine.rules)} rules: "
+        f"{sum(matched.values()) / count:.1%} routed by rules "
+        f"({elapsed / count * 1_000_000:.1f} us/task)"
+    )
+    print("\nCoverage per source:")
+    for source in Source:
+        if total[source]:
+            share = matched[source] / total[source]
+            print(f"  {source.value:<12} {matched[source]:>7}/{total[source]:<7} {share:.1%}")
+    print("\nMatches per rule:")
+    for rule in engine.rules:
+        print(f"  {rule.name:<40} {per_rule[rule.name]:>7}")
+    if unmatched:
+        print(f"\nTop {args.top} unmatched title templates:")
+        for (source, template), hits in unmatched.most_common(args.top):
+            print(f"  {hits:>7}  {source:<12} {template}")
+
+
+if __name__ == "__main__":
+    main()
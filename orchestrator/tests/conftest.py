@@ -0,0 +1,32 @@
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from app.models import AgentTask, Priority, Source
+
+MakeTask = Callable[..., AgentTask]
+
+
+@pytest.fixture
+def make_task() -> MakeTask:
+    def make_task(
+        source: Source = Source.JIRA,
+        external_id: str = "PAY-1",
+        title: str = "NullPointerException in checkout",
+        priority: Priority = Priority.P3,
+        raw_payload: dict[str, Any] | None = None,
+    ) -> AgentTask:
+        return AgentTask(
+            task_id=uuid4(),
+            source=source,
+            external_id=external_id,
+            title=title,
+            priority=priority,
+            raw_payload=raw_payload or {},
+            created_at=datetime.now(timezone.utc),
+        )
+
+    return make_task
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.batcher import RouteBatcher
+from app.models import AgentTask, Complexity, Priority, RouterPlan, TemplateId
+from app.prompt import Prompt, build_prompt
+
+from tests.conftest import MakeTask
+
+
+def plan_for(task: AgentTask, via: str) -> RouterPlan:
+    return RouterPlan(
+        template_id=TemplateId.PYTHON_BACKEND,
+        complexity=Complexity.LOW,
+        context_summary=f"{via}: {task.title}",
+    )
+
+
+class FakeRouter:
+    """Answers batches for all but ``skip`` tasks, or fails them outright."""
+
+    def __init__(self, skip: int = 0, fail_batch: bool = False) -> None:
+        self.skip = skip
+        self.fail_batch = fail_batch
+        self.batches: list[int] = []
+        self.singles: list[str] = []
+
+    async def route_one(self, task: AgentTask, prompt: Prompt) -> RouterPlan:
+        self.singles.append(task.external_id)
+        return plan_for(task, "single")
+
+    async def route_batch(
+        self, items: list[tuple[AgentTask, Prompt]]
+    ) -> dict[str, RouterPlan]:
+        self.batches.append(len(items))
+        if self.fail_batch:
+            raise RuntimeError("LLM unavailable")
+        return {str(task.task_id): plan_for(task, "batch") for task, _ in items[self.skip :]}
+
+
+def batcher(router: FakeRouter, max_tasks: int = 10) -> RouteBatcher:
+    return RouteBatcher(
+        router.route_one,
+        router.route_batch,
+        window=0.01,
+        max_tasks=max_tasks,
+        priorities={Priority.P3, Priority.P4},
+    )
+
+
+async def route_all(batch: RouteBatcher, tasks: list[AgentTask]) -> list:
+    return await asyncio.gather(
+        *(batch.route(task, build_prompt(task, 500, 100)) for task in tasks),
+        return_exceptions=True,
+    )
+
+
+async def test_tasks_in_a_window_share_one_call(make_task: MakeTask) -> None:
+    router = FakeRouter()
+    tasks = [make_task(external_id=f"PAY-{n}") for n in range(3)]
+    plans = await route_all(batcher(router), tasks)
+    assert router.batches == [3] and router.singles == []
+    assert [plan.context_summary for plan in plans] == [
+        f"batch: {task.title}" for task in tasks
+    ]
+
+
+async def test_full_batch_is_sent_before_the_window(make_task: MakeTask) -> None:
+    router = FakeRouter()
+    tasks = [make_task(external_id=f"PAY-{n}") for n in range(4)]
+    await route_all(batcher(router, max_tasks=2), tasks)
+    assert router.batches == [2, 2]
+
+
+async def test_single_task_uses_the_single_call(make_task: MakeTask) -> None:
+    router = FakeRouter()
+    [plan] = await route_all(batcher(router), [make_task()])
+    assert router.batches == [] and router.singles == ["PAY-1"]
+    assert plan.context_summary.startswith("single")
+
+
+async def test_tasks_missing_from_the_response_are_routed_alone(
+    make_task: MakeTask,
+) -> None:
+    router = FakeRouter(skip=2)
+    tasks = [make_task(external_id=f"PAY-{n}") for n in range(4)]
+    plans = await route_all(batcher(router), tasks)
+    assert router.batches == [4]
+    assert router.singles == ["PAY-0", "PAY-1"]
+    assert [plan.context_summary.split(":")[0] for plan in plans] == [
+        "single", "single", "batch", "batch"
+    ]
+
+
+async def test_failed_batch_fails_every_task(make_task: MakeTask) -> None:
+    router = FakeRouter(fail_batch=True)
+    tasks = [make_task(external_id=f"PAY-{n}") for n in range(3)]
+    results = await route_all(batcher(router), tasks)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert router.singles == []
+
+
+@pytest.mark.parametrize("priority", [Priority.P1, Priority.P2])
+def test_urgent_tasks_are_not_batched(make_task: MakeTask, priority: Priority) -> None:
+    assert not batcher(FakeRouter()).handles(make_task(priority=priority))
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app.llm import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+OPEN_SECONDS = 0.05
+
+
+@pytest.fixture
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(failures=3, open_seconds=OPEN_SECONDS, max_wait=1)
+
+
+@pytest.fixture
+def states(breaker: CircuitBreaker) -> list[str]:
+    changes: list[str] = []
+    breaker.subscribe(changes.append)
+    return changes
+
+
+async def test_opens_after_consecutive_failures(
+    breaker: CircuitBreaker, states: list[str]
+) -> None:
+    breaker.failure(None)
+    breaker.failure(None)
+    assert breaker.state == CLOSED
+    breaker.failure(None)
+    assert breaker.state == OPEN
+    assert states == [OPEN]
+
+
+async def test_success_resets_the_failure_count(breaker: CircuitBreaker) -> None:
+    breaker.failure(None)
+    breaker.failure(None)
+    breaker.success()
+    breaker.failure(None)
+    breaker.failure(None)
+    assert breaker.state == CLOSED
+
+
+async def test_probe_success_closes_it(
+    breaker: CircuitBreaker, states: list[str]
+) -> None:
+    for _ in range(3):
+        breaker.failure(None)
+    await asyncio.sleep(OPEN_SECONDS * 2)
+    assert breaker.state == HALF_OPEN
+
+    await breaker.enter()
+    breaker.success()
+    assert states == [OPEN, HALF_OPEN, CLOSED]
+
+
+async def test_probe_failure_reopens_it(
+    breaker: CircuitBreaker, states: list[str]
+) -> None:
+    for _ in range(3):
+        breaker.failure(None)
+    await asyncio.sleep(OPEN_SECONDS * 2)
+
+    await breaker.enter()
+    breaker.failure(None)
+    assert states == [OPEN, HALF_OPEN, OPEN]
+
+
+async def test_half_open_lets_one_probe_through(breaker: CircuitBreaker) -> None:
+    for _ in range(3):
+        breaker.failure(None)
+    await asyncio.sleep(OPEN_SECONDS * 2)
+
+    await breaker.enter()
+    second = asyncio.create_task(breaker.enter())
+    await asyncio.sleep(0.01)
+    assert not second.done()
+    breaker.success()
+    await asyncio.wait_for(second, 1)
+
+
+async def test_open_breaker_holds_calls_until_it_half_opens(
+    breaker: CircuitBreaker,
+) -> None:
+    for _ in range(3):
+        breaker.failure(None)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await breaker.enter()
+    assert loop.time() - started >= OPEN_SECONDS * 0.9
+    assert breaker.state == HALF_OPEN
+
+
+async def test_retry_after_holds_calls_while_closed(breaker: CircuitBreaker) -> None:
+    breaker.failure(OPEN_SECONDS)
+    assert breaker.state == CLOSED
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await breaker.enter()
+    assert loop.time() - started >= OPEN_SECONDS * 0.9
+
+
+async def test_calls_give_up_after_max_wait() -> None:
+    breaker = CircuitBreaker(failures=1, open_seconds=10, max_wait=0.01)
+    breaker.failure(None)
+    with pytest.raises(CircuitOpenError):
+        await breaker.enter()
@@ -0,0 +1,169 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.inflight import (
+    DEFER,
+    DROP,
+    WORK_KEY_LABEL,
+    InFlight,
+    InFlightIndex,
+    parse_policies,
+    work_key,
+    work_key_label,
+)
+from app.models import AgentTask, Source
+from app.watcher import Listener
+
+from tests.conftest import MakeTask
+
+
+class FakeWatcher:
+    def __init__(self) -> None:
+        self.synced = asyncio.Event()
+        self.synced.set()
+        self._listeners: list[Listener] = []
+
+    def subscribe(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def emit(self, kind: str, task: AgentTask, finished: bool = False) -> None:
+        job: dict[str, Any] = {
+            "metadata": {
+                "labels": {
+                    WORK_KEY_LABEL: work_key_label(task),
+                    "task-id": str(task.task_id),
+                }
+            }
+        }
+        if finished:
+            job["status"] = {"conditions": [{"type": "Complete", "status": "True"}]}
+        for listener in self._listeners:
+            listener(kind, job)
+
+
+class Index:
+    def __init__(self, policies: str) -> None:
+        self.watcher = FakeWatcher()
+        self.superseded: list[str] = []
+        self.inflight = InFlightIndex(
+            self.watcher, parse_policies(policies), self.supersede
+        )
+
+    async def supersede(self, task_id: str) -> None:
+        self.superseded.append(task_id)
+
+
+async def dispatch(index: Index, task: AgentTask) -> None:
+    async with index.inflight.claim(task):
+        index.inflight.dispatched(task, str(task.task_id))
+
+
+@pytest.mark.parametrize("policy", [DROP, DEFER])
+async def test_task_for_an_issue_with_a_job_is_refused(
+    make_task: MakeTask, policy: str
+) -> None:
+    index = Index(f"jira={policy}")
+    running = make_task()
+    index.watcher.emit("ADDED", running)
+
+    with pytest.raises(InFlight) as refused:
+        await dispatch(index, make_task())
+    assert (refused.value.policy, refused.value.holder) == (policy, str(running.task_id))
+
+
+async def test_finished_job_no_longer_holds_the_issue(make_task: MakeTask) -> None:
+    index = Index("jira=drop")
+    running = make_task()
+    index.watcher.emit("ADDED", running)
+    index.watcher.emit("MODIFIED", running, finished=True)
+    await dispatch(index, make_task())
+
+
+async def test_other_issues_and_sources_without_a_policy_are_dispatched(
+    make_task: MakeTask,
+) -> None:
+    index = Index("jira=drop")
+    index.watcher.emit("ADDED", make_task())
+    await dispatch(index, make_task(external_id="PAY-2"))
+    await dispatch(index, make_task(source=Source.DATADOG))
+    await dispatch(index, make_task(source=Source.DATADOG))
+
+
+async def test_redelivered_task_is_not_refused_by_its_own_job(
+    make_task: MakeTask,
+) -> None:
+    index = Index("jira=drop")
+    task = make_task()
+    index.watcher.emit("ADDED", task)
+    await dispatch(index, task)
+
+
+async def test_dispatched_job_holds_the_issue_before_the_watch_sees_it(
+    make_task: MakeTask,
+) -> None:
+    index = Index("jira=defer")
+    await dispatch(index, make_task())
+    with pytest.raises(InFlight):
+        await dispatch(index, make_task())
+
+
+async def test_supersede_replaces_the_running_job(make_task: MakeTask) -> None:
+    index = Index("sonarcloud=supersede")
+    payload = {"project": {"key": "acme_payments-api"}}
+    running = make_task(source=Source.SONARCLOUD, external_id="1", raw_payload=payload)
+    index.watcher.emit("ADDED", running)
+
+    newer = make_task(source=Source.SONARCLOUD, external_id="2", raw_payload=payload)
+    await dispatch(index, newer)
+    assert index.superseded == [str(running.task_id)]
+
+    # The newer task's Job now holds the project in turn.
+    latest = make_task(source=Source.SONARCLOUD, external_id="3", raw_payload=payload)
+    await dispatch(index, latest)
+    assert index.superseded == [str(running.task_id), str(newer.task_id)]
+
+
+async def test_task_being_routed_holds_the_issue(make_task: MakeTask) -> None:
+    index = Index("jira=defer")
+    first = make_task()
+    async with index.inflight.claim(first):
+        with pytest.raises(InFlight) as refused:
+            await dispatch(index, make_task())
+    assert refused.value.holder == str(first.task_id)
+
+
+async def test_supersede_waits_for_a_task_being_routed(make_task: MakeTask) -> None:
+    index = Index("jira=supersede")
+    first, second = make_task(), make_task()
+    routed = asyncio.Event()
+
+    async def route_first() -> None:
+        async with index.inflight.claim(first):
+            await routed.wait()
+            index.inflight.dispatched(first, str(first.task_id))
+
+    routing = asyncio.create_task(route_first())
+    await asyncio.sleep(0)
+    superseding = asyncio.create_task(dispatch(index, second))
+    await asyncio.sleep(0.01)
+    assert not superseding.done()
+
+    routed.set()
+    await asyncio.gather(routing, superseding)
+    assert index.superseded == [str(first.task_id)]
+
+
+def test_sonar_work_key_is_the_project(make_task: MakeTask) -> None:
+    task = make_task(
+        source=Source.SONARCLOUD,
+        external_id="analysis-7",
+        raw_payload={"project": {"key": "acme_payments-api"}},
+    )
+    assert work_key(task) == ("sonarcloud", "acme_payments-api")
+
+
+def test_unknown_policy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        parse_policies("jira=merge")
@@ -0,0 +1,59 @@
+from app.models import AgentTask, Complexity, RouterPlan, Source, TemplateId
+from app.route_cache import MemoryRouteCacheBackend, RouteCache, summary_template
+
+from tests.conftest import MakeTask
+
+PAYLOAD = {"body": "x" * 2000}
+
+
+def monitor_alert(make_task: MakeTask, host: str) -> AgentTask:
+    return make_task(
+        source=Source.DATADOG,
+        external_id="42",
+        title=f"[Triggered] High latency on {host}",
+        raw_payload=PAYLOAD,
+    )
+
+
+def cache() -> RouteCache:
+    return RouteCache(MemoryRouteCacheBackend(10), 60, {Source.DATADOG})
+
+
+def routed(task: AgentTask) -> RouterPlan:
+    return RouterPlan(
+        template_id=TemplateId.PYTHON_BACKEND,
+        complexity=Complexity.MEDIUM,
+        required_skills=["profiling"],
+        context_summary=f"{task.title} ({task.external_id}): check the slow endpoints.",
+    )
+
+
+async def test_hit_gets_a_summary_like_the_miss_for_its_own_task(
+    make_task: MakeTask,
+) -> None:
+    routes = cache()
+    first = monitor_alert(make_task, "web-1")
+    miss = routed(first)
+    await routes.put(first, miss)
+
+    second = monitor_alert(make_task, "web-2")
+    hit = await routes.get(second)
+    assert hit is not None
+    assert hit.model_dump(exclude={"context_summary"}) == miss.model_dump(
+        exclude={"context_summary"}
+    )
+    assert hit.context_summary == routed(second).context_summary
+
+
+def test_summary_not_naming_the_task_gets_its_title(make_task: MakeTask) -> None:
+    task = make_task(title="Disk full")
+    template = summary_template(task, "Clean up {old} logs.")
+    assert template.format_map({"title": "Disk full again", "external_id": ""}) == (
+        "Disk full again: Clean up {old} logs."
+    )
+
+
+def test_external_id_is_only_replaced_as_a_whole_token(make_task: MakeTask) -> None:
+    task = make_task(external_id="PAY-1", title="Refund fails")
+    template = summary_template(task, "Refund fails (PAY-1, see PAY-12).")
+    assert template == "{title} ({external_id}, see PAY-12)."
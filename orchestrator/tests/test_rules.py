@@ -0,0 +1,140 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.brain import TaskRouter
+from app.llm import CircuitBreaker
+from app.models import Complexity, Priority, Source, TemplateId
+from app.route_cache import MemoryRouteCacheBackend, RouteCache
+from app.rules import Rule, RulesEngine
+
+from tests.conftest import MakeTask
+
+PLAN = {"template_id": "python-backend", "complexity": "low"}
+
+
+def rule(name: str = "rule", **spec: Any) -> Rule:
+    return Rule.compile({"name": name, "plan": PLAN, **spec})
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"plan": PLAN},
+        {"name": "no-plan"},
+        {"name": "bad-source", "source": "github", "plan": PLAN},
+        {"name": "bad-title", "title": "(unclosed", "plan": PLAN},
+        {"name": "bad-template", "plan": {**PLAN, "template_id": "cobol"}},
+        {"name": "bad-summary", "plan": {**PLAN, "context_summary": "{assignee}"}},
+    ],
+)
+def test_invalid_rules_fail_to_compile(spec: dict[str, Any]) -> None:
+    with pytest.raises(ValueError):
+        Rule.compile(spec)
+
+
+def test_source_and_title_conditions(make_task: MakeTask) -> None:
+    disk = rule(source="datadog", title="disk (space|usage)")
+    assert disk.matches(make_task(source=Source.DATADOG, title="[P2] Disk space low"))
+    assert not disk.matches(make_task(source=Source.JIRA, title="Disk space low"))
+    assert not disk.matches(make_task(source=Source.DATADOG, title="High CPU"))
+
+
+def test_payload_patterns_fully_match_any_list_item(make_task: MakeTask) -> None:
+    backend = rule(source=["jira"], match={"issue.fields.components.name": "(?i)backend|api"})
+    components = [{"name": "Web"}, {"name": "API"}]
+    assert backend.matches(
+        make_task(raw_payload={"issue": {"fields": {"components": components}}})
+    )
+    apigw = [{"name": "api-gateway"}]
+    assert not backend.matches(
+        make_task(raw_payload={"issue": {"fields": {"components": apigw}}})
+    )
+    assert not backend.matches(make_task())
+
+
+def test_every_label_must_be_present(make_task: MakeTask) -> None:
+    frontend = rule(labels=["frontend", "bug"])
+    labelled = {"issue": {"fields": {"labels": ["bug", "frontend", "ux"]}}}
+    assert frontend.matches(make_task(raw_payload=labelled))
+    assert not frontend.matches(make_task(raw_payload={"issue": {"fields": {"labels": ["bug"]}}}))
+    assert frontend.matches(
+        make_task(source=Source.DATADOG, raw_payload={"tags": "frontend, bug,env:prod"})
+    )
+
+
+def test_first_matching_rule_wins_and_renders_its_plan(make_task: MakeTask) -> None:
+    engine = RulesEngine(
+        [
+            rule("sonar", source="sonarcloud"),
+            rule(
+                "jira",
+                source="jira",
+                plan={**PLAN, "context_summary": "{source} {external_id}: {title}"},
+            ),
+            rule("catch-all"),
+        ]
+    )
+    matched = engine.route(make_task())
+    assert matched is not None
+    matched_rule, plan = matched
+    assert matched_rule.name == "jira"
+    assert plan.template_id == TemplateId.PYTHON_BACKEND
+    assert plan.complexity == Complexity.LOW
+    assert plan.context_summary == "jira PAY-1: NullPointerException in checkout"
+
+
+def test_no_matching_rule(make_task: MakeTask) -> None:
+    assert RulesEngine([rule(source="sonarcloud")]).route(make_task()) is None
+
+
+def test_duplicate_rule_names_are_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "rules.yaml"
+    path.write_text(
+        "rules:\n"
+        "  - {name: same, plan: {template_id: python-backend, complexity: low}}\n"
+        "  - {name: same, plan: {template_id: java-backend, complexity: low}}\n"
+    )
+    with pytest.raises(ValueError, match="Duplicate"):
+        RulesEngine.load(path)
+
+
+def test_example_rules_load() -> None:
+    engine = RulesEngine.load(Path(__file__).parents[1] / "rules.example.yaml")
+    assert engine.rules[0].name == "sonar-payments-api"
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.breaker = CircuitBreaker(failures=3, open_seconds=1, max_wait=1)
+        self.calls = 0
+
+    async def create(self, **kwargs: Any) -> SimpleNamespace:
+        self.calls += 1
+        text = '{"template_id": "java-backend", "complexity": "high", "context_summary": "llm"}'
+        return SimpleNamespace(
+            usage=SimpleNamespace(input_tokens=10, output_tokens=10),
+            content=[SimpleNamespace(text=text)],
+        )
+
+    async def close(self) -> None:
+        pass
+
+
+async def test_tasks_no_rule_matches_fall_through_to_the_llm(make_task: MakeTask) -> None:
+    client = FakeClient()
+    router = TaskRouter(
+        cache=RouteCache(MemoryRouteCacheBackend(10), 0, set()),
+        rules=RulesEngine([rule("sonar", source="sonarcloud")]),
+        client=client,  # type: ignore[arg-type]
+    )
+    try:
+        ruled = await router.route(make_task(source=Source.SONARCLOUD, priority=Priority.P1))
+        assert ruled.template_id == TemplateId.PYTHON_BACKEND and client.calls == 0
+
+        routed = await router.route(make_task(priority=Priority.P1))
+        assert routed.template_id == TemplateId.JAVA_BACKEND and client.calls == 1
+    finally:
+        await router.close()
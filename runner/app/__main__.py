@@ -1,11 +1,16 @@
 from app.logging_config import setup_logging
 from app.runner import AgentRunner
+from app.tracing import setup_tracing, shutdown_tracing
 
 
 def main() -> None:
     setup_logging()
+    setup_tracing()
     runner = AgentRunner()
-    runner.run()
+    try:
+        runner.run()
+    finally:
+        shutdown_tracing()
 
 
 if __name__ == "__main__":
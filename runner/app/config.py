@@ -14,6 +14,16 @@ class Settings(BaseSettings):
     max_review_rejections: int = 3
     log_level: str = "INFO"
 
+    # Set by the orchestrator on the Job: the task's trace context and when
+    # the Job was created (Unix ns). Spans are exported like the other
+    # services' (OTLP/HTTP endpoint and/or an OTLP/JSON trace file).
+    traceparent: str = ""
+    dispatched_at: int = 0
+    otel_exporter_otlp_endpoint: str = ""
+    otel_service_name: str = "anton-runner"
+    trace_file: str = ""
+    trace_sample_ratio: float = 1.0
+
     model_config = {"env_file": ".env"}
 
 
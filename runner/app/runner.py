@@ -8,11 +8,13 @@ from pathlib import Path
 from urllib.parse import urlparse
 
 import anthropic
+from opentelemetry import trace
 
 from app.agent_tools import TOOL_DEFINITIONS, ToolExecutor
 from app.config import settings
 from app.models import TaskConfig
 from app.reviewer import Reviewer
+from app.tracing import extract, record_span, tracer
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +31,23 @@ class AgentRunner:
         self.reviewer = Reviewer()
 
     def run(self) -> None:
+        # Continue the orchestrator's trace; the span starts when the Job was
+        # created so that scheduling and image pull show as "pod start".
+        with tracer.start_as_current_span(
+            "run task",
+            context=extract({"traceparent": settings.traceparent}),
+            start_time=settings.dispatched_at or None,
+        ):
+            record_span("pod start", settings.dispatched_at)
+            self._run()
+
+    def _run(self) -> None:
         task = self._load_task()
+        trace.get_current_span().set_attribute("anton.issue_id", task.issue_id)
         task_id = self._sanitize_branch_name(task.issue_id)
-        repo_dir = self._clone_repo(task.repo_url, task_id)
-        self._setup_git(repo_dir, task_id)
+        with tracer.start_as_current_span("clone"):
+            repo_dir = self._clone_repo(task.repo_url, task_id)
+            self._setup_git(repo_dir, task_id)
         executor = ToolExecutor(repo_dir)
 
         for attempt in range(settings.max_review_rejections):
@@ -48,12 +63,16 @@ class AgentRunner:
                 sys.exit(1)
 
             logger.info("Coder submitted: %s", summary)
-            review = self.reviewer.review(repo_dir, task.task_description)
+            with tracer.start_as_current_span("review") as span:
+                review = self.reviewer.review(repo_dir, task.task_description)
+                span.set_attribute("anton.review.approved", review.approved)
             logger.info("Review result: approved=%s reason=%s", review.approved, review.reason)
 
             if review.approved:
-                self._commit_and_push(repo_dir, task_id, summary)
-                self._create_pr(repo_dir, task, summary)
+                with tracer.start_as_current_span("push"):
+                    self._commit_and_push(repo_dir, task_id, summary)
+                with tracer.start_as_current_span("create pr"):
+                    self._create_pr(repo_dir, task, summary)
                 logger.info("PR created successfully")
                 return
 
@@ -121,13 +140,23 @@ class AgentRunner:
         for turn in range(settings.max_coder_turns):
             logger.info("Coder turn %d/%d", turn + 1, settings.max_coder_turns)
 
-            response = self.client.messages.create(
-                model=settings.anthropic_model,
-                max_tokens=8192,
-                system=CODER_SYSTEM_PROMPT,
-                tools=TOOL_DEFINITIONS,
-                messages=messages,
-            )
+            with tracer.start_as_current_span(
+                "coder turn", attributes={"anton.turn": turn + 1}
+            ) as span:
+                response = self.client.messages.create(
+                    model=settings.anthropic_model,
+                    max_tokens=8192,
+                    system=CODER_SYSTEM_PROMPT,
+                    tools=TOOL_DEFINITIONS,
+                    messages=messages,
+                )
+                span.set_attributes(
+                    {
+                        "anton.stop_reason": response.stop_reason or "",
+                        "anton.tokens.input": response.usage.input_tokens,
+                        "anton.tokens.output": response.usage.output_tokens,
+                    }
+                )
 
             # Process response and collect tool uses
             assistant_content = response.content
@@ -148,7 +177,10 @@ class AgentRunner:
             tool_results = []
             submit_summary = None
             for tool_use in tool_uses:
-                result_text, is_submit = executor.execute(tool_use.name, tool_use.input)
+                with tracer.start_as_current_span(
+                    "tool call", attributes={"anton.tool": tool_use.name}
+                ):
+                    result_text, is_submit = executor.execute(tool_use.name, tool_use.input)
                 logger.info("Tool %s -> %s", tool_use.name, result_text[:100])
                 tool_results.append({
                     "type": "tool_result",
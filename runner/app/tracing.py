@@ -0,0 +1,94 @@
+import base64
+import json
+import logging
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from google.protobuf.json_format import MessageToDict
+from opentelemetry import context, propagate, trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("anton")
+
+_ID_FIELDS = ("traceId", "spanId", "parentSpanId")
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """Appends spans to a file as OTLP/JSON; see the orchestrator's copy."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        request = MessageToDict(encode_spans(spans), use_integers_for_enums=True)
+        for resource_spans in request.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                for span in scope_spans.get("spans", []):
+                    # Protobuf JSON encodes bytes as base64; OTLP/JSON wants hex IDs.
+                    for field in _ID_FIELDS:
+                        if field in span:
+                            span[field] = base64.b64decode(span[field]).hex()
+                    for link in span.get("links", []):
+                        for field in _ID_FIELDS:
+                            if field in link:
+                                link[field] = base64.b64decode(link[field]).hex()
+        with self._lock:
+            self._file.write(json.dumps(request, separators=(",", ":")) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def setup_tracing() -> None:
+    """Export spans if an OTLP endpoint or a trace file is configured."""
+    if not settings.otel_exporter_otlp_endpoint and not settings.trace_file:
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.otel_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.trace_sample_ratio)),
+    )
+    if settings.otel_exporter_otlp_endpoint:
+        endpoint = settings.otel_exporter_otlp_endpoint.rstrip("/") + "/v1/traces"
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    if settings.trace_file:
+        provider.add_span_processor(BatchSpanProcessor(OTLPJsonFileExporter(settings.trace_file)))
+    trace.set_tracer_provider(provider)
+    logger.info(
+        "Tracing enabled",
+        extra={"endpoint": settings.otel_exporter_otlp_endpoint, "file": settings.trace_file},
+    )
+
+
+def shutdown_tracing() -> None:
+    """Flush and stop exporting; spans still buffered are sent first."""
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
+
+
+def extract(carrier: Mapping[str, str]) -> context.Context:
+    """The trace context the orchestrator passed in the Job's environment."""
+    return propagate.extract(dict(carrier))
+
+
+def record_span(name: str, start_ns: int, end_ns: int | None = None, **attributes: Any) -> None:
+    """Record a span for something that already happened, such as the pod start."""
+    end_ns = end_ns or time.time_ns()
+    if not start_ns or start_ns > end_ns:
+        return
+    tracer.start_span(name, start_time=start_ns, attributes=attributes).end(end_time=end_ns)